@@ -1,15 +1,32 @@
 from flask import Flask, render_template, request, jsonify
 import pandas as pd
+import numpy as np
 from functools import reduce
 import operator
-import ast
+import os
+# search structures of the final app, installed with `pip install -e final_app/Streamlit_app`
+from recipe_search.search_bundle_loader import load_search_bundle
+from recipe_search.ingredient_store import IngredientStore
+from recipe_search.fridge_ranking import RecipeIngredientMatrix, top_k
+
+# dataset and search bundle written by the preprocessing script of the final app
+FINAL_APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'final_app')
+DATASET_PATH = os.path.join(FINAL_APP_DIR, 'Data', 'sample_recipes_10k.parquet')
 
 app = Flask(__name__)
 
-base = r'^{}'
-expr = '(?=.*{})'
-echant = pd.read_csv('echant_10k_recipes.csv')
-echant = echant.set_index(echant['Unnamed: 0'].values).drop(columns=['Unnamed: 0'])
+echant = pd.read_parquet(DATASET_PATH)
+bundle = load_search_bundle(DATASET_PATH)
+# number of distinct ingredients of each recipe, from the recipe x ingredient matrix
+n_ingredients = (RecipeIngredientMatrix(IngredientStore.from_bundle(bundle)).row_lengths if bundle is not None
+                 else echant['NER'].apply(lambda ner: len(set(ner))).to_numpy())
+
+def recipes_with(word):
+    """row positions of the recipes with an ingredient containing the word"""
+    if bundle is None:
+        return np.flatnonzero(echant['NER'].apply(lambda ner: any(word in x for x in ner)).to_numpy())
+    postings = [bundle.ingredient_recipes(x) for x in bundle.ingredients if word in x]
+    return np.unique(np.concatenate(postings)) if postings else np.array([], dtype=int)
 
 app = Flask(__name__, template_folder='templates')
 
@@ -24,11 +41,11 @@ def prediction():
         text = request.form["text"]
         sentence = text.split(' ')
         nb = len(sentence)
-        rep = echant[echant['NER'].str.contains(base.format(''.join(expr.format(w) for w in sentence)))][['title','NER']]
-        rep['%'] = rep['NER'].apply(lambda sentence: round((nb / len(ast.literal_eval(sentence)))*100,1))
-        if len(rep) != 0 : 
-            best = rep['%'].idxmax()
-            res = echant.loc[best]
+        rows = reduce(np.intersect1d, [recipes_with(w) for w in sentence])
+        rate = np.round(nb / np.maximum(n_ingredients[rows], 1) * 100, 1)
+        if len(rows) != 0 : 
+            best = rows[top_k(rate, 1)[0]]
+            res = echant.iloc[best]
         else : 
             res = "Il n'y a pas de recette correspondante"
         return render_template("preds.html", text=text, predictions=res) 
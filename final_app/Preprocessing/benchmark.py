@@ -0,0 +1,111 @@
+import argparse
+import json
+import timeit
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from data_cleaning import iso_to_minutes, format_duration, parse_durations, main
+from generate_synthetic_data import generate_datasets
+
+
+def random_durations(n_rows: int, seed: int = 42) -> pd.Series:
+    """
+    Generate random ISO 8601 durations shaped like the Food.com CookTime/PrepTime/TotalTime columns.
+
+    Args:
+        n_rows (int): number of durations
+        seed (int, optional): random seed. Defaults to 42.
+
+    Returns:
+        pd.Series: durations (example: 'PT1H30M', 'PT45M', 'PT2H')
+    """
+    rng = np.random.default_rng(seed)
+    hours = rng.integers(0, 5, n_rows)
+    minutes = rng.integers(0, 60, n_rows)
+    return pd.Series([
+        f"PT{h}H{m}M" if h and m else f"PT{h}H" if h else f"PT{m}M" for h, m in zip(hours, minutes)
+    ])
+
+def benchmark_durations(n_rows: int = 100_000, repeat: int = 3) -> pd.DataFrame:
+    """
+    Compare the row-wise duration conversion (`Series.apply` of `iso_to_minutes` and `format_duration`) with the
+    column kernel `parse_durations`, on the three duration columns of a dataset of `n_rows` recipes.
+
+    Args:
+        n_rows (int, optional): number of recipes. Defaults to 100,000.
+        repeat (int, optional): number of runs, the best one is kept. Defaults to 3.
+
+    Returns:
+        pd.DataFrame: best time in seconds of each method
+    """
+    columns = [random_durations(n_rows, seed) for seed in range(3)]
+
+    def row_wise():
+        for durations in columns:
+            durations.apply(iso_to_minutes), durations.apply(format_duration)
+
+    def column_kernel():
+        for durations in columns:
+            parse_durations(durations)
+
+    # Both methods should give the same results
+    for durations in columns:
+        parsed = parse_durations(durations)
+        assert parsed['total_minutes'].equals(durations.apply(iso_to_minutes))
+        assert parsed['formatted'].equals(durations.apply(format_duration))
+
+    times = {
+        name: min(timeit.repeat(method, number=1, repeat=repeat))
+        for name, method in [('row-wise apply', row_wise), ('parse_durations', column_kernel)]
+    }
+    results = pd.DataFrame({'seconds': times})
+    results['speedup'] = results['seconds'].max() / results['seconds']
+    return results
+
+def benchmark_pipeline(sizes: list[int], data_dir: str, n_jobs: int = 1, trace_memory: bool = False) -> pd.DataFrame:
+    """
+    Run the whole preprocessing pipeline (`data_cleaning.main`) on synthetic datasets of each size (see
+    `generate_synthetic_data.py`), generated in `data_dir` if they do not exist yet. The report of each run is
+    written next to its output (`sample_recipes.report.json`).
+
+    Args:
+        sizes (list[int]): numbers of recipes of the measurements dataset
+        data_dir (str): folder of the synthetic datasets, one subfolder per size
+        n_jobs (int, optional): number of worker processes of the pipeline. Defaults to 1.
+        trace_memory (bool, optional): also record the peak memory of Python objects (slower). Defaults to False.
+
+    Returns:
+        pd.DataFrame: wall time, CPU time, rows and peak memory of each stage, for each size
+    """
+    reports = []
+    for size in sizes:
+        size_dir = Path(data_dir) / str(size)
+        if not (size_dir / 'recipes.parquet').exists() or not (size_dir / 'recipes_data.csv').exists():
+            print(f"Generating synthetic datasets with {size:,} recipes...")
+            generate_datasets(size_dir, size)
+        output_path = size_dir / 'sample_recipes.parquet'
+        main(size_dir / 'recipes.parquet', size_dir / 'recipes_data.csv', output_path=output_path, n_jobs=n_jobs,
+             write_report=True, trace_memory=trace_memory)
+        with open(output_path.with_suffix('.report.json'), encoding='utf-8') as f:
+            report = pd.DataFrame(json.load(f)['stages'])
+        reports.append(report.assign(size=size))
+    return pd.concat(reports).set_index(['size', 'stage'])
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Benchmarks of the preprocessing.')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    subparsers.add_parser('durations', help='row-wise apply against parse_durations')
+    pipeline_parser = subparsers.add_parser('pipeline', help='data_cleaning.main on synthetic datasets')
+    pipeline_parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 200_000, 2_000_000])
+    pipeline_parser.add_argument('--data-dir', default=Path(__file__).resolve().parent.parent / 'Data' / 'synthetic')
+    pipeline_parser.add_argument('--n-jobs', type=int, default=1)
+    pipeline_parser.add_argument('--trace-memory', action='store_true')
+    args = parser.parse_args()
+
+    if args.benchmark == 'durations':
+        print(benchmark_durations())
+    else:
+        results = benchmark_pipeline(args.sizes, args.data_dir, n_jobs=args.n_jobs, trace_memory=args.trace_memory)
+        print(results.to_string(float_format=lambda x: f'{x:.2f}'))
@@ -0,0 +1,178 @@
+import hashlib
+import inspect
+import re
+import types
+from pathlib import Path
+from typing import Any, Callable, List, Tuple, Union
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+## Keys
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """
+    Compute the SHA-256 digest of a file, read in chunks.
+
+    Args:
+        path (str): path to the file
+        chunk_size (int, optional): number of bytes read at a time. Defaults to 1 MiB.
+
+    Returns:
+        str: hexadecimal digest of the file content
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def stable_repr(value: Any) -> str:
+    """
+    Representation of a module-level value that does not change between runs (sets are sorted, objects are described
+    by their attributes instead of their memory address).
+
+    Args:
+        value (Any): the value
+
+    Returns:
+        str: the representation
+    """
+    if isinstance(value, (set, frozenset)):
+        return '{' + ', '.join(sorted(stable_repr(v) for v in value)) + '}'
+    if isinstance(value, dict):
+        return '{' + ', '.join(f'{stable_repr(k)}: {stable_repr(v)}' for k, v in value.items()) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(stable_repr(v) for v in value) + ']'
+    if isinstance(value, re.Pattern):
+        return f're.compile({value.pattern!r}, {value.flags})'
+    if hasattr(value, '__dict__') and not isinstance(value, type):
+        return f'{type(value).__qualname__}({stable_repr(vars(value))})'
+    return repr(value)
+
+def code_names(code: types.CodeType) -> set[str]:
+    """
+    Args:
+        code (types.CodeType): compiled code of a function
+
+    Returns:
+        set[str]: global names used by the code, including in its lambdas, comprehensions and nested functions
+    """
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= code_names(const)
+    return names
+
+def code_version(func: Callable) -> str:
+    """
+    Fingerprint of the code of a stage: the source of the function, of the functions and classes of its module it uses
+    (recursively) and the values of the module-level constants they read. Changing a helper or a constant used by a
+    stage changes its version, code from other modules (libraries) is not included.
+
+    Args:
+        func (Callable): the stage function
+
+    Returns:
+        str: hexadecimal digest of the code
+    """
+    module = inspect.getmodule(func)
+    digest = hashlib.sha256(inspect.getsource(func).encode())
+    seen, pending = {func.__name__}, sorted(code_names(func.__code__))
+    while pending:
+        name = pending.pop()
+        if name in seen or name not in vars(module):
+            continue
+        seen.add(name)
+        value = vars(module)[name]
+        if isinstance(value, (types.FunctionType, type)):
+            if inspect.getmodule(value) is not module:
+                continue
+            digest.update(inspect.getsource(value).encode())
+            functions = [value] if isinstance(value, types.FunctionType) else [
+                method for method in vars(value).values() if isinstance(method, types.FunctionType)
+            ]
+            for function in functions:
+                pending.extend(sorted(code_names(function.__code__)))
+        elif not isinstance(value, types.ModuleType) and not callable(value):
+            digest.update(f'{name} = {stable_repr(value)}'.encode())
+    return digest.hexdigest()
+
+def stage_key(func: Callable, input_keys: List[Union[str, Path]]) -> str:
+    """
+    Content address of the output of a stage: it changes when the code of the stage or one of its inputs changes.
+
+    Args:
+        func (Callable): the stage function
+        input_keys (List[Union[str, Path]]): keys of the inputs of the stage (keys of the previous stages, parameters).
+            Paths stand for the content of the file (see `file_digest`).
+
+    Returns:
+        str: the key (16 hexadecimal characters)
+    """
+    digest = hashlib.sha256(code_version(func).encode())
+    for input_key in input_keys:
+        input_key = file_digest(input_key) if isinstance(input_key, Path) else str(input_key)
+        digest.update(b'\0' + input_key.encode())
+    return digest.hexdigest()[:16]
+
+
+## Checkpoint files
+def write_checkpoint(df: pd.DataFrame, path: Path) -> None:
+    """
+    Write a stage output to a parquet file. The file is written under a temporary name and renamed, so an interrupted
+    run never leaves a partial checkpoint.
+
+    Args:
+        df (pd.DataFrame): the stage output
+        path (Path): path of the checkpoint
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_suffix('.tmp')
+    df.to_parquet(temporary_path, index=False)
+    temporary_path.replace(path)
+
+def read_checkpoint(path: Path) -> pd.DataFrame:
+    """
+    Read a stage output written by `write_checkpoint`. List columns are converted back to Python lists, as the
+    pipeline functions expect them.
+
+    Args:
+        path (Path): path of the checkpoint
+
+    Returns:
+        pd.DataFrame: the stage output
+    """
+    df = pd.read_parquet(path)
+    for field in pq.read_schema(path):
+        if pa.types.is_list(field.type) and field.name in df.columns:
+            df[field.name] = df[field.name].map(lambda x: x.tolist() if isinstance(x, np.ndarray) else x)
+    return df
+
+def run_stage(func: Callable[..., pd.DataFrame], args: tuple, input_keys: List[str], checkpoint_dir: str = None,
+              **kwargs) -> Tuple[pd.DataFrame, str]:
+    """
+    Run a stage of the pipeline, or read its output from the checkpoint of a previous run with the same key.
+
+    Args:
+        func (Callable): the stage function
+        args (tuple): positional arguments of the stage
+        input_keys (List[Union[str, Path]]): keys of everything the output depends on besides the code (see `stage_key`)
+        checkpoint_dir (str, optional): folder of the checkpoints. If not provided, the stage always runs.
+        **kwargs: keyword arguments of the stage that do not change its output (example: number of workers)
+
+    Returns:
+        Tuple[pd.DataFrame, str]: the stage output and its key, to use as input key of the next stages (None when
+            there are no checkpoints)
+    """
+    if checkpoint_dir is None:
+        return func(*args, **kwargs), None
+    key = stage_key(func, input_keys)
+    path = Path(checkpoint_dir) / f'{func.__name__}-{key}.parquet'
+    if path.exists():
+        print(f"{func.__name__}: reusing checkpoint {path.name}")
+        return read_checkpoint(path), key
+    df = func(*args, **kwargs)
+    write_checkpoint(df, path)
+    return df, key
@@ -1,17 +1,149 @@
+import argparse
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import re
 import ast
-from typing import List, Union
+import json
+from typing import Callable, List, Set, Tuple, Union
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
 import inflect
+from importlib.metadata import version
 from pathlib import Path
+from checkpoints import run_stage
+from profiling import PipelineProfiler
+from search_bundle import write_search_bundle
 
 
 # Global instance of inflect.engine()
 inflect_engine = inflect.engine()
+# Singular forms depend on the inflect version, so the version is part of the cache file name
+SINGULAR_NOUNS_CACHE_NAME = f"singular_nouns_inflect-{version('inflect')}.json"
+# Minimum number of new terms for which build_singular_map uses worker processes
+PARALLEL_SINGULAR_MIN_TERMS = 20_000
+# Keys of the two independent 64-bit hashes of the rows whose concatenation detects the duplicate measurement rows
+DEDUPLICATION_HASH_KEYS = ('0123456789123456', 'f3a8c1e7b2d94605')
+
+
+# ISO 8601 durations (example: 'P1DT2H30M'), every component may have a decimal fraction (example: 'PT2.5M' or
+# 'PT1,5H'). Years and months have no fixed length in minutes and are not supported.
+ISO_DURATION_NUMBER = r'\d+(?:[.,]\d+)?'
+ISO_DURATION_PATTERN = re.compile(
+    rf'P(?:(?P<weeks>{ISO_DURATION_NUMBER})W)?(?:(?P<days>{ISO_DURATION_NUMBER})D)?'
+    rf'(?:T(?:(?P<hours>{ISO_DURATION_NUMBER})H)?(?:(?P<minutes>{ISO_DURATION_NUMBER})M)?(?:(?P<seconds>{ISO_DURATION_NUMBER})S)?)?'
+)
+# Units used in the readable format of the durations (weeks are counted in days)
+DURATION_UNITS = {'days': 'd', 'hours': 'h', 'minutes': 'min', 'seconds': 's'}
+SECONDS_PER_UNIT = {'days': 86400, 'hours': 3600, 'minutes': 60, 'seconds': 1}
+
+# Recipe categories and their patterns, in priority order. Columns are searched in the CATEGORY_SOURCES order.
+CATEGORY_PATTERNS = {
+    'Main Course': r'lunch|meal|meat|chicken|beef|pork|steak|turkey|duck|fish|salmon|lamb|crab|shrimp|lobster|tuna|vegetable|potato|rice|noodle|pasta|penne|spaghetti|macaroni|linguine|pizza|quiche|lentil|tofu|onion|soup|stew|dressing',
+    'Breakfast': r'breakfast',
+    'Dessert': r'dessert|cake|cookie|brownie|muffin|biscuit|babka|sweet|candy|sugar|banana',
+    'Beverages': r'beverage|cocktail|smoothie|lemonade|coffee',
+}
+CATEGORY_SOURCES = ['RecipeCategory', 'Keywords', 'title']
+# Layout of the output parquet file: sort order, dictionary-encoded columns and number of rows per row group (the
+# 10k dataset is a single row group, larger builds are split so that readers can skip row groups)
+OUTPUT_SORT_COLUMNS = ['AggregatedRating', 'ReviewCount']
+OUTPUT_DICTIONARY_COLUMNS = ['RecipeType', 'World_Cuisine', 'TotalTime_cat', 'AuthorName']
+OUTPUT_ROW_GROUP_SIZE = 10_000
+# Compact dtypes of the columns of the final dataset (see `enforce_schema`), the list columns stay Python lists
+NUTRITION_COLUMNS = [
+    'Calories', 'FatContent', 'SaturatedFatContent', 'CholesterolContent', 'SodiumContent', 'CarbohydrateContent',
+    'FiberContent', 'SugarContent', 'ProteinContent',
+]
+RECIPE_SCHEMA = {
+    **{col: 'category' for col in ['RecipeType', 'World_Cuisine', 'TotalTime_cat', 'AuthorName', 'RecipeCategory',
+                                   'CookTime', 'PrepTime', 'TotalTime']},
+    **{col: 'string[pyarrow]' for col in ['title', 'Description', 'Images', 'link']},
+    **{col: 'float32' for col in ['AggregatedRating', *NUTRITION_COLUMNS]},
+    **{col: 'int32' for col in ['ReviewCount', 'CookTime_minutes', 'PrepTime_minutes', 'TotalTime_minutes']},
+    'RecipeServings': 'int16',
+}
+# Default share of each recipe type in the sampled dataset (1,500 beverages, 1,300 breakfasts, 3,200 desserts and
+# 4,000 main courses out of 10,000 recipes)
+RECIPE_TYPE_WEIGHTS = {'Beverages': 0.15, 'Breakfast': 0.13, 'Dessert': 0.32, 'Main Course': 0.40}
+
+# Ingredient keywords excluded by each diet. A recipe follows a diet if none of its ingredients contains an excluded
+# keyword as whole words, in the singular or with a plural 's' ('egg' matches '2 eggs' but not 'eggplant')
+NON_VEGETARIAN_KEYWORDS = {
+    'meat', 'chicken', 'beef', 'pork', 'fish', 'bacon', 'ham', 'steak', 'scallop',
+    'sausage', 'lamb', 'duck', 'goose', 'lobster', 'shrimp', 'prawn', 'crab',
+    'squid', 'octopus', 'calamari', 'oyster', 'mussel', 'clam', 'snail', 'seafood',
+    'prosciutto', 'salami', 'pepperoni', 'pancetta', 'chorizo', 'andouille', 'pate', 
+    'veal', 'venison', 'game', 'poultry', 'turkey', 'bison', 'boar', 
+    'fish', 'tuna', 'salmon', 'cod', 'haddock', 'halibut', 'tilapia', 'anchovy', 'anchovies', 'meatball', 'hamburger',
+    'lard', 'suet', 'gelatin',
+}
+DAIRY_KEYWORDS = {
+    'milk', 'cheese', 'butter', 'cream', 'yogurt', 'yoghurt', 'whey', 'ghee', 'parmesan', 'mozzarella', 'cheddar',
+    'ricotta', 'mascarpone', 'feta', 'custard', 'half-and-half', 'casein', 'buttermilk',
+}
+DIET_EXCLUDED_KEYWORDS = {
+    'Vegetarian_Friendly': NON_VEGETARIAN_KEYWORDS,
+    'Vegan_Friendly': NON_VEGETARIAN_KEYWORDS | DAIRY_KEYWORDS | {'egg', 'mayonnaise', 'honey'},
+    'Gluten_Free': {
+        'flour', 'wheat', 'barley', 'rye', 'spelt', 'semolina', 'couscous', 'bulgur', 'farro', 'malt', 'bread',
+        'crumb', 'breadcrumb', 'cracker', 'biscuit', 'pasta', 'spaghetti', 'macaroni', 'noodle', 'tortilla',
+        'pie crust', 'pastry', 'cake mix', 'soy sauce', 'beer', 'bun', 'roll', 'dough', 'crouton', 'pretzel', 'bagel',
+        'pita', 'phyllo', 'wonton', 'stuffing', 'graham',
+    },
+    'Dairy_Free': DAIRY_KEYWORDS,
+    'Nut_Free': {
+        'nut', 'almond', 'walnut', 'pecan', 'cashew', 'peanut', 'hazelnut', 'pistachio', 'macadamia', 'pine nut',
+        'brazil nut', 'chestnut', 'praline', 'nutella', 'marzipan',
+    },
+}
+# Phrases containing an excluded keyword and the only diets they break: the keywords inside a longer keyword are
+# ignored, so 'coconut milk' is not dairy. Words only containing a keyword (nutmeg, coconut, butternut, doughnut for
+# 'nut') need no exception.
+DIET_KEYWORD_EXCEPTIONS = {
+    'coconut milk': set(), 'coconut cream': set(), 'soy milk': set(), 'rice milk': set(), 'oat milk': set(),
+    'almond milk': {'Nut_Free'}, 'cashew milk': {'Nut_Free'}, 'peanut butter': {'Nut_Free'},
+    'almond butter': {'Nut_Free'}, 'nut butter': {'Nut_Free'}, 'apple butter': set(), 'cocoa butter': set(),
+    'cream of tartar': set(), 'hamburger bun': {'Gluten_Free'}, 'water chestnut': set(),
+}
+
 
 
 ## Utility functions
+def duration_components(iso_duration: str) -> dict[str, float]:
+    """
+    Extract the components of an ISO 8601 duration. Weeks are converted to days.
+
+    Args:
+        iso_duration (str): duration in ISO 8601 format (example: 'PT1H30M')
+
+    Returns:
+        dict[str, float]: the components present in the duration (example: {'hours': 1, 'minutes': 30})
+    """
+    match = ISO_DURATION_PATTERN.search(iso_duration)
+    if match is None:
+        return {}
+    components = {name: float(value.replace(',', '.')) for name, value in match.groupdict().items() if value is not None}
+    if 'weeks' in components:
+        components['days'] = components.pop('weeks') * 7 + components.get('days', 0)
+    return components
+
+def seconds_to_minutes(total_seconds):
+    """
+    Round durations in seconds to minutes, half up (90 s gives 2 min and 150 s gives 3 min). The durations under a
+    minute give 1 minute, so that a recipe of a few seconds is not taken for a recipe without duration.
+
+    Args:
+        total_seconds (float or np.ndarray): durations in seconds
+
+    Returns:
+        np.ndarray: durations in minutes (int64)
+    """
+    total_seconds = np.asarray(total_seconds, dtype=np.float64)
+    minutes = np.floor((total_seconds + 30) / 60).astype('int64')
+    return np.where(total_seconds > 0, np.maximum(minutes, 1), minutes)
+
 def iso_to_minutes(iso_duration: str) -> float:
     """
     Convert ISO 8601 durations to total minutes.
@@ -20,11 +152,11 @@ def iso_to_minutes(iso_duration: str) -> float:
         iso_duration (str): duration in ISO 8601 format (example: 'PT1H30M')
 
     Returns:
-        float: duration in minutes
+        float: duration in minutes, rounded with `seconds_to_minutes`
     """
-    hours = int(re.search(r'(\d+)H', iso_duration).group(1)) if 'H' in iso_duration else 0
-    minutes = int(re.search(r'(\d+)M', iso_duration).group(1)) if 'M' in iso_duration else 0
-    return hours * 60 + minutes 
+    components = duration_components(iso_duration)
+    total_seconds = sum(value * SECONDS_PER_UNIT[name] for name, value in components.items())
+    return int(seconds_to_minutes(total_seconds))
 
 def categorize_duration(total_minutes: float) -> str:
     """
@@ -49,16 +181,99 @@ def format_duration(duration: str) -> str:
         duration (str): duration in ISO 8601 format (example: 'PT1H30M')
     
     Returns: 
-        str: duration (example output: '1 h 30 min')
+        str: duration (example output: '1 h 30 min', '2.5 min' for 'PT2.5M')
+    """
+    components = duration_components(duration)
+    return ' '.join(f"{components[name]:g} {unit}" for name, unit in DURATION_UNITS.items() if name in components)
+
+def parse_durations(durations: pd.Series) -> pd.DataFrame:
     """
-    hours = re.search(r'(\d+)H', duration)
-    minutes = re.search(r'(\d+)M', duration)
-    result = []
-    if hours:
-        result.append(f"{int(hours.group(1))} h")
-    if minutes:
-        result.append(f"{int(minutes.group(1))} min")
-    return ' '.join(result)
+    Column version of `iso_to_minutes` and `format_duration`: the distinct durations are parsed in a single regex pass
+    and both outputs are computed from the extracted components.
+
+    Args:
+        durations (pd.Series): durations in ISO 8601 format (example: 'PT1H30M')
+
+    Returns:
+        pd.DataFrame: DataFrame with the same index as `durations` and the following columns:
+            - days, hours, minutes, seconds (int): the components of the durations (0 when absent), without their fraction
+            - total_minutes (int): the durations in minutes, rounded with `seconds_to_minutes`
+            - formatted (str): the durations in a readable format (example: '1 h 30 min')
+    """
+    # Durations take few distinct values, so only these are parsed
+    codes, uniques = pd.factorize(durations.astype(str))
+    extracted = pd.Series(uniques).str.extract(ISO_DURATION_PATTERN)
+    present = extracted.notna()
+    present['days'] |= present.pop('weeks')
+    values = extracted.apply(lambda col: pd.to_numeric(col.str.replace(',', '.'))).fillna(0)
+    values['days'] += 7 * values.pop('weeks')
+
+    total_seconds = sum(values[name] * SECONDS_PER_UNIT[name] for name in DURATION_UNITS)
+    result = values.astype('int64')
+    result['total_minutes'] = seconds_to_minutes(total_seconds)
+    formatted = pd.Series('', index=result.index)
+    for name, unit in DURATION_UNITS.items():
+        formatted = formatted.str.cat(np.where(present[name], values[name].map('{:g}'.format) + f' {unit}', ''), sep=' ')
+    result['formatted'] = formatted.str.split().str.join(' ')
+    return result.take(codes).set_index(durations.index)
+
+def compile_category_pattern(category_patterns: dict[str, str]) -> re.Pattern:
+    """
+    Combine the category patterns into a single regex. Each category is an alternative looking ahead for its pattern
+    anywhere in the text, so the first matching category in the table order is reported in its named group
+    (`category_<position>`), even if another category matches earlier in the text.
+
+    Args:
+        category_patterns (dict[str, str]): categories and their patterns, in priority order
+
+    Returns:
+        re.Pattern: the combined regex (cached by the re module)
+    """
+    alternatives = [f'(?=.*?(?P<category_{i}>{pattern}))' for i, pattern in enumerate(category_patterns.values())]
+    return re.compile('^(?:' + '|'.join(alternatives) + ')', re.DOTALL)
+
+def category_texts(values: pd.Series) -> pd.Series:
+    """
+    Convert a source column of `assign_category` (strings or lists of strings) to lowercase texts.
+
+    Args:
+        values (pd.Series): the RecipeCategory, Keywords or title column
+
+    Returns:
+        pd.Series: lowercase texts, None for values that are neither strings nor lists
+    """
+    return values.map(
+        lambda value: ' '.join([str(v) for v in value if v is not None]) if isinstance(value, list) else value if isinstance(value, str) else None
+    ).str.lower()
+
+def assign_categories(df: pd.DataFrame, category_patterns: dict[str, str] = None) -> pd.Series:
+    """
+    Column version of `assign_category`: each source column is matched against the combined category regex, only for
+    the rows that did not match a previous source.
+
+    Args:
+        df (pd.DataFrame): DataFrame with the RecipeCategory, Keywords and title columns
+        category_patterns (dict[str, str], optional): categories and their patterns, in priority order.
+            Defaults to CATEGORY_PATTERNS.
+
+    Returns:
+        pd.Series: the assigned categories, 'Other' if no match is found
+    """
+    category_patterns = CATEGORY_PATTERNS if category_patterns is None else category_patterns
+    pattern = compile_category_pattern(category_patterns)
+    names = np.array(list(category_patterns), dtype=object)
+    categories = pd.Series('Other', index=df.index, dtype=object)
+    unmatched = np.ones(len(df), dtype=bool)
+    for source in CATEGORY_SOURCES:
+        texts = category_texts(df[source][unmatched])
+        # Sources have many repeated values, so only the distinct texts are matched
+        codes, uniques = pd.factorize(texts)
+        matches = pd.Series(uniques, dtype=object).str.extract(pattern).notna().to_numpy()
+        matches = np.vstack([matches, np.zeros((1, len(names)), dtype=bool)])[codes]  #code -1 (missing text): no match
+        is_matched = matches.any(axis=1)
+        categories.iloc[np.flatnonzero(unmatched)[is_matched]] = names[matches[is_matched].argmax(axis=1)]
+        unmatched[np.flatnonzero(unmatched)[is_matched]] = False
+    return categories
 
 def assign_category(row: pd.Series) -> str:
     """
@@ -74,21 +289,128 @@ def assign_category(row: pd.Series) -> str:
         str: The assigned category for the recipe, between 4 possibilities: 'Main Course', 'Breakfast', 'Dessert', 'Beverages'
              If no match is found, returns 'Other'
     """
-    patterns = {
-        'Main Course': r'lunch|meal|meat|chicken|beef|pork|steak|turkey|duck|fish|salmon|lamb|crab|shrimp|lobster|tuna|vegetable|potato|rice|noodle|pasta|penne|spaghetti|macaroni|linguine|pizza|quiche|lentil|tofu|onion|soup|stew|dressing',
-        'Breakfast': r'breakfast',
-        'Dessert': r'dessert|cake|cookie|brownie|muffin|biscuit|babka|sweet|candy|sugar|banana',
-        'Beverages': r'beverage|cocktail|smoothie|lemonade|coffee',
+    return assign_categories(row.to_frame().T).iloc[0]
+
+def keyword_words(text: str) -> Tuple[str, ...]:
+    """
+    Returns:
+        Tuple[str, ...]: the lowercase words of a text, without digits and punctuation ('1/2 c. Half-and-Half' gives
+        ('c', 'half', 'and', 'half'))
+    """
+    return tuple(re.findall(r'[a-z]+', str(text).lower()))
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton finding all the keywords contained in a text in a single pass over its symbols: the
+    characters of a string, or the words of a tuple of words (see `keyword_words`) to only match whole words.
+    Each keyword carries a bitmask of labels and a search returns the union of the masks of the keywords found.
+
+    Args:
+        keyword_masks (dict[Sequence, int]): keywords and their label bitmasks
+        longest_match (bool): if True, the keywords inside a longer keyword found are ignored (with
+            {'milk': 1, 'coconut milk': 0}, 'coconut milk' gives 0)
+    """
+    def __init__(self, keyword_masks: dict, longest_match: bool = False):
+        self.longest_match = longest_match
+        self.transitions: List[dict] = [{}]
+        self.masks: List[int] = [0]
+        # Length of the longest keyword ending at each state, 0 if none
+        self.lengths: List[int] = [0]
+        for keyword, mask in keyword_masks.items():
+            state = 0
+            for char in keyword:
+                if char not in self.transitions[state]:
+                    self.transitions.append({})
+                    self.masks.append(0)
+                    self.lengths.append(0)
+                    self.transitions[state][char] = len(self.transitions) - 1
+                state = self.transitions[state][char]
+            self.masks[state] |= mask
+            self.lengths[state] = len(keyword)
+        # Failure links, computed breadth-first: the longest proper suffix of a state that is also a prefix of a keyword
+        self.failures = [0] * len(self.transitions)
+        queue = list(self.transitions[0].values())
+        for state in queue:
+            for char, next_state in self.transitions[state].items():
+                failure = self.failures[state]
+                while failure and char not in self.transitions[failure]:
+                    failure = self.failures[failure]
+                self.failures[next_state] = self.transitions[failure].get(char, 0) if state else 0
+                if not (longest_match and self.lengths[next_state]):
+                    self.masks[next_state] |= self.masks[self.failures[next_state]]
+                    self.lengths[next_state] = self.lengths[next_state] or self.lengths[self.failures[next_state]]
+                queue.append(next_state)
+
+    def search(self, text) -> int:
+        """
+        Args:
+            text (Sequence): the text to search, with the symbols of the keywords
+
+        Returns:
+            int: union of the label bitmasks of the keywords contained in `text`
+        """
+        transitions, failures, masks, lengths = self.transitions, self.failures, self.masks, self.lengths
+        state, found = 0, 0
+        # Start and mask of the keywords found, without the ones inside a later keyword (longest_match)
+        matches: List[Tuple[int, int]] = []
+        for i, char in enumerate(text):
+            while state and char not in transitions[state]:
+                state = failures[state]
+            state = transitions[state].get(char, 0)
+            if not self.longest_match:
+                found |= masks[state]
+            elif lengths[state]:
+                start = i - lengths[state] + 1
+                while matches and matches[-1][0] >= start:
+                    matches.pop()
+                matches.append((start, masks[state]))
+        for _, mask in matches:
+            found |= mask
+        return found
+
+def diet_keyword_masks() -> dict[Tuple[str, ...], int]:
+    """
+    Returns:
+        dict[Tuple[str, ...], int]: the words of each keyword of DIET_EXCLUDED_KEYWORDS and DIET_KEYWORD_EXCEPTIONS,
+        in the singular and with a plural 's', with the bitmask of the diets it breaks
+    """
+    diets = {
+        keyword: {diet for diet, keywords in DIET_EXCLUDED_KEYWORDS.items() if keyword in keywords}
+        for keyword in sorted(set().union(*DIET_EXCLUDED_KEYWORDS.values()))
     }
-    # Check the RecipeCategory, Keywords and title for patterns
-    for source in ['RecipeCategory', 'Keywords', 'title']:
-        value = row[source]
-        if value is not None and isinstance(value, (str, list)):
-            text = ' '.join([str(v) for v in value if v is not None]) if isinstance(value, list) else value
-            for category, pattern in patterns.items():
-                if re.search(pattern, text.lower()):
-                    return category
-    return 'Other'
+    diets.update(DIET_KEYWORD_EXCEPTIONS)
+    masks = {}
+    for keyword, excluded in diets.items():
+        words, mask = keyword_words(keyword), sum(1 << i for i, diet in enumerate(DIET_EXCLUDED_KEYWORDS) if diet in excluded)
+        masks[words] = masks[words[:-1] + (words[-1] + 's',)] = mask
+    return masks
+
+DIET_AUTOMATON = KeywordAutomaton(diet_keyword_masks(), longest_match=True)
+
+def classify_diets(ingredients: pd.Series) -> pd.DataFrame:
+    """
+    Compute a flag for each diet of DIET_EXCLUDED_KEYWORDS: True if none of the ingredients of the recipe contains a
+    keyword excluded by the diet as whole words. Each distinct ingredient is searched once with DIET_AUTOMATON for all
+    the diets.
+
+    Args:
+        ingredients (pd.Series): lists of ingredients
+
+    Returns:
+        pd.DataFrame: one boolean column per diet, with the same index as `ingredients`
+    """
+    lengths = ingredients.map(len).to_numpy()
+    codes, uniques = pd.factorize(pd.Series([str(ingredient).lower() for row in ingredients for ingredient in row], dtype=object))
+    unique_masks = np.array([DIET_AUTOMATON.search(keyword_words(ingredient)) for ingredient in uniques], dtype=np.int64)
+    # Union of the masks of the ingredients of each recipe
+    masks = np.zeros(len(ingredients), dtype=np.int64)
+    has_ingredients = lengths > 0
+    if has_ingredients.any():
+        starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])[has_ingredients]
+        masks[has_ingredients] = np.bitwise_or.reduceat(unique_masks[codes], starts)
+    return pd.DataFrame({
+        diet: (masks & (1 << i)) == 0 for i, diet in enumerate(DIET_EXCLUDED_KEYWORDS)
+    }, index=ingredients.index)
 
 def to_singular(ingredients_list: List[str]) -> List[str]:
     """
@@ -104,6 +426,65 @@ def to_singular(ingredients_list: List[str]) -> List[str]:
         return [inflect_engine.singular_noun(ingredient) or ingredient for ingredient in ingredients_list]
     return ingredients_list
 
+def singularize_terms(terms: List[str]) -> List[str]:
+    """
+    Convert a list of distinct terms to singular (see `to_singular`). Used by the worker processes of `build_singular_map`.
+
+    Args:
+        terms (List[str]): terms to convert
+
+    Returns:
+        List[str]: singular forms, in the same order
+    """
+    return to_singular(list(terms))
+
+def build_singular_map(terms: Set[str], cache_dir: str = None, n_jobs: int = 1) -> dict[str, str]:
+    """
+    Map each term of a vocabulary to its singular form. The singular form of each distinct term is computed only once,
+    in `n_jobs` worker processes when there are many new terms, and the mapping is stored in `cache_dir` so that later
+    runs (and the Streamlit app, see `clean_query`) only compute the terms they have not seen yet.
+
+    Args:
+        terms (Set[str]): the vocabulary
+        cache_dir (str, optional): folder of the cache file (SINGULAR_NOUNS_CACHE_NAME). If not provided, nothing is cached.
+        n_jobs (int, optional): number of worker processes. Defaults to 1.
+
+    Returns:
+        dict[str, str]: the singular form of each term (and of the terms already in the cache)
+    """
+    cache_path = Path(cache_dir) / SINGULAR_NOUNS_CACHE_NAME if cache_dir is not None else None
+    singular_nouns = {}
+    if cache_path is not None and cache_path.exists():
+        with open(cache_path, encoding='utf-8') as f:
+            singular_nouns = json.load(f)
+    new_terms = sorted(term for term in terms if isinstance(term, str) and term not in singular_nouns)
+    if n_jobs > 1 and len(new_terms) >= PARALLEL_SINGULAR_MIN_TERMS:
+        chunks = [list(chunk) for chunk in np.array_split(np.array(new_terms, dtype=object), n_jobs)]
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            singular_forms = [form for forms in executor.map(singularize_terms, chunks) for form in forms]
+    else:
+        singular_forms = singularize_terms(new_terms)
+    singular_nouns.update(zip(new_terms, singular_forms))
+    if cache_path is not None and new_terms:
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(singular_nouns, f, ensure_ascii=False)
+    return singular_nouns
+
+def singularize_column(ingredients: pd.Series, singular_nouns: dict[str, str]) -> pd.Series:
+    """
+    Convert lists of ingredient names to singular with a mapping built by `build_singular_map`.
+
+    Args:
+        ingredients (pd.Series): lists of ingredient names
+        singular_nouns (dict[str, str]): singular form of each ingredient name
+
+    Returns:
+        pd.Series: lists of singular ingredient names, values that are not lists remain unchanged
+    """
+    return ingredients.map(
+        lambda x: [singular_nouns.get(ingredient, ingredient) for ingredient in x] if isinstance(x, list) else x
+    )
+
 def is_non_vegetarian(ingredient_list: List[str]) -> bool:
     """
     Checks if any non-vegetarian keyword is present in the list of ingredients
@@ -114,18 +495,8 @@ def is_non_vegetarian(ingredient_list: List[str]) -> bool:
     Returns:
         bool: True if any non-vegetarian keyword is found, False otherwise
     """
-    non_veg_keywords = {
-        'meat', 'chicken', 'beef', 'pork', 'fish', 'bacon', 'ham', 'steak', 'scallop',
-        'sausage', 'lamb', 'duck', 'goose', 'lobster', 'shrimp', 'prawn', 'crab',
-        'squid', 'octopus', 'calamari', 'oyster', 'mussel', 'clam', 'snail', 'seafood',
-        'prosciutto', 'salami', 'pepperoni', 'pancetta', 'chorizo', 'andouille', 'pate', 
-        'veal', 'venison', 'game', 'poultry', 'turkey', 'bison', 'boar', 
-        'fish', 'tuna', 'salmon', 'cod', 'haddock', 'halibut', 'tilapia', 'anchovy', 'anchovies',
-    }
-    for ingredient in ingredient_list:
-        if any(keyword in str(ingredient).lower() for keyword in non_veg_keywords):
-            return True
-    return False
+    vegetarian_mask = 1 << list(DIET_EXCLUDED_KEYWORDS).index('Vegetarian_Friendly')
+    return any(DIET_AUTOMATON.search(keyword_words(ingredient)) & vegetarian_mask for ingredient in ingredient_list)
     
 def find_world_cuisine(keywords: List[str]) -> str:
     """
@@ -149,6 +520,50 @@ def find_world_cuisine(keywords: List[str]) -> str:
             return cuisine
     return 'Unknown'
 
+def normalize_titles(titles: pd.Series) -> pd.Series:
+    """
+    Normalize recipe titles (lowercase, trimmed, single spaces) so that they can be compared across datasets.
+
+    Args:
+        titles (pd.Series): recipe titles
+
+    Returns:
+        pd.Series: normalized titles
+    """
+    return titles.astype(str).str.lower().str.split().str.join(' ')
+
+def parse_list_column(values: pd.Series) -> Tuple[pa.ListArray, int]:
+    """
+    Decode a column of stringified lists (example: '["1 c. sugar", "2 eggs"]') into an Arrow list<string> array.
+    The strings are decoded with the json parser, all at once when possible and row by row otherwise. Rows that are
+    not valid json (example: single-quoted Python lists) fall back to ast.literal_eval.
+
+    Args:
+        values (pd.Series): stringified lists, missing values are decoded as nulls
+
+    Returns:
+        Tuple[pa.ListArray, int]: the decoded lists and the number of rows that needed the literal_eval fallback
+    """
+    is_string = values.apply(lambda x: isinstance(x, str)).to_numpy()
+    strings = values[is_string].tolist()
+    try:
+        parsed = json.loads('[' + ','.join(strings) + ']')
+        if len(parsed) != len(strings):
+            raise ValueError('a row holds more than one value')
+        slow_rows = 0
+    except ValueError:
+        parsed, slow_rows = [], 0
+        for x in strings:
+            try:
+                parsed.append(json.loads(x))
+            except ValueError:
+                parsed.append(ast.literal_eval(x))
+                slow_rows += 1
+    lists = [None] * len(values)
+    for position, parsed_list in zip(np.flatnonzero(is_string), parsed):
+        lists[position] = parsed_list
+    return pa.array(lists, type=pa.list_(pa.string())), slow_rows
+
 
 ## Dataset loading functions
 def load_nutrition_data(data_path: str) -> pd.DataFrame: 
@@ -162,6 +577,7 @@ def load_nutrition_data(data_path: str) -> pd.DataFrame:
         pd.DataFrame: cleaned dataset
     """
     df = pd.read_parquet(data_path)
+    rows_read = len(df)
     df = df.drop(columns=['RecipeId', 'AuthorId', 'DatePublished', 'RecipeYield'])
     df = df.drop_duplicates(subset=['Name','AuthorName'])
     # Filter out outliers
@@ -182,26 +598,62 @@ def load_nutrition_data(data_path: str) -> pd.DataFrame:
     df['CookTime'] = df['CookTime'].fillna('PT0M')
     df = df.dropna().reset_index(drop=True)
     df[['ReviewCount', 'RecipeServings']] = df[['ReviewCount', 'RecipeServings']].astype(int)
+    df.attrs['rows_read'] = rows_read
     return df
 
-def load_measurements_data(data_path: str) -> pd.DataFrame: 
+def load_measurements_data(data_path: str, batch_size: int = 100_000, titles: Set[str] = None) -> pd.DataFrame: 
     """
-    Load and clean the recipe measurements dataset
+    Load and clean the recipe measurements dataset. The csv file is streamed in batches of `batch_size` rows so that
+    only the needed columns of one batch are parsed at a time. The duplicates are detected on a 128-bit key of the title
+    and directions of the rows (two independent 64-bit hashes), so that a collision of a single hash can't drop a
+    distinct recipe. Memory limit: the key of every distinct row already read is kept, a Python int of about 80 bytes
+    with its set entry. This memory grows with the number of distinct rows (about 80 MB for a million), not with their
+    text or the number of duplicates.
 
     Args:
         data_path (str): path to the recipe dataset in csv format
+        batch_size (int, optional): number of csv rows read and parsed per batch. Defaults to 100,000.
+        titles (Set[str], optional): normalized titles (see `normalize_titles`) of the recipes to keep. Other rows are
+            dropped before their list columns are parsed. If not provided, all the recipes are kept.
 
     Returns:
         pd.DataFrame: cleaned dataset
     """
-    df = pd.read_csv(data_path)
-    df = df[['title', 'ingredients', 'directions', 'link', 'NER']]
-    df = df.drop_duplicates(subset=['title', 'directions'])
-    for col in ['ingredients', 'directions', 'NER']:
-        df[col] = df[col].apply(
-            lambda x: ast.literal_eval(x) if isinstance(x, str) else np.nan
-        )  
-    df = df.dropna().reset_index(drop=True)
+    columns = ['title', 'ingredients', 'directions', 'link', 'NER']
+    # 128-bit keys of the rows kept so far
+    seen_keys = set()
+    batches = []
+    rows_read, slow_rows = 0, 0
+    for batch in pd.read_csv(data_path, usecols=columns, dtype=str, chunksize=batch_size):
+        batch = batch[columns]
+        rows_read += len(batch)
+        if titles is not None:
+            batch = batch[normalize_titles(batch['title']).isin(titles)]
+        # Drop duplicates within the batch and with the previous batches (keys of the raw strings)
+        high, low = (pd.util.hash_pandas_object(batch[['title', 'directions']], index=False, hash_key=hash_key).tolist()
+                     for hash_key in DEDUPLICATION_HASH_KEYS)
+        is_new = np.zeros(len(batch), dtype=bool)
+        for i, key in enumerate(h << 64 | l for h, l in zip(high, low)):
+            if key not in seen_keys:
+                seen_keys.add(key)
+                is_new[i] = True
+        batch = batch[is_new]
+        # Parse the list columns directly into Arrow arrays
+        arrays = {}
+        for col in columns:
+            if col in ['ingredients', 'directions', 'NER']:
+                arrays[col], batch_slow_rows = parse_list_column(batch[col])
+                slow_rows += batch_slow_rows
+            else:
+                arrays[col] = pa.array(batch[col], type=pa.string(), from_pandas=True)
+        batches.append(pa.table(arrays).drop_null())
+    table = pa.concat_tables(batches) if batches else pa.table({col: pa.array([], type=pa.string()) for col in columns})
+    df = pd.DataFrame({
+        col: table.column(col).to_pylist() if col in ['ingredients', 'directions', 'NER'] else table.column(col).to_pandas()
+        for col in columns
+    })
+    df.attrs['rows_read'] = rows_read
+    df.attrs['literal_eval_rows'] = slow_rows
     return df
 
 def merge_datasets(df_nutrition: pd.DataFrame, df_measurements: pd.DataFrame) -> pd.DataFrame:
@@ -226,12 +678,64 @@ def merge_datasets(df_nutrition: pd.DataFrame, df_measurements: pd.DataFrame) ->
     df = filtered_df.drop(columns=['Name', 'RecipeIngredientQuantities', 'RecipeIngredientParts', 'RecipeInstructions'])
     return df
 
-def data_preprocessing(df: pd.DataFrame) -> pd.DataFrame:
+def derive_recipe_types(df: pd.DataFrame) -> pd.Series:
+    """
+    Compute the `RecipeType` column of (a shard of) the merged dataset, see `assign_categories`
+
+    Args:
+        df (pd.DataFrame): DataFrame with the RecipeCategory, Keywords and title columns
+
+    Returns:
+        pd.Series: the recipe types, with the same index as `df`
+    """
+    return assign_categories(df)
+
+def derive_recipe_attributes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute the ingredient and keyword based columns of (a shard of) the merged dataset: the diet flags (see
+    `classify_diets`) and `World_Cuisine`
+
+    Args:
+        df (pd.DataFrame): DataFrame with the ingredients and Keywords columns
+
+    Returns:
+        pd.DataFrame: the derived columns, with the same index as `df`
+    """
+    attributes = classify_diets(df['ingredients'])
+    attributes['World_Cuisine'] = df['Keywords'].apply(find_world_cuisine).astype(object)
+    return attributes
+
+def map_shards(func: Callable[[pd.DataFrame], Union[pd.Series, pd.DataFrame]], df: pd.DataFrame,
+               executor: Executor = None, n_shards: int = 1) -> Union[pd.Series, pd.DataFrame]:
+    """
+    Apply `func` to contiguous shards of `df` in the worker processes of `executor` and concatenate the results in the
+    order of the shards, so the output is the same as `func(df)`.
+
+    Args:
+        func (Callable): module-level function taking a DataFrame and returning a Series or DataFrame with the same index
+        df (pd.DataFrame): the DataFrame to split
+        executor (Executor, optional): pool running the shards. If not provided, `func` is applied to the whole DataFrame.
+        n_shards (int, optional): number of shards. Defaults to 1.
+
+    Returns:
+        Union[pd.Series, pd.DataFrame]: the concatenated results
+    """
+    n_shards = min(n_shards, len(df))
+    if executor is None or n_shards < 2:
+        return func(df)
+    bounds = np.linspace(0, len(df), n_shards + 1).astype(int)
+    shards = [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+    return pd.concat(list(executor.map(func, shards)))
+
+def data_preprocessing(df: pd.DataFrame, n_jobs: int = 1, cache_dir: str = None) -> pd.DataFrame:
     """
     Process the merged dataset
 
     Args:
         df (pd.DataFrame): the merged Dataframe 
+        n_jobs (int, optional): number of worker processes computing the row-wise derived columns. The rows are split in
+            `n_jobs` shards and the result is identical to the serial one. Defaults to 1 (no worker process).
+        cache_dir (str, optional): folder of the singular nouns cache (see `build_singular_map`). Defaults to no cache.
 
     Returns:
         pd.DataFrame: cleaned and processed DataFrame
@@ -239,69 +743,175 @@ def data_preprocessing(df: pd.DataFrame) -> pd.DataFrame:
     # Drop recipes with the same title
     df = df.drop_duplicates(subset=['title'])
 
-    # Create new variables
+    # Create new variables, and convert durations to a more readable format
     for col in ['CookTime', 'PrepTime', 'TotalTime']:
-        df[f'{col}_minutes'] = df[col].apply(iso_to_minutes)
+        durations = parse_durations(df[col])
+        df[f'{col}_minutes'] = durations['total_minutes']
+        df[col] = durations['formatted']
     df = df[df['TotalTime_minutes']>0]
     df['TotalTime_cat'] = df['TotalTime_minutes'].apply(categorize_duration)
-    df['RecipeType'] = df.apply(assign_category, axis=1)
-    df = df[df['RecipeType'] != 'Other'].reset_index(drop=True)
+    with ProcessPoolExecutor(max_workers=n_jobs) if n_jobs > 1 else nullcontext() as executor:
+        df['RecipeType'] = map_shards(derive_recipe_types, df[['RecipeCategory', 'Keywords', 'title']], executor, n_jobs)
+        df = df[df['RecipeType'] != 'Other'].reset_index(drop=True)
+        attributes = map_shards(derive_recipe_attributes, df[['ingredients', 'Keywords']], executor, n_jobs)
     df['Beginner_Friendly'] = df['Keywords'].apply(lambda x: 'Easy' in x) 
-    df['Vegetarian_Friendly'] = ~df['ingredients'].apply(is_non_vegetarian) 
-    df['World_Cuisine'] = df['Keywords'].apply(find_world_cuisine)
-
-    # Convert durations to a more readable format
-    for col in ['CookTime', 'PrepTime', 'TotalTime']:
-        df[col] = df[col].apply(format_duration)
-    # Convert ingredients to singular form
-    df['NER'] = df['NER'].apply(to_singular)
+    for diet in DIET_EXCLUDED_KEYWORDS:
+        df[diet] = attributes[diet]
+    df['World_Cuisine'] = attributes['World_Cuisine']
+    # Convert ingredients to singular form, once per distinct ingredient
+    vocabulary = {ingredient for ingredients in df['NER'] if isinstance(ingredients, list) for ingredient in ingredients}
+    df['NER'] = singularize_column(df['NER'], build_singular_map(vocabulary, cache_dir=cache_dir, n_jobs=n_jobs))
     # Add '#' before each keyword
     df['Keywords'] = df['Keywords'].apply(lambda keywords: [f'#{word}' for word in keywords])
 
     return df
 
-def sample_df_10k(df: pd.DataFrame) -> pd.DataFrame:
+def sample_quotas(type_counts: pd.Series, size: Union[int, str] = 10_000,
+                  weights: Union[dict[str, float], str] = None, quotas: dict[str, int] = None) -> pd.Series:
     """
-    Samples 10,000 rows from the given DataFrame while following a predefined distribution of `RecipeType` and prioritizing rows where the `World_Cuisine` column has values other than 'Unknown'.
+    Compute the number of recipes to sample for each recipe type.
+
+    Args:
+        type_counts (pd.Series): number of available recipes of each type
+        size (Union[int, str], optional): total number of recipes, or 'all' to keep every recipe. Defaults to 10,000.
+        weights (Union[dict[str, float], str], optional): share of each recipe type in the sample, or 'proportional' to
+            follow the distribution of the dataset. Defaults to `RECIPE_TYPE_WEIGHTS`.
+        quotas (dict[str, int], optional): explicit number of recipes of each type, overrides `size` and `weights`.
+
+    Returns:
+        pd.Series: number of recipes to sample for each type, at most the number of available recipes
+    """
+    if quotas is not None:
+        targets = pd.Series(quotas, dtype=float)
+    elif size == 'all':
+        targets = type_counts.astype(float)
+    else:
+        if weights is None:
+            weights = RECIPE_TYPE_WEIGHTS
+        weights = type_counts if weights == 'proportional' else pd.Series(weights, dtype=float)
+        shares = weights / weights.sum() * size
+        # Largest remainder rounding, so that the quotas add up to `size`
+        targets = np.floor(shares)
+        remainders = (shares - targets).sort_values(ascending=False, kind='stable')
+        targets[remainders.index[:int(round(size - targets.sum()))]] += 1
+    return targets.reindex(type_counts.index, fill_value=0).clip(upper=type_counts).astype(int)
+
+def sample_recipes(df: pd.DataFrame, size: Union[int, str] = 10_000, weights: Union[dict[str, float], str] = None,
+                   quotas: dict[str, int] = None, random_state: int = 42) -> pd.DataFrame:
+    """
+    Stratified sampling of the recipes by `RecipeType`, prioritizing in each type the rows where the `World_Cuisine`
+    column has values other than 'Unknown'. The dataset is grouped once, so the cost is linear in its size. With the
+    default arguments, the sample is the 10,000-recipe dataset of the application.
 
     Args:
         df (pd.Dataframe): Input DataFrame containing at least the following columns:
             - 'RecipeType' (categorical): Specifies the type of recipe (e.g., 'Dessert', 'Main Course').
             - 'World_Cuisine' (categorical): Specifies the cuisine type or 'Unknown' if not available.
+        size (Union[int, str], optional): number of sampled rows, or 'all' to keep (and shuffle) the whole dataset.
+            Defaults to 10,000.
+        weights (Union[dict[str, float], str], optional): share of each recipe type in the sample, or 'proportional'
+            (see `sample_quotas`). Defaults to `RECIPE_TYPE_WEIGHTS`.
+        quotas (dict[str, int], optional): explicit number of rows of each recipe type, overrides `size` and `weights`.
+        random_state (int, optional): random seed. Defaults to 42.
 
     Returns:
-        pd.Dataframe: A DataFrame with 10,000 sampled rows distributed according to `RecipeType`.
+        pd.Dataframe: the sampled rows, shuffled
     """
-    sample_distribution = {
-        'Beverages': 1500, 
-        'Breakfast': 1300,  
-        'Dessert': 3200,   
-        'Main Course': 4000
-    }
+    groups = df.groupby('RecipeType', sort=True, observed=True)
+    targets = sample_quotas(groups.size(), size=size, weights=weights, quotas=quotas)
     sampled_dataframes = []
 
-    for recipe_type, sample_size in sample_distribution.items():
-        # Filter rows by RecipeType
-        df_recipe_type = df[df['RecipeType'] == recipe_type]    
-        if len(df_recipe_type) < sample_size:
-            sample_size = len(df_recipe_type) 
+    for recipe_type, df_recipe_type in groups:
+        sample_size = targets[recipe_type]
         # Prioritize rows where 'Cuisine' is not 'Unknown'
-        df_cuisine = df_recipe_type[df_recipe_type['World_Cuisine'] != 'Unknown']
+        known_cuisine = (df_recipe_type['World_Cuisine'] != 'Unknown').to_numpy()
+        df_cuisine = df_recipe_type[known_cuisine]
         cuisine_sample_size = min(len(df_cuisine), sample_size)
-        sampled_cuisine = df_cuisine.sample(n=cuisine_sample_size, random_state=42)
+        sampled_cuisine = df_cuisine.sample(n=cuisine_sample_size, random_state=random_state)
         # Sample remaining rows if needed
-        remaining_sample_size = sample_size - cuisine_sample_size
-        df_non_cuisine = df_recipe_type.drop(df_cuisine.index)
-        sampled_remaining = df_non_cuisine.sample(n=min(len(df_non_cuisine), remaining_sample_size), random_state=42)
-        # Combine prioritized and remaining samples for this category
-        sampled_dataframes.append(pd.concat([sampled_cuisine, sampled_remaining]))
+        df_non_cuisine = df_recipe_type[~known_cuisine]
+        sampled_remaining = df_non_cuisine.sample(n=sample_size - cuisine_sample_size, random_state=random_state)
+        sampled_dataframes.extend([sampled_cuisine, sampled_remaining])
 
     # Combine all sampled categories and shuffle the final DataFrame
     sampled_df = pd.concat(sampled_dataframes)
-    sampled_df = sampled_df.sample(frac=1, random_state=42).reset_index(drop=True)
+    sampled_df = sampled_df.sample(frac=1, random_state=random_state).reset_index(drop=True)
     return sampled_df
 
-def main(data_path_nutrition: str, data_path_measurements: str, output_path: str = None) -> None:
+def enforce_schema(df: pd.DataFrame, schema: dict[str, str] = RECIPE_SCHEMA) -> pd.DataFrame:
+    """
+    Convert the columns of the recipes to compact dtypes: categoricals for the columns with few distinct values,
+    Arrow-backed strings for the text columns and smaller integers and floats for the numeric columns.
+
+    Args:
+        df (pd.DataFrame): the recipes
+        schema (dict[str, str], optional): dtype of each column, the columns missing from `df` are skipped. Defaults
+            to `RECIPE_SCHEMA`.
+
+    Raises:
+        ValueError: if a column has values out of the range of its integer dtype
+
+    Returns:
+        pd.DataFrame: the recipes with the dtypes of the schema
+    """
+    dtypes = {col: dtype for col, dtype in schema.items() if col in df.columns}
+    for col, dtype in dtypes.items():
+        if pd.api.types.is_integer_dtype(dtype) and len(df):
+            info = np.iinfo(dtype)
+            if df[col].min() < info.min or df[col].max() > info.max:
+                raise ValueError(f"{col} has values out of the {dtype} range [{info.min}, {info.max}]")
+    return df.astype(dtypes)
+
+def memory_mb(df: pd.DataFrame) -> float:
+    """
+    Args:
+        df (pd.DataFrame): a DataFrame
+
+    Returns:
+        float: memory used by the DataFrame in MiB, including the Python objects of its object columns
+    """
+    return df.memory_usage(deep=True).sum() / 2**20
+
+def sort_recipes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sort the recipes by decreasing rating, then decreasing number of reviews (the default order of the search results).
+
+    Args:
+        df (pd.DataFrame): the recipes
+
+    Returns:
+        pd.DataFrame: the sorted recipes, with a new index
+    """
+    return df.sort_values(OUTPUT_SORT_COLUMNS, ascending=False, kind='stable', ignore_index=True)
+
+def write_recipes(df: pd.DataFrame, output_path: str, row_group_size: int = OUTPUT_ROW_GROUP_SIZE) -> None:
+    """
+    Write the recipes sorted by `sort_recipes` to a parquet file laid out for selective reads: the low-cardinality
+    columns are stored with the Arrow dictionary type (read back as categoricals instead of one string per row), and
+    the file is split in row groups with min/max statistics and the sort order in their metadata. Readers filtering
+    on the rating (`pd.read_parquet(path, filters=[('AggregatedRating', '>=', 4.5)])`) skip the row groups that cannot
+    match, and can read only the columns they need.
+
+    Args:
+        df (pd.DataFrame): the recipes, sorted by `sort_recipes`
+        output_path (str): path of the parquet file
+        row_group_size (int, optional): number of rows per row group. Defaults to `OUTPUT_ROW_GROUP_SIZE`.
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    dictionary_columns = [col for col in OUTPUT_DICTIONARY_COLUMNS if col in df.columns]
+    for col in dictionary_columns:
+        index = table.schema.get_field_index(col)
+        if not pa.types.is_dictionary(table[col].type):
+            table = table.set_column(index, col, table[col].dictionary_encode())
+    pq.write_table(
+        table, output_path, row_group_size=row_group_size, write_statistics=True,
+        sorting_columns=pq.SortingColumn.from_ordering(table.schema, [(col, 'descending') for col in OUTPUT_SORT_COLUMNS]),
+    )
+
+def main(data_path_nutrition: str, data_path_measurements: str, output_path: str = None, batch_size: int = 100_000,
+         n_jobs: int = 1, cache_dir: str = None, checkpoint_dir: str = None, write_report: bool = False,
+         trace_memory: bool = False, sample_size: Union[int, str] = 10_000,
+         sample_weights: Union[dict[str, float], str] = None) -> None:
     """
     Main function to process and return the final dataset.
     
@@ -309,6 +919,20 @@ def main(data_path_nutrition: str, data_path_measurements: str, output_path: str
         data_path_nutrition (str): Path to the recipe nutrition dataset file (parquet format).
         data_path_measurements (str): Path to the recipe measurements dataset file (csv format).
         output_path (str, optional): Path where to save the processed dataset. If not provided, the dataset will not be saved.
+        batch_size (int, optional): Number of rows of the measurements csv file read per batch. Defaults to 100,000.
+        n_jobs (int, optional): Number of worker processes used by the preprocessing step. Defaults to 1.
+        cache_dir (str, optional): Folder where the singular form of the ingredients is cached. Defaults to no cache.
+        checkpoint_dir (str, optional): Folder where the output of each stage is saved, keyed by its inputs and code
+            (see `checkpoints.run_stage`). The stages whose inputs and code did not change are read from there instead
+            of running again. Defaults to no checkpoints.
+        write_report (bool, optional): Whether to write the time and memory report of the stages as a json file next to
+            the processed dataset (`<output_path stem>.report.json`). Defaults to False.
+        trace_memory (bool, optional): Whether to also measure the peak Python memory of each stage with tracemalloc
+            (slower). Defaults to False.
+        sample_size (Union[int, str], optional): Number of recipes of the final dataset, or 'all' to keep every
+            recipe (see `sample_recipes`). Defaults to 10,000.
+        sample_weights (Union[dict[str, float], str], optional): Share of each recipe type in the final dataset, or
+            'proportional' to the processed dataset. Defaults to `RECIPE_TYPE_WEIGHTS`.
 
     Returns:
         pd.DataFrame: The final dataset after merging, preprocessing, and optional sampling.
@@ -319,24 +943,87 @@ def main(data_path_nutrition: str, data_path_measurements: str, output_path: str
     if not Path(data_path_measurements).exists():
         raise FileNotFoundError(f"Recipe measurements dataset not found at {data_path_measurements}")
     
-    df_nutrition = load_nutrition_data(data_path_nutrition)
-    df_measurements = load_measurements_data(data_path_measurements)
-    df = merge_datasets(df_nutrition, df_measurements)
-    df = data_preprocessing(df)
-    if len(df) > 10000:
-        df = sample_df_10k(df)
+    profiler = PipelineProfiler(trace_memory=trace_memory)
+    with profiler.stage('load_nutrition_data') as stage:
+        df_nutrition, nutrition_key = run_stage(
+            load_nutrition_data, (data_path_nutrition,), [Path(data_path_nutrition)], checkpoint_dir
+        )
+        stage['rows_in'], stage['rows_out'] = df_nutrition.attrs.get('rows_read'), len(df_nutrition)
+    with profiler.stage('load_measurements_data') as stage:
+        # Only the measurement rows matching a nutrition recipe survive the merge, so the others are not parsed
+        nutrition_titles = set(normalize_titles(df_nutrition['Name']))
+        df_measurements, measurements_key = run_stage(
+            load_measurements_data, (data_path_measurements,), [Path(data_path_measurements), nutrition_key],
+            checkpoint_dir, batch_size=batch_size, titles=nutrition_titles
+        )
+        stage['rows_in'], stage['rows_out'] = df_measurements.attrs.get('rows_read'), len(df_measurements)
+    print(f"{df_measurements.attrs['literal_eval_rows']} rows of the measurements dataset needed the literal_eval fallback")
+    with profiler.stage('merge_datasets', rows_in=len(df_nutrition) + len(df_measurements)) as stage:
+        df, merged_key = run_stage(
+            merge_datasets, (df_nutrition, df_measurements), [nutrition_key, measurements_key], checkpoint_dir
+        )
+        stage['rows_out'] = len(df)
+    with profiler.stage('data_preprocessing', rows_in=len(df)) as stage:
+        df, processed_key = run_stage(
+            data_preprocessing, (df,), [merged_key], checkpoint_dir, n_jobs=n_jobs, cache_dir=cache_dir
+        )
+        stage['rows_out'] = len(df)
+    if sample_size == 'all' or len(df) > sample_size:
+        with profiler.stage('sample_recipes', rows_in=len(df)) as stage:
+            df, _ = run_stage(
+                sample_recipes, (df,), [processed_key, sample_size, sample_weights], checkpoint_dir,
+                size=sample_size, weights=sample_weights
+            )
+            stage['rows_out'] = len(df)
+    with profiler.stage('enforce_schema', rows_in=len(df)) as stage:
+        memory_before = memory_mb(df)
+        df = enforce_schema(df)
+        memory_after = memory_mb(df)
+        stage['rows_out'] = len(df)
+    print(f"Memory of the recipes: {memory_before:.1f} MiB before, {memory_after:.1f} MiB with the compact dtypes")
+    df = sort_recipes(df)
     if output_path:
-        df.to_parquet(output_path, index=False)
+        with profiler.stage('write_output', rows_in=len(df)) as stage:
+            write_recipes(df, output_path)
+            stage['rows_out'] = len(df)
         print(f"Processed dataset saved to {output_path}")
+        with profiler.stage('write_search_bundle', rows_in=len(df)) as stage:
+            bundle_dir = write_search_bundle(df, output_path)
+            stage['rows_out'] = len(df)
+        print(f"Search bundle saved to {bundle_dir}")
+    profiler.print_table()
+    if write_report and output_path:
+        report_path = Path(output_path).with_suffix('.report.json')
+        profiler.write_json(
+            report_path,
+            created=pd.Timestamp.now().isoformat(timespec='seconds'),
+            inputs={str(path): Path(path).stat().st_size for path in [data_path_nutrition, data_path_measurements]},
+            output=str(output_path),
+            parameters={'batch_size': batch_size, 'n_jobs': n_jobs, 'checkpoints': checkpoint_dir is not None,
+                        'sample_size': sample_size, 'sample_weights': sample_weights},
+            versions={package: version(package) for package in ['pandas', 'pyarrow', 'inflect']},
+            memory_mb={'before_enforce_schema': memory_before, 'after_enforce_schema': memory_after},
+        )
+        print(f"Preprocessing report saved to {report_path}")
     return df
 
 
 
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description='Build the recipe dataset of the application.')
+    parser.add_argument('--size', default='10000', help="number of recipes (example: 100000), or 'all'")
+    parser.add_argument('--proportional', action='store_true',
+                        help='follow the recipe type distribution of the dataset instead of RECIPE_TYPE_WEIGHTS')
+    args = parser.parse_args()
+    sample_size = args.size if args.size == 'all' else int(args.size)
+    size_label = 'all' if sample_size == 'all' else f'{sample_size // 1000}k' if sample_size % 1000 == 0 else str(sample_size)
+
     data_dir = Path(__file__).resolve().parent.parent / 'Data'
     recipe_nutrition_path = data_dir / 'recipes.parquet'
     recipe_measurements_path = data_dir / 'recipes_data.csv'
-    output_path = data_dir / 'sample_recipes_10k.parquet'
+    output_path = data_dir / f'sample_recipes_{size_label}.parquet'
 
-    main(recipe_nutrition_path, recipe_measurements_path, output_path)
\ No newline at end of file
+    main(recipe_nutrition_path, recipe_measurements_path, output_path, cache_dir=data_dir,
+         checkpoint_dir=data_dir / 'checkpoints', write_report=True, sample_size=sample_size,
+         sample_weights='proportional' if args.proportional else None)
\ No newline at end of file
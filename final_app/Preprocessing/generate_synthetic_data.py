@@ -0,0 +1,226 @@
+import argparse
+import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+
+# Vocabularies of the fake recipes
+INGREDIENTS = [
+    'chicken', 'ground beef', 'pork chops', 'bacon', 'salmon', 'shrimp', 'tuna', 'eggs', 'milk', 'butter',
+    'cheddar cheese', 'parmesan cheese', 'sour cream', 'flour', 'sugar', 'brown sugar', 'baking powder', 'salt',
+    'pepper', 'olive oil', 'garlic', 'onions', 'green onions', 'tomatoes', 'potatoes', 'carrots', 'celery',
+    'broccoli', 'spinach', 'mushrooms', 'bell peppers', 'zucchini', 'rice', 'pasta', 'noodles', 'lentils', 'tofu',
+    'lemons', 'limes', 'apples', 'bananas', 'strawberries', 'blueberries', 'walnuts', 'pecans', 'almonds',
+    'peanut butter', 'chocolate chips', 'cocoa', 'vanilla', 'cinnamon', 'nutmeg', 'honey', 'coffee', 'oats',
+    'yogurt', 'cream cheese', 'basil', 'oregano', 'soy sauce',
+]
+DISHES = [
+    'Soup', 'Stew', 'Salad', 'Casserole', 'Pasta', 'Pizza', 'Quiche', 'Stir Fry', 'Curry', 'Tacos', 'Cake',
+    'Cookies', 'Brownies', 'Muffins', 'Pie', 'Bread', 'Pancakes', 'Smoothie', 'Lemonade', 'Cocktail', 'Dip',
+    'Sandwich', 'Burger', 'Chili', 'Granola',
+]
+ADJECTIVES = ['Easy', 'Spicy', 'Creamy', 'Quick', "Grandma's", 'Healthy', 'Classic', 'Crispy', 'Homemade', 'Best']
+CATEGORIES = [
+    'Dessert', 'Chicken', 'Breakfast', 'Beverages', 'Vegetable', 'Lunch/Snacks', 'Pie', 'One Dish Meal', 'Bread',
+    'Meat', 'Low Protein', 'Quick Breads', 'Sauces', 'Potato', 'Cheese',
+]
+KEYWORDS = [
+    'Easy', '< 60 Mins', '< 30 Mins', '< 4 Hours', 'Oven', 'Healthy', 'Kid-Friendly', 'Weeknight', 'Inexpensive',
+    'Low Cholesterol', 'Mexican', 'Asian', 'Indian', 'European', 'Italian', 'French', 'Greek', 'Thai', 'Chinese',
+    'American', 'Spring', 'Summer', 'Winter', 'Christmas',
+]
+UNITS = ['1 c.', '2 c.', '1/2 c.', '1 Tbsp.', '2 tsp.', '1 lb.', '3', '1 (8 oz.) pkg.', '1/4 tsp.']
+STEPS = [
+    'Preheat oven to 350 degrees', 'Mix the dry ingredients in a bowl', 'Whisk the eggs with the milk',
+    'Chop the vegetables', 'Bring a pot of salted water to a boil', 'Brown the meat in a large skillet',
+    'Stir in the remaining ingredients', 'Simmer for 20 minutes', 'Pour into a greased pan', 'Bake until golden',
+    'Season with salt and pepper', 'Blend until smooth', 'Serve warm', 'Chill before serving',
+]
+
+
+def iso_durations(rng: np.random.Generator, n_rows: int, max_minutes: int) -> np.ndarray:
+    """
+    Generate random ISO 8601 durations such as the Food.com ones ('PT1H30M', 'PT45M', 'PT2H', ...).
+
+    Args:
+        rng (np.random.Generator): random generator
+        n_rows (int): number of durations
+        max_minutes (int): maximum duration in minutes
+
+    Returns:
+        np.ndarray: durations
+    """
+    minutes = rng.integers(0, max_minutes // 5 + 1, n_rows) * 5
+    hours, minutes = minutes // 60, minutes % 60
+    return np.where(
+        hours > 0,
+        np.char.add(np.char.add('PT', hours.astype(str)), np.where(minutes > 0, np.char.add(np.char.add('H', minutes.astype(str)), 'M'), 'H')),
+        np.char.add(np.char.add('PT', minutes.astype(str)), 'M'),
+    ).astype(object)
+
+def random_lists(rng: np.random.Generator, vocabulary: list, n_rows: int, min_size: int, max_size: int) -> list[list[str]]:
+    """
+    Args:
+        rng (np.random.Generator): random generator
+        vocabulary (list): values to draw from
+        n_rows (int): number of lists
+        min_size (int): minimum number of values per list
+        max_size (int): maximum number of values per list
+
+    Returns:
+        list[list[str]]: lists of distinct values
+    """
+    sizes = rng.integers(min_size, max_size + 1, n_rows)
+    vocabulary = np.array(vocabulary, dtype=object)
+    lists = []
+    # Distinct values: the first `size` values of a random permutation of the vocabulary (by chunks to bound memory)
+    for start in range(0, n_rows, 100_000):
+        orders = np.argsort(rng.random((len(sizes[start:start + 100_000]), len(vocabulary)), dtype=np.float32), axis=1)
+        lists.extend(vocabulary[order[:size]].tolist() for order, size in zip(orders, sizes[start:start + 100_000]))
+    return lists
+
+def recipe_titles(rng: np.random.Generator, ids: np.ndarray, ingredients: list[list[str]]) -> np.ndarray:
+    """
+    Args:
+        rng (np.random.Generator): random generator
+        ids (np.ndarray): recipe ids, appended to the titles to keep them mostly unique
+        ingredients (list[list[str]]): ingredients of the recipes, the first one appears in the title
+
+    Returns:
+        np.ndarray: titles (example: 'Creamy Mushrooms Soup 12')
+    """
+    adjectives = np.array(ADJECTIVES, dtype=object)[rng.integers(0, len(ADJECTIVES), len(ids))]
+    dishes = np.array(DISHES, dtype=object)[rng.integers(0, len(DISHES), len(ids))]
+    main_ingredients = np.array([x[0].title() for x in ingredients], dtype=object)
+    return adjectives + ' ' + main_ingredients + ' ' + dishes + ' ' + ids.astype(str)
+
+def generate_nutrition_data(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Generate a fake Food.com recipes dataset, with the same columns and types as `recipes.parquet`
+    (https://www.kaggle.com/datasets/irkaal/foodcom-recipes-and-reviews/data).
+
+    Args:
+        n_rows (int): number of recipes
+        seed (int, optional): random seed. Defaults to 42.
+
+    Returns:
+        pd.DataFrame: the recipes
+    """
+    rng = np.random.default_rng(seed)
+    ids = np.arange(n_rows)
+    ingredients = random_lists(rng, INGREDIENTS, n_rows, 3, 10)
+    steps = random_lists(rng, STEPS, n_rows, 2, 6)
+    no_image = rng.random(n_rows) < 0.3
+    df = pd.DataFrame({
+        'RecipeId': ids + 38,
+        'Name': recipe_titles(rng, ids, ingredients),
+        'AuthorId': rng.integers(1, 50_000, n_rows),
+        'AuthorName': np.char.add('cook_', rng.integers(1, 50_000, n_rows).astype(str)).astype(object),
+        'CookTime': np.where(rng.random(n_rows) < 0.1, None, iso_durations(rng, n_rows, 240)),
+        'PrepTime': iso_durations(rng, n_rows, 60),
+        'TotalTime': iso_durations(rng, n_rows, 300),
+        'DatePublished': pd.Timestamp('1999-08-09', tz='UTC') + pd.to_timedelta(rng.integers(0, 7500, n_rows), unit='D'),
+        'Description': np.char.add('Make this recipe with ', rng.choice(INGREDIENTS, n_rows)).astype(object),
+        'Images': [np.array([], dtype=object) if skip else np.array([f'https://img.sndimg.com/food/{i}.jpg'], dtype=object)
+                   for i, skip in zip(ids, no_image)],
+        'RecipeCategory': np.array(CATEGORIES, dtype=object)[rng.integers(0, len(CATEGORIES), n_rows)],
+        'Keywords': [np.array(x, dtype=object) for x in random_lists(rng, KEYWORDS, n_rows, 1, 6)],
+        'RecipeIngredientQuantities': [np.array(rng.choice(['1', '2', '1/2', '3'], len(x)), dtype=object) for x in ingredients],
+        'RecipeIngredientParts': [np.array(x, dtype=object) for x in ingredients],
+        'AggregatedRating': np.where(rng.random(n_rows) < 0.3, np.nan, rng.integers(2, 11, n_rows) / 2),
+        'ReviewCount': np.where(rng.random(n_rows) < 0.3, np.nan, rng.geometric(0.2, n_rows)).astype(float),
+        'Calories': rng.gamma(2, 200, n_rows).round(1),
+        'FatContent': rng.gamma(2, 10, n_rows).round(1),
+        'SaturatedFatContent': rng.gamma(2, 4, n_rows).round(1),
+        'CholesterolContent': rng.gamma(2, 40, n_rows).round(1),
+        'SodiumContent': rng.gamma(2, 300, n_rows).round(1),
+        'CarbohydrateContent': rng.gamma(2, 20, n_rows).round(1),
+        'FiberContent': rng.gamma(2, 1.5, n_rows).round(1),
+        'SugarContent': rng.gamma(2, 10, n_rows).round(1),
+        'ProteinContent': rng.gamma(2, 8, n_rows).round(1),
+        'RecipeServings': np.where(rng.random(n_rows) < 0.1, np.nan, rng.integers(1, 13, n_rows)).astype(float),
+        'RecipeYield': None,
+        'RecipeInstructions': [np.array([step + '.' for step in x], dtype=object) for x in steps],
+    })
+    return df
+
+def generate_measurements_data(df_nutrition: pd.DataFrame, n_rows: int, overlap: float = 0.5, seed: int = 42) -> pd.DataFrame:
+    """
+    Generate a fake version of the 2M+ recipes dataset, with the same columns as `recipes_data.csv`
+    (https://www.kaggle.com/datasets/wilmerarltstrmberg/recipe-dataset-over-2m/data). The first rows are copies of
+    nutrition recipes (same title and first instruction, so they survive `merge_datasets`), the others are new recipes.
+
+    Args:
+        df_nutrition (pd.DataFrame): the fake nutrition dataset (see `generate_nutrition_data`)
+        n_rows (int): number of recipes
+        overlap (float, optional): share of the nutrition recipes included in the dataset. Defaults to 0.5.
+        seed (int, optional): random seed. Defaults to 42.
+
+    Returns:
+        pd.DataFrame: the recipes, with list columns stringified as in the csv file
+    """
+    rng = np.random.default_rng(seed + 1)
+    n_shared = min(int(len(df_nutrition) * overlap), n_rows)
+    shared = df_nutrition.iloc[:n_shared]
+    ids = np.arange(len(df_nutrition), len(df_nutrition) + n_rows - n_shared)
+    new_ingredients = random_lists(rng, INGREDIENTS, len(ids), 3, 10)
+    ner = [list(x) for x in shared['RecipeIngredientParts']] + new_ingredients
+    directions = [list(x) for x in shared['RecipeInstructions']] + [
+        [step + '.' for step in x] for x in random_lists(rng, STEPS, len(ids), 2, 6)
+    ]
+    units = np.array(UNITS, dtype=object)
+    df = pd.DataFrame({
+        'title': np.concatenate([shared['Name'].to_numpy(), recipe_titles(rng, ids, new_ingredients)]),
+        'ingredients': [json.dumps((units[rng.integers(0, len(units), len(x))] + ' ' + np.array(x, dtype=object)).tolist()) for x in ner],
+        'directions': [json.dumps(x) for x in directions],
+        'link': np.char.add('www.cookbooks.com/Recipe-Details.aspx?id=', np.arange(n_rows).astype(str)).astype(object),
+        'source': 'Gathered',
+        'NER': [json.dumps(x) for x in ner],
+    })
+    # Shuffle the rows so that the shared recipes are spread over the whole file
+    return df.sample(frac=1, random_state=seed).reset_index(drop=True)
+
+def generate_datasets(output_dir: str, n_rows: int, overlap: float = 0.5, seed: int = 42, batch_size: int = 200_000) -> None:
+    """
+    Write a fake `recipes.parquet` (a quarter of `n_rows` recipes, like the real datasets) and `recipes_data.csv`
+    (`n_rows` recipes) in `output_dir`, to run and benchmark `data_cleaning.main` without the Kaggle datasets.
+
+    Args:
+        output_dir (str): folder of the datasets
+        n_rows (int): number of recipes of the measurements dataset
+        overlap (float, optional): share of the nutrition recipes also in the measurements dataset. Defaults to 0.5.
+        seed (int, optional): random seed. Defaults to 42.
+        batch_size (int, optional): number of measurement recipes generated and written at a time. Defaults to 200,000.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    df_nutrition = generate_nutrition_data(max(n_rows // 4, 1), seed=seed)
+    df_nutrition.to_parquet(output_dir / 'recipes.parquet', index=False)
+
+    # The measurements are written in batches, with the shared recipes spread over all of them
+    n_batches = max(1, -(-n_rows // batch_size))
+    shared_bounds = np.linspace(0, int(len(df_nutrition) * overlap), n_batches + 1).astype(int)
+    row_bounds = np.linspace(0, n_rows, n_batches + 1).astype(int)
+    for i in range(n_batches):
+        df_batch = generate_measurements_data(
+            df_nutrition.iloc[shared_bounds[i]:], row_bounds[i + 1] - row_bounds[i],
+            overlap=(shared_bounds[i + 1] - shared_bounds[i]) / max(len(df_nutrition) - shared_bounds[i], 1),
+            seed=seed + i,
+        )
+        df_batch.index += row_bounds[i]
+        df_batch.to_csv(output_dir / 'recipes_data.csv', mode='w' if i == 0 else 'a', header=i == 0)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description='Write fake Kaggle-shaped recipe datasets for tests and benchmarks.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 200_000, 2_000_000],
+                        help='number of recipes of the measurements dataset, one folder per size')
+    parser.add_argument('--overlap', type=float, default=0.5, help='share of the nutrition recipes in both datasets')
+    parser.add_argument('--output-dir', default=Path(__file__).resolve().parent.parent / 'Data' / 'synthetic')
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        generate_datasets(Path(args.output_dir) / str(size), size, overlap=args.overlap)
+        print(f"Synthetic datasets with {size:,} recipes saved to {Path(args.output_dir) / str(size)}")
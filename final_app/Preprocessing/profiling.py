@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Iterator, List
+import pandas as pd
+import psutil
+
+
+def cpu_seconds() -> float:
+    """
+    Returns:
+        float: CPU time (user + system) used by the process and by its terminated child processes, such as the workers
+            of a process pool that was shut down
+    """
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+def rss_bytes(process: psutil.Process) -> int:
+    """
+    Args:
+        process (psutil.Process): the process
+
+    Returns:
+        int: resident set size of the process and of its running child processes
+    """
+    total = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:  #the child exited in the meantime
+            pass
+    return total
+
+
+class RssSampler:
+    """
+    Background thread sampling the resident set size of the current process (and its children) to measure the peak
+    RSS of a block of code. The peak RSS reported by the OS cannot be reset, so it would not be attributed to a stage.
+
+    Args:
+        interval (float, optional): seconds between two samples. Defaults to 0.01.
+    """
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak = rss_bytes(self.process)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes(self.process))
+
+    def start(self) -> 'RssSampler':
+        self._thread.start()
+        return self
+
+    def stop(self) -> int:
+        """
+        Returns:
+            int: peak RSS in bytes since the start of the sampler
+        """
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_bytes(self.process))
+        return self.peak
+
+
+class PipelineProfiler:
+    """
+    Records the wall time, CPU time, number of rows in and out and peak memory of each stage of a pipeline.
+
+    Args:
+        trace_memory (bool, optional): also record the peak memory allocated by Python objects with tracemalloc. This
+            slows the stages down noticeably. Defaults to False.
+    """
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.stages: List[dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int = None) -> Iterator[dict[str, Any]]:
+        """
+        Profile the block of code of a stage. The number of output rows is set by the block in the yielded record.
+
+        Args:
+            name (str): name of the stage
+            rows_in (int, optional): number of input rows
+
+        Yields:
+            dict[str, Any]: the record of the stage, `rows_out` should be set before the end of the block
+        """
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None}
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        sampler = RssSampler().start()
+        wall_start, cpu_start = time.perf_counter(), cpu_seconds()
+        try:
+            yield record
+        finally:
+            record['wall_s'] = time.perf_counter() - wall_start
+            record['cpu_s'] = cpu_seconds() - cpu_start
+            record['peak_rss_mb'] = sampler.stop() / 2**20
+            if self.trace_memory:
+                record['peak_traced_mb'] = tracemalloc.get_traced_memory()[1] / 2**20
+            if started_tracing:
+                tracemalloc.stop()
+            self.stages.append(record)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns:
+            pd.DataFrame: one row per stage, plus a total row (sums of times, maximum of the peaks)
+        """
+        report = pd.DataFrame(self.stages).set_index('stage')
+        if len(report):
+            total = report[['wall_s', 'cpu_s']].sum()
+            for col in [col for col in report.columns if col.startswith('peak_')]:
+                total[col] = report[col].max()
+            report.loc['total'] = total
+        return report
+
+    def print_table(self) -> None:
+        """Print the report of the stages as a table."""
+        report = self.to_frame()
+        for col in ['rows_in', 'rows_out']:
+            report[col] = report[col].map(lambda x: '' if pd.isna(x) else f'{int(x):,}')
+        print(report.to_string(float_format=lambda x: f'{x:.2f}'))
+
+    def write_json(self, path: str, **metadata: Any) -> None:
+        """
+        Write the report of the stages to a json file.
+
+        Args:
+            path (str): path of the json file
+            **metadata: other information to store with the stages (example: input file sizes)
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({**metadata, 'stages': self.stages}, f, indent=2, default=str)
@@ -0,0 +1,174 @@
+import json
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterable
+import numpy as np
+import pandas as pd
+from checkpoints import file_digest
+
+
+# Version of the layout of the bundle, readers ignore bundles of another version
+SEARCH_BUNDLE_VERSION = 3
+# Columns whose distinct values are the options of the filters of the application
+FILTER_OPTION_COLUMNS = ['RecipeType', 'World_Cuisine', 'TotalTime_cat', 'TotalTime_minutes']
+# Words of the spellcheck dictionary: letters, with inner apostrophes or hyphens
+SPELLING_WORD_PATTERN = re.compile(r"[a-z]+(?:['-][a-z]+)*")
+
+
+def search_bundle_dir(dataset_path: str) -> Path:
+    """
+    Args:
+        dataset_path (str): path of the parquet dataset
+
+    Returns:
+        Path: folder of the search bundle of the dataset (example: 'sample_recipes_10k.search')
+    """
+    return Path(dataset_path).with_suffix('.search')
+
+def title_tokens(titles: Iterable[str]) -> Counter:
+    """
+    Split the lowercase titles on whitespace. A word without whitespace is in a lowercase title if and only if it is
+    in one of its tokens, so the tokens can replace the titles when looking up the words of a query.
+
+    Args:
+        titles (Iterable[str]): recipe titles
+
+    Returns:
+        Counter: number of occurrences of each token
+    """
+    return Counter(token for title in titles for token in title.lower().split())
+
+def encode_ner(ner: pd.Series) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Dictionary-encode the ingredient lists in CSR form: the ingredients of recipe i are
+    `vocabulary[ids[offsets[i]:offsets[i + 1]]]`, in the order of its list.
+
+    Args:
+        ner (pd.Series): ingredient lists of the recipes
+
+    Returns:
+        tuple[list[str], np.ndarray, np.ndarray, np.ndarray]:
+            - the vocabulary, by decreasing number of occurrences (ties in order of first occurrence)
+            - the number of occurrences of each ingredient of the vocabulary
+            - the ingredient IDs (int32) of the recipes, concatenated
+            - the offsets (int64) of the ingredients of each recipe
+    """
+    counts = Counter(x for row in ner for x in row)
+    terms = [term for term, _ in counts.most_common()]
+    term_ids = {term: i for i, term in enumerate(terms)}
+    ids = np.fromiter((term_ids[x] for row in ner for x in row), dtype=np.int32, count=counts.total())
+    offsets = np.zeros(len(ner) + 1, dtype=np.int64)
+    np.cumsum([len(row) for row in ner], out=offsets[1:])
+    return terms, np.array([counts[term] for term in terms], dtype=np.int64), ids, offsets
+
+def ingredient_postings(ids: np.ndarray, offsets: np.ndarray, n_terms: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Transpose the CSR ingredient lists (see `encode_ner`) into the list of recipes containing each ingredient.
+
+    Args:
+        ids (np.ndarray): ingredient IDs of the recipes, concatenated
+        offsets (np.ndarray): offsets of the ingredients of each recipe
+        n_terms (int): size of the vocabulary
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]:
+            - the offsets of the postings of each ingredient (ingredient i: postings[offsets[i]:offsets[i + 1]])
+            - the sorted row positions (int32) of the recipes containing each ingredient, concatenated
+    """
+    rows = np.repeat(np.arange(len(offsets) - 1, dtype=np.int32), np.diff(offsets))
+    # Sort the (ingredient, recipe) pairs and drop the ingredients listed twice in a recipe
+    order = np.lexsort((rows, ids))
+    ids, rows = ids[order], rows[order]
+    unique = np.ones(len(ids), dtype=bool)
+    unique[1:] = (ids[1:] != ids[:-1]) | (rows[1:] != rows[:-1])
+    ids, rows = ids[unique], rows[unique]
+    postings_offsets = np.zeros(n_terms + 1, dtype=np.int64)
+    np.cumsum(np.bincount(ids, minlength=n_terms), out=postings_offsets[1:])
+    return postings_offsets, rows
+
+def filter_options(df: pd.DataFrame) -> dict[str, list]:
+    """
+    Args:
+        df (pd.DataFrame): the recipes
+
+    Returns:
+        dict[str, list]: sorted distinct values of the `FILTER_OPTION_COLUMNS` of the dataset, and the names of its
+            boolean columns (`flags`)
+    """
+    options = {
+        col: sorted(value.item() if isinstance(value, np.generic) else value for value in df[col].dropna().unique())
+        for col in FILTER_OPTION_COLUMNS if col in df.columns
+    }
+    options['flags'] = [col for col in df.columns if pd.api.types.is_bool_dtype(df[col])]
+    return options
+
+def spelling_frequencies(ingredients: list[str], ingredient_counts: np.ndarray, tokens: Counter) -> dict[str, int]:
+    """
+    Word frequencies of the spellcheck dictionary: the words of the ingredients, weighted by the number of
+    occurrences of the ingredients, and the words of the titles.
+
+    Args:
+        ingredients (list[str]): ingredient vocabulary
+        ingredient_counts (np.ndarray): number of occurrences of each ingredient
+        tokens (Counter): title tokens (see `title_tokens`)
+
+    Returns:
+        dict[str, int]: number of occurrences of each word
+    """
+    frequencies = Counter()
+    for ingredient, count in zip(ingredients, ingredient_counts.tolist()):
+        for word in SPELLING_WORD_PATTERN.findall(ingredient.lower()):
+            frequencies[word] += count
+    for token, count in tokens.items():
+        for word in SPELLING_WORD_PATTERN.findall(token):
+            frequencies[word] += count
+    return dict(frequencies.most_common())
+
+def write_json(data: Any, path: Path) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+
+def write_search_bundle(df: pd.DataFrame, dataset_path: str) -> Path:
+    """
+    Write the search bundle of a dataset: precomputed artifacts the application loads instead of computing them from
+    the recipes at each run. The bundle is a folder next to the dataset with:
+        - ingredients.json: the ingredient vocabulary and the number of occurrences of each ingredient
+        - ner_ids.npy, ner_offsets.npy: the ingredient lists of the recipes as vocabulary IDs (see `encode_ner`)
+        - ingredient_offsets.npy, ingredient_postings.npy: the row positions of the recipes of each ingredient
+        - filters.json: the options of the filters (see `filter_options`)
+        - spelling.json: the word frequencies of the spellcheck dictionary (see `spelling_frequencies`)
+        - manifest.json: the version of the bundle and the fingerprint of the dataset it was built from, written last
+
+    Args:
+        df (pd.DataFrame): the recipes, in the order of the dataset file
+        dataset_path (str): path of the parquet dataset, already written
+
+    Returns:
+        Path: folder of the bundle
+    """
+    bundle_dir = search_bundle_dir(dataset_path)
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+    # A bundle without manifest is never read, so an interrupted write cannot be mistaken for a complete one
+    (bundle_dir / 'manifest.json').unlink(missing_ok=True)
+
+    ingredients, ingredient_counts, ner_ids, ner_offsets = encode_ner(df['NER'])
+    offsets, postings = ingredient_postings(ner_ids, ner_offsets, len(ingredients))
+    # The title tokens only weigh the title words in the spellcheck dictionary: the app builds its title and
+    # relevance indexes from the titles of the dataset
+    tokens = title_tokens(df['title'])
+    write_json({'terms': ingredients, 'counts': ingredient_counts.tolist()}, bundle_dir / 'ingredients.json')
+    np.save(bundle_dir / 'ner_ids.npy', ner_ids)
+    np.save(bundle_dir / 'ner_offsets.npy', ner_offsets)
+    np.save(bundle_dir / 'ingredient_offsets.npy', offsets)
+    np.save(bundle_dir / 'ingredient_postings.npy', postings)
+    write_json(filter_options(df), bundle_dir / 'filters.json')
+    write_json(spelling_frequencies(ingredients, ingredient_counts, tokens), bundle_dir / 'spelling.json')
+    write_json({
+        'version': SEARCH_BUNDLE_VERSION,
+        'dataset': Path(dataset_path).name,
+        'dataset_sha256': file_digest(dataset_path),
+        'n_recipes': len(df),
+        'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+    }, bundle_dir / 'manifest.json')
+    return bundle_dir
@@ -0,0 +1,37 @@
+import data_cleaning
+from checkpoints import *
+import pandas as pd
+
+
+def test_file_digest(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('title,NER\n')
+    assert file_digest(path) == file_digest(path)
+    assert len(file_digest(path)) == 64
+    assert stage_key(data_cleaning.merge_datasets, [path]) == stage_key(data_cleaning.merge_datasets, [file_digest(path)])
+
+def test_code_version(monkeypatch):
+    preprocessing_version = code_version(data_cleaning.data_preprocessing)
+    merge_version = code_version(data_cleaning.merge_datasets)
+    assert code_version(data_cleaning.data_preprocessing) == preprocessing_version  #Versions are stable
+    # Changing the categorizer only changes the version of the stages that use it
+    monkeypatch.setitem(data_cleaning.CATEGORY_PATTERNS, 'Pie', r'pie|tart')
+    assert code_version(data_cleaning.data_preprocessing) != preprocessing_version
+    assert code_version(data_cleaning.merge_datasets) == merge_version
+
+def test_run_stage(tmp_path):
+    calls = []
+    def stage(df):
+        calls.append(1)
+        return df.assign(NER=df['NER'].map(lambda x: x + ['salt']))
+
+    df = pd.DataFrame({'title': ['Lemon Tart'], 'NER': [['lemon']]})
+    result, key = run_stage(stage, (df,), ['input'], tmp_path)
+    cached_result, cached_key = run_stage(stage, (df,), ['input'], tmp_path)
+    assert len(calls) == 1  #The second run reads the checkpoint
+    assert key == cached_key
+    assert cached_result.equals(result)
+    assert cached_result['NER'][0] == ['lemon', 'salt']  #List columns are read back as lists
+    _, other_key = run_stage(stage, (df,), ['other input'], tmp_path)
+    assert len(calls) == 2 and other_key != key
+    assert run_stage(stage, (df,), ['input'])[1] is None  #No checkpoint folder: the stage always runs
@@ -7,6 +7,13 @@ def test_iso_to_minutes():
     assert iso_to_minutes('PT45M') == 45
     assert iso_to_minutes('PT2H') == 120
     assert iso_to_minutes('PT0M') == 0
+    assert iso_to_minutes('P1DT2H') == 1560
+    assert iso_to_minutes('PT1M30S') == 2
+    assert iso_to_minutes('PT30S') == 1 # rounded half up, not to the even 0
+    assert iso_to_minutes('PT10S') == 1 # a duration under a minute is not a zero duration
+    assert iso_to_minutes('PT150S') == 3
+    assert iso_to_minutes('PT2.5M') == 3 # fractions of any component
+    assert iso_to_minutes('PT1,5H') == 90
 
 def test_categorize_duration():
     assert categorize_duration(20) == '< 30min'
@@ -17,6 +24,17 @@ def test_format_duration():
     assert format_duration('PT1H30M') == '1 h 30 min'
     assert format_duration('PT45M') == '45 min'
     assert format_duration('PT2H') == '2 h'
+    assert format_duration('P1DT30M15S') == '1 d 30 min 15 s'
+    assert format_duration('PT2.5M') == '2.5 min'
+
+def test_parse_durations():
+    durations = pd.Series(['PT1H30M', 'PT45M', 'PT2H', 'PT0M', 'P1DT2H', 'P1W', 'PT1M30S', 'PT30S', 'PT150S', 'PT2.5M'])
+    result = parse_durations(durations)
+    assert list(result['total_minutes']) == [iso_to_minutes(d) for d in durations]
+    assert list(result['total_minutes'][-3:]) == [1, 3, 3]
+    assert list(result['formatted']) == [format_duration(d) for d in durations]
+    assert list(result['days']) == [0, 0, 0, 0, 1, 7, 0, 0, 0, 0]
+    assert list(result['seconds']) == [0, 0, 0, 0, 0, 0, 30, 30, 150, 0]
 
 def test_assign_category():
     row = pd.Series({
@@ -32,19 +50,269 @@ def test_assign_category():
         'title': 'Biryani'
     })
     assert assign_category(row) == 'Main Course'
+
+def test_assign_categories():
+    df = pd.DataFrame({
+        'RecipeCategory': ['Tarts', 'Chicken', None, 'Misc', 'Misc'],
+        'Keywords': [['Dessert', 'Lemon'], ['Meat', 'Indian'], ['Drinks'], None, ['Oven']],
+        'title': ['Lemon Tart', 'Biryani', 'Iced Coffee', 'Sweet Potato Pie', 'Mystery Dish'],
+    })
+    categories = assign_categories(df)
+    assert list(categories) == ['Dessert', 'Main Course', 'Beverages', 'Main Course', 'Other']  #'Main Course' has priority over 'Dessert'
+    assert list(categories) == [assign_category(row) for _, row in df.iterrows()]
+    # New categories are added to the pattern table
+    patterns = {**CATEGORY_PATTERNS, 'Pie': r'pie|tart'}
+    assert list(assign_categories(df, patterns)) == ['Pie', 'Main Course', 'Beverages', 'Main Course', 'Other']
+    assert list(assign_categories(df, {'Pie': r'pie|tart', **CATEGORY_PATTERNS})) == ['Pie', 'Main Course', 'Beverages', 'Pie', 'Other']
     
 def test_to_singular():
     assert to_singular(['apples', 'bananas', 'berries']) == ['apple', 'banana', 'berry']
 
+def test_build_singular_map(tmp_path, monkeypatch):
+    singular_nouns = build_singular_map({'apples', 'bananas', 'berries'}, cache_dir=tmp_path)
+    assert singular_nouns == {'apples': 'apple', 'bananas': 'banana', 'berries': 'berry'}
+    assert (tmp_path / SINGULAR_NOUNS_CACHE_NAME).exists()
+    # Cached terms are reused and only the new terms are converted, in worker processes for large vocabularies
+    monkeypatch.setattr('data_cleaning.PARALLEL_SINGULAR_MIN_TERMS', 2)
+    singular_nouns = build_singular_map({'apples', 'eggs', 'onions'}, cache_dir=tmp_path, n_jobs=2)
+    assert singular_nouns == {'apples': 'apple', 'bananas': 'banana', 'berries': 'berry', 'eggs': 'egg', 'onions': 'onion'}
+    assert build_singular_map(set(), cache_dir=tmp_path) == singular_nouns
+
+def test_singularize_column():
+    ingredients = pd.Series([['apples', 'eggs'], ['eggs'], None])
+    result = singularize_column(ingredients, build_singular_map({'apples', 'eggs'}))
+    assert list(result[:2]) == [to_singular(['apples', 'eggs']), ['egg']]
+    assert result[2] is None
+
 def test_is_non_vegetarian():
     assert is_non_vegetarian(['chicken', 'broccoli', 'potato']) == True
     assert is_non_vegetarian(['carrot', 'onion', 'tomato', 'egg']) == False
 
+def test_keyword_automaton():
+    automaton = KeywordAutomaton({'he': 1, 'she': 2, 'his': 4, 'hers': 8})
+    assert automaton.search('ushers') == 1 | 2 | 8  #Overlapping keywords are all found
+    assert automaton.search('this') == 4
+    assert automaton.search('abc') == 0
+    # Keywords of words only match whole words, and the longest keyword ending at a word hides the shorter ones
+    automaton = KeywordAutomaton({('milk',): 1, ('coconut', 'milk'): 0, ('almond',): 2, ('almond', 'milk'): 2}, longest_match=True)
+    assert automaton.search(keyword_words('2 c. Milk')) == 1
+    assert automaton.search(keyword_words('1 can coconut milk')) == 0
+    assert automaton.search(keyword_words('almond milk')) == 2
+    assert automaton.search(keyword_words('milky way')) == 0
+    automaton = KeywordAutomaton({('cream',): 1, ('cream', 'of', 'tartar'): 0, ('of',): 2}, longest_match=True)
+    assert automaton.search(keyword_words('cream of tartar')) == 0 # also ignores the keywords it starts with
+    assert automaton.search(keyword_words('cream of mushroom')) == 1 | 2
+
+def test_classify_diets():
+    ingredients = pd.Series([
+        ['1 c. flour', '2 eggs', '1 c. milk'],
+        ['2 carrots', '1 Tbsp. olive oil'],
+        ['1 lb. chicken', '1/2 c. peanuts'],
+        [],
+    ])
+    diets = classify_diets(ingredients)
+    assert list(diets.columns) == ['Vegetarian_Friendly', 'Vegan_Friendly', 'Gluten_Free', 'Dairy_Free', 'Nut_Free']
+    assert diets.iloc[0].to_dict() == {'Vegetarian_Friendly': True, 'Vegan_Friendly': False, 'Gluten_Free': False, 'Dairy_Free': False, 'Nut_Free': True}
+    assert diets.iloc[1].all() and diets.iloc[3].all()
+    assert diets.iloc[2].to_dict() == {'Vegetarian_Friendly': False, 'Vegan_Friendly': False, 'Gluten_Free': True, 'Dairy_Free': True, 'Nut_Free': False}
+    assert list(diets['Vegetarian_Friendly']) == [not is_non_vegetarian(x) for x in ingredients]
+
+@pytest.mark.parametrize('ingredient, diet, expected', [
+    ('1/2 c. chopped nuts', 'Nut_Free', False),
+    ('1 c. mixed nuts', 'Nut_Free', False),
+    ('nuts', 'Nut_Free', False),
+    ('1 tsp. nutmeg', 'Nut_Free', True),
+    ('1 c. shredded coconut', 'Nut_Free', True),
+    ('1 butternut squash', 'Nut_Free', True),
+    ('6 doughnuts', 'Nut_Free', True),
+    ('1 eggplant', 'Vegan_Friendly', True),
+    ('2 eggs', 'Vegan_Friendly', False),
+    ('1 butternut squash', 'Dairy_Free', True),
+    ('1 c. grated gruyere', 'Gluten_Free', True),
+    ('1 c. rye flour', 'Gluten_Free', False),
+    ('1 can coconut milk', 'Dairy_Free', True),
+    ('2 c. almond milk', 'Dairy_Free', True),
+    ('2 c. almond milk', 'Nut_Free', False),
+    ('1 c. buttermilk', 'Dairy_Free', False),
+    ('1 c. half-and-half', 'Dairy_Free', False),
+    ('2 Tbsp. lard', 'Vegetarian_Friendly', False),
+    ('1 c. suet', 'Vegetarian_Friendly', False),
+    ('1 envelope gelatin', 'Vegetarian_Friendly', False),
+    ('4 hamburger buns', 'Gluten_Free', False),
+    ('4 hamburger buns', 'Vegetarian_Friendly', True),
+    ('6 dinner rolls', 'Gluten_Free', False),
+    ('1 pkg. frozen bread dough', 'Gluten_Free', False),
+    ('1 c. croutons', 'Gluten_Free', False),
+    ('1 c. crushed pretzels', 'Gluten_Free', False),
+    ('2 bagels', 'Gluten_Free', False),
+    ('4 pita', 'Gluten_Free', False),
+    ('1 lb. phyllo', 'Gluten_Free', False),
+    ('24 wonton wrappers', 'Gluten_Free', False),
+    ('1 box stuffing mix', 'Gluten_Free', False),
+    ('1 1/2 c. graham cracker crumbs', 'Gluten_Free', False),
+    ('1 tsp. cream of tartar', 'Dairy_Free', True),
+    ('1/2 c. cream', 'Dairy_Free', False),
+    ('1 c. chestnuts', 'Nut_Free', False),
+    ('1 can water chestnuts', 'Nut_Free', True),
+])
+def test_classify_diets_whole_words(ingredient, diet, expected):
+    assert classify_diets(pd.Series([[ingredient]]))[diet].iloc[0] == expected
+
 def test_find_world_cuisine():
     assert find_world_cuisine(['Vegetable', 'Mexican', '< 30 Mins']) == 'Mexican'
     assert find_world_cuisine(['Asian', 'Spicy', 'Indian']) == 'Asian'
     assert find_world_cuisine(['Bevrages', 'Fruit', 'Healthy']) == 'Unknown'
 
+def test_normalize_titles():
+    titles = pd.Series(['Lemon Tart', '  lemon   TART ', 'Biryani'])
+    assert list(normalize_titles(titles)) == ['lemon tart', 'lemon tart', 'biryani']
+
+def test_parse_list_column():
+    lists, slow_rows = parse_list_column(pd.Series(['["apples", "sugar"]', '[]', None]))
+    assert lists.type == pa.list_(pa.string())
+    assert lists.to_pylist() == [['apples', 'sugar'], [], None]
+    assert slow_rows == 0
+
+    lists, slow_rows = parse_list_column(pd.Series(['["apples"]', "['it\\'s', 'odd']", '["eggs"]']))
+    assert lists.to_pylist() == [['apples'], ["it's", 'odd'], ['eggs']]
+    assert slow_rows == 1  #Only the single-quoted row needs literal_eval
+
+
+### Tests for dataset loading functions ###
+def test_load_measurements_data(tmp_path):
+    csv_path = tmp_path / 'measurements.csv'
+    pd.DataFrame({
+        'title': ['Lemon Tart', 'Lemon Tart', 'Biryani', 'Pancakes', 'Biryani'],
+        'ingredients': ['["lemon", "flour"]', '["lemon", "flour"]', '["rice"]', None, '["rice"]'],
+        'directions': ['["Bake."]', '["Bake."]', '["Cook."]', '["Fry."]', '["Cook."]'],
+        'link': ['a.com', 'a.com', 'b.com', 'c.com', 'b.com'],
+        'source': ['Gathered'] * 5,
+        'NER': ['["lemon", "flour"]', '["lemon", "flour"]', '["rice"]', '["egg"]', '["rice"]'],
+    }).to_csv(csv_path)
+
+    df = load_measurements_data(csv_path)
+    assert list(df.columns) == ['title', 'ingredients', 'directions', 'link', 'NER']  #Only the needed columns are kept
+    assert list(df['title']) == ['Lemon Tart', 'Biryani']  #Duplicates and rows with missing values are dropped
+    assert df['NER'][0] == ['lemon', 'flour']  #List columns are parsed
+    # Batches should not change the result, even when duplicates are spread over several batches
+    for batch_size in [1, 2, 3]:
+        assert load_measurements_data(csv_path, batch_size=batch_size).equals(df)
+    # Only the recipes with a known title are kept
+    df = load_measurements_data(csv_path, titles={'biryani'})
+    assert list(df['title']) == ['Biryani']
+
+
+def test_load_measurements_data_hash_collisions(tmp_path, monkeypatch):
+    csv_path = tmp_path / 'measurements.csv'
+    pd.DataFrame({
+        'title': ['Lemon Tart', 'Biryani', 'Lemon Tart', 'Pancakes'],
+        'ingredients': ['["lemon"]', '["rice"]', '["lemon"]', '["egg"]'],
+        'directions': ['["Bake."]', '["Cook."]', '["Bake."]', '["Fry."]'],
+        'link': ['a.com', 'b.com', 'a.com', 'c.com'],
+        'NER': ['["lemon"]', '["rice"]', '["lemon"]', '["egg"]'],
+    }).to_csv(csv_path)
+    # Every row gets the same first hash: the distinct recipes must still be kept, the duplicate still dropped
+    hash_pandas_object = pd.util.hash_pandas_object
+    def colliding_hash(df, index=False, hash_key=DEDUPLICATION_HASH_KEYS[0]):
+        if hash_key == DEDUPLICATION_HASH_KEYS[0]:
+            return pd.Series(np.zeros(len(df), dtype=np.uint64))
+        return hash_pandas_object(df, index=index, hash_key=hash_key)
+    monkeypatch.setattr(pd.util, 'hash_pandas_object', colliding_hash)
+    for batch_size in [1, 4]:
+        df = load_measurements_data(csv_path, batch_size=batch_size)
+        assert list(df['title']) == ['Lemon Tart', 'Biryani', 'Pancakes']
+
+
+### Tests for processing functions ###
+def make_merged_df(n_copies: int = 1) -> pd.DataFrame:
+    recipes = pd.DataFrame({
+        'title': ['Lemon Tart', 'Chicken Biryani', 'Iced Coffee', 'Mystery Dish'],
+        'RecipeCategory': ['Tarts', 'Chicken', 'Beverages', 'Misc'],
+        'Keywords': [['Dessert', 'Easy'], ['Meat', 'Indian'], ['Mexican', 'Easy'], ['Weird']],
+        'CookTime': ['PT30M', 'PT1H', 'PT0M', 'PT5M'],
+        'PrepTime': ['PT20M', 'PT30M', 'PT5M', 'PT5M'],
+        'TotalTime': ['PT50M', 'PT1H30M', 'PT5M', 'PT10M'],
+        'ingredients': [['2 lemons', '1 c. flour'], ['1 chicken', '2 c. rice'], ['1 c. coffee'], ['1 thing']],
+        'NER': [['lemons', 'flour'], ['chicken', 'rice'], ['coffee'], ['things']],
+    })
+    recipes = pd.concat([recipes] * n_copies, ignore_index=True)
+    recipes['title'] = recipes['title'] + ' ' + recipes.index.astype(str)
+    return recipes
+
+def test_data_preprocessing():
+    df = data_preprocessing(make_merged_df())
+    assert list(df['RecipeType']) == ['Dessert', 'Main Course', 'Beverages']  #'Other' recipes are dropped
+    assert list(df['Vegetarian_Friendly']) == [True, False, True]
+    assert list(df['World_Cuisine']) == ['Unknown', 'Indian', 'Mexican']
+    assert df['NER'][0] == ['lemon', 'flour']
+    assert list(df['TotalTime']) == ['50 min', '1 h 30 min', '5 min']
+
+def test_data_preprocessing_parallel():
+    df = make_merged_df(n_copies=5)
+    # The sharded execution should give exactly the same DataFrame as the serial one
+    pd.testing.assert_frame_equal(data_preprocessing(df, n_jobs=3), data_preprocessing(df))
+
+
+def test_sample_quotas():
+    type_counts = pd.Series({'Beverages': 5000, 'Breakfast': 1000, 'Dessert': 8000, 'Main Course': 9000})
+    assert sample_quotas(type_counts).to_dict() == {'Beverages': 1500, 'Breakfast': 1000, 'Dessert': 3200, 'Main Course': 4000}  #Capped by the available recipes
+    assert sample_quotas(type_counts, size=1000, weights='proportional').sum() == 1000  #Rounding keeps the total
+    assert sample_quotas(type_counts, size='all').equals(type_counts)
+    assert sample_quotas(type_counts, quotas={'Dessert': 10}).to_dict() == {'Beverages': 0, 'Breakfast': 0, 'Dessert': 10, 'Main Course': 0}
+
+
+def test_sample_recipes():
+    df = pd.DataFrame({
+        'RecipeType': ['Dessert'] * 6 + ['Beverages'] * 4,
+        'World_Cuisine': ['Asian', 'Unknown', 'Unknown', 'Mexican', 'Unknown', 'Unknown', 'Unknown', 'Asian', 'Unknown', 'Unknown'],
+        'title': [f'Recipe {i}' for i in range(10)],
+    })
+    sampled = sample_recipes(df, quotas={'Dessert': 3, 'Beverages': 1})
+    assert sampled['RecipeType'].value_counts().to_dict() == {'Dessert': 3, 'Beverages': 1}
+    assert {'Recipe 0', 'Recipe 3', 'Recipe 7'} <= set(sampled['title'])  #Known cuisines are sampled first
+    assert sample_recipes(df, size='all')['title'].sort_values().tolist() == df['title'].tolist()
+    pd.testing.assert_frame_equal(sample_recipes(df, size=5), sample_recipes(df, size=5))  #Sampling is reproducible
+
+
+def test_enforce_schema():
+    df = pd.DataFrame({
+        'title': ['Apple Pie', 'Lemonade'],
+        'RecipeType': ['Dessert', 'Beverages'],
+        'Calories': [350.5, 120.0],
+        'RecipeServings': [8, 4],
+        'NER': [['apple', 'flour'], ['lemon']],
+    })
+    result = enforce_schema(df)
+    assert isinstance(result['RecipeType'].dtype, pd.CategoricalDtype)
+    assert result['title'].dtype == 'string[pyarrow]'
+    assert result['Calories'].dtype == np.float32 and result['RecipeServings'].dtype == np.int16
+    assert result['NER'].equals(df['NER'])  #List columns are unchanged
+    assert memory_mb(result) < memory_mb(df)
+    with pytest.raises(ValueError):
+        enforce_schema(df.assign(RecipeServings=[8, 40_000]))  #Out of the int16 range
+
+
+def test_write_recipes(tmp_path):
+    df = sort_recipes(pd.DataFrame({
+        'title': [f'Recipe {i}' for i in range(10)],
+        'AggregatedRating': [3.0, 5.0, 4.5, 4.0, 5.0, 2.0, 4.5, 1.0, 3.5, 5.0],
+        'ReviewCount': [1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+        'RecipeType': ['Dessert', 'Beverages'] * 5,
+        'NER': [['egg', 'sugar']] * 10,
+    }))
+    assert df['title'].head(3).tolist() == ['Recipe 9', 'Recipe 4', 'Recipe 1']  #Best rated first, then most reviewed
+    write_recipes(df, tmp_path / 'recipes.parquet', row_group_size=4)
+
+    metadata = pq.ParquetFile(tmp_path / 'recipes.parquet').metadata
+    assert metadata.num_row_groups == 3
+    assert metadata.row_group(0).sorting_columns[0].descending
+    assert metadata.row_group(0).column(1).statistics.min == 4.5  #Ratings of the first row group
+    df_read = pd.read_parquet(tmp_path / 'recipes.parquet')
+    assert isinstance(df_read['RecipeType'].dtype, pd.CategoricalDtype)
+    assert df_read['title'].tolist() == df['title'].tolist()
+    # Filters skip the row groups whose statistics cannot match
+    assert len(pd.read_parquet(tmp_path / 'recipes.parquet', filters=[('AggregatedRating', '>=', 4.5)])) == 5
+
 
 ### Test main function ###
 def test_main():
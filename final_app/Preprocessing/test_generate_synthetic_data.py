@@ -0,0 +1,30 @@
+import json
+from generate_synthetic_data import *
+from data_cleaning import main
+import pandas as pd
+
+
+def test_generate_datasets(tmp_path):
+    generate_datasets(tmp_path, 2_000, overlap=0.5, batch_size=700)
+    df_nutrition = pd.read_parquet(tmp_path / 'recipes.parquet')
+    df_measurements = pd.read_csv(tmp_path / 'recipes_data.csv', index_col=0)
+
+    assert len(df_nutrition) == 500 and len(df_measurements) == 2_000
+    assert df_measurements.index.is_unique  #The batches should not restart the row numbers
+    assert list(df_measurements.columns) == ['title', 'ingredients', 'directions', 'link', 'source', 'NER']
+    assert df_nutrition['TotalTime'].str.fullmatch(r'PT(\d+H)?(\d+M)?').all()  #ISO 8601 durations
+    assert all(isinstance(json.loads(x), list) for x in df_measurements['NER'])  #List columns are stringified lists
+
+    # Half of the nutrition recipes are in the measurements dataset, with the same first instruction
+    shared = df_nutrition.merge(df_measurements, left_on='Name', right_on='title')
+    assert len(shared) == 250
+    assert (shared['RecipeInstructions'].str[0] == shared['directions'].map(lambda x: json.loads(x)[0])).all()
+
+
+def test_main_on_synthetic_data(tmp_path):
+    generate_datasets(tmp_path, 4_000)
+    df = main(tmp_path / 'recipes.parquet', tmp_path / 'recipes_data.csv')
+
+    assert 0 < len(df) <= 10000
+    assert set(df['RecipeType']).issubset(['Breakfast', 'Main Course', 'Dessert', 'Beverages'])
+    assert not df.isnull().any().any()
@@ -0,0 +1,27 @@
+import pytest
+import json
+from profiling import *
+
+
+def test_pipeline_profiler(tmp_path):
+    profiler = PipelineProfiler(trace_memory=True)
+    with profiler.stage('allocate', rows_in=10) as stage:
+        data = [0] * 1_000_000
+        stage['rows_out'] = 5
+    with profiler.stage('sleep') as stage:
+        time.sleep(0.05)
+
+    report = profiler.to_frame()
+    assert list(report.index) == ['allocate', 'sleep', 'total']
+    assert report.loc['allocate', 'rows_in'] == 10 and report.loc['allocate', 'rows_out'] == 5
+    assert report.loc['sleep', 'wall_s'] >= 0.05
+    assert report.loc['sleep', 'cpu_s'] < report.loc['sleep', 'wall_s']  #Sleeping does not use CPU time
+    assert report.loc['allocate', 'peak_traced_mb'] > 7  #The list holds 8 MB of pointers
+    assert report.loc['total', 'wall_s'] == pytest.approx(report.loc[['allocate', 'sleep'], 'wall_s'].sum())
+    assert (report['peak_rss_mb'] > 0).all()
+
+    profiler.write_json(tmp_path / 'report.json', dataset='test')
+    with open(tmp_path / 'report.json') as f:
+        saved = json.load(f)
+    assert saved['dataset'] == 'test'
+    assert [stage['stage'] for stage in saved['stages']] == ['allocate', 'sleep']
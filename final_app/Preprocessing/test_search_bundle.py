@@ -0,0 +1,50 @@
+import json
+from search_bundle import *
+import numpy as np
+import pandas as pd
+
+
+def make_recipes() -> pd.DataFrame:
+    return pd.DataFrame({
+        'title': ['Tomato Soup', 'Chicken Tomato Stew', "Mom's Apple Pie"],
+        'NER': [['tomato', 'salt', 'tomato'], ['chicken', 'tomato'], ['apple', 'flour', 'salt']],
+        'RecipeType': ['Main Course', 'Main Course', 'Dessert'],
+        'TotalTime_minutes': [30, 90, 60],
+        'Vegetarian_Friendly': [True, False, True],
+    })
+
+
+def test_encode_ner():
+    terms, counts, ids, offsets = encode_ner(make_recipes()['NER'])
+    assert terms == ['tomato', 'salt', 'chicken', 'apple', 'flour']  #By frequency, ties in order of first occurrence
+    assert counts.tolist() == [3, 2, 1, 1, 1]
+    assert ids.dtype == np.int32 and ids.tolist() == [0, 1, 0, 2, 0, 3, 4, 1]
+    assert offsets.tolist() == [0, 3, 5, 8]
+
+
+def test_ingredient_postings():
+    terms, counts, ids, ner_offsets = encode_ner(make_recipes()['NER'])
+    offsets, postings = ingredient_postings(ids, ner_offsets, len(terms))
+    assert postings[offsets[0]:offsets[1]].tolist() == [0, 1]  #Recipes listing an ingredient twice appear once
+    assert postings[offsets[1]:offsets[2]].tolist() == [0, 2]
+    assert offsets[-1] == len(postings) == 7
+
+
+def test_write_search_bundle(tmp_path):
+    df = make_recipes()
+    df.to_parquet(tmp_path / 'recipes.parquet')
+    bundle_dir = write_search_bundle(df, tmp_path / 'recipes.parquet')
+
+    assert bundle_dir == tmp_path / 'recipes.search'
+    with open(bundle_dir / 'manifest.json') as f:
+        manifest = json.load(f)
+    assert manifest['version'] == SEARCH_BUNDLE_VERSION and manifest['n_recipes'] == 3
+    assert manifest['dataset_sha256'] == file_digest(tmp_path / 'recipes.parquet')
+    assert not (bundle_dir / 'title_tokens.json').exists()  #The title tokens are only in the spellcheck dictionary
+    with open(bundle_dir / 'filters.json') as f:
+        assert json.load(f) == {
+            'RecipeType': ['Dessert', 'Main Course'], 'TotalTime_minutes': [30, 60, 90], 'flags': ['Vegetarian_Friendly']
+        }
+    with open(bundle_dir / 'spelling.json') as f:
+        spelling = json.load(f)
+    assert spelling['tomato'] == 5 and spelling["mom's"] == 1  #3 ingredient occurrences and 2 title occurrences
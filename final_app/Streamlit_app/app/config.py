@@ -1,4 +1,5 @@
 import os
 
 BASE_DIR = (os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+DATA_DIR = os.path.join(BASE_DIR, 'Data')
 SAMPLE_RECIPE_PATH = os.path.join(BASE_DIR, 'Data/sample_recipes_10k.parquet')
\ No newline at end of file
@@ -3,28 +3,99 @@
 
 import streamlit as st
 import pandas as pd
-from app.config import SAMPLE_RECIPE_PATH
-from utils.functions import split_frame, search_recipes, handle_recipe_click, initialize_session_state, query_error, clean_query
+from app.config import SAMPLE_RECIPE_PATH, DATA_DIR
+from utils.functions import page_count, page_window, handle_recipe_click, initialize_session_state, query_error, clean_query, load_singular_nouns, load_recipes, RecipeIndex, title_search_rows
+from utils.search_bundle_loader import load_search_bundle
+from utils.ingredient_store import IngredientStore
+from utils.ingredient_index import IngredientBitmapIndex
+from utils.fridge_ranking import RecipeIngredientMatrix, rank_by_fridge
+from utils.title_index import TitleIndex
+from utils.bm25 import BM25Index
+from utils.spell_correction import SpellCorrector
 from streamlit_extras.add_vertical_space import add_vertical_space
-from collections import Counter
 from typing import Any
-import string
 import numpy as np
-from spellchecker import SpellChecker
 
 # configuration parameters
 st.set_page_config(layout="wide", page_title ='Recipe Finder', initial_sidebar_state='collapsed')
+@st.cache_resource
+def get_search_bundle(dataset_path: str):
+    return load_search_bundle(dataset_path)
+
+@st.cache_resource
+def get_ingredient_store(dataset_path: str) -> IngredientStore:
+    search_bundle = get_search_bundle(dataset_path)
+    if search_bundle is not None:
+        return IngredientStore.from_bundle(search_bundle)
+    return IngredientStore.from_lists(pd.read_parquet(dataset_path, columns=['NER'])['NER'])
+
+@st.cache_resource
+def get_ingredient_index(dataset_path: str) -> IngredientBitmapIndex:
+    search_bundle = get_search_bundle(dataset_path)
+    if search_bundle is not None:
+        return IngredientBitmapIndex.from_bundle(search_bundle)
+    return IngredientBitmapIndex.from_store(get_ingredient_store(dataset_path))
+
+@st.cache_resource
+def get_recipe_matrix(dataset_path: str) -> RecipeIngredientMatrix:
+    return RecipeIngredientMatrix(get_ingredient_store(dataset_path))
+
+# the title and relevance indexes are built from the titles of the dataset once per process, the search bundle doesn't
+# store them
+@st.cache_resource
+def get_title_index(dataset_path: str) -> TitleIndex:
+    return TitleIndex(load_recipes(dataset_path, exclude_columns=('NER',))['title'])
+
+@st.cache_resource
+def get_relevance_index(dataset_path: str) -> BM25Index:
+    return BM25Index.from_df(load_recipes(dataset_path, exclude_columns=('NER',)))
+
+@st.cache_resource
+def get_spell_corrector(dataset_path: str) -> SpellCorrector:
+    search_bundle = get_search_bundle(dataset_path)
+    if search_bundle is not None:
+        return SpellCorrector(search_bundle.spelling)
+    # words of the ingredients weighted by the number of recipes listing them, and words of the titles
+    store, titles = get_ingredient_store(dataset_path), get_title_index(dataset_path)
+    ingredient_counts = np.bincount(store.ids, minlength=len(store.vocabulary))
+    return SpellCorrector(dict(zip(store.vocabulary, ingredient_counts.tolist())),
+                          dict(zip(titles.terms, titles.counts.tolist())))
+
+@st.cache_resource
+def get_recipe_index(dataset_path: str, dict_columns: dict[str, str]) -> RecipeIndex:
+    return RecipeIndex(load_recipes(dataset_path, exclude_columns=('NER',)), dict_columns, get_ingredient_index(dataset_path))
+
+# precomputed search artifacts written by the preprocessing script (None if missing or built from another dataset)
+search_bundle = get_search_bundle(SAMPLE_RECIPE_PATH)
+# ingredient lists of the recipes, dictionary-encoded (the NER column of lists is not loaded)
+ingredient_store = get_ingredient_store(SAMPLE_RECIPE_PATH)
+# ingredient -> recipes bitmaps, for the ingredient filters
+ingredient_index = get_ingredient_index(SAMPLE_RECIPE_PATH)
+# recipe x ingredient matrix, to rank the recipes by the contents of the fridge
+recipe_matrix = get_recipe_matrix(SAMPLE_RECIPE_PATH)
 # import of the cleaned and formated dataset of 10k recipes :
-df = pd.read_parquet(SAMPLE_RECIPE_PATH)
+df = load_recipes(SAMPLE_RECIPE_PATH, exclude_columns=('NER',))
+# words of the titles -> recipes, for the title search
+title_index = get_title_index(SAMPLE_RECIPE_PATH)
+# relevance of the recipes to the title search (title, description and keywords), ties broken by rating
+relevance_index = get_relevance_index(SAMPLE_RECIPE_PATH)
+ratings = np.nan_to_num(df['AggregatedRating'].to_numpy(dtype=np.float64), nan=0)
+# spell correction of the query with the words of the recipes
+spell_corrector = get_spell_corrector(SAMPLE_RECIPE_PATH)
 
 ####################################### FILTERS INITIALIZATION #############################################
 
-counter_ingredients: Counter[str] = Counter(x for row in df['NER'] for x in row)
-ingredient_list: set[str] = {item[0] for item in counter_ingredients.most_common()} # ingredients sorted by frequency
 recipe_durations_cat: list = ['< 30min', '< 1h', '> 1h']
-recipe_durations_min: set[float] = {x for x in sorted(set(df['TotalTime_minutes'])) if pd.notna(x)}
-recipe_types: set = {x for x in sorted(set(df['RecipeType'])) if pd.notna(x)}
-provenance: set = {x for x in sorted(set(df['World_Cuisine'])) if pd.notna(x)}
+if search_bundle is not None:
+    ingredient_list: set[str] = set(search_bundle.ingredients)
+    recipe_durations_min: set[float] = set(search_bundle.filter_options['TotalTime_minutes'])
+    recipe_types: set = set(search_bundle.filter_options['RecipeType'])
+    provenance: set = set(search_bundle.filter_options['World_Cuisine'])
+else:
+    ingredient_list: set[str] = set(ingredient_store.vocabulary)
+    recipe_durations_min: set[float] = {x for x in sorted(set(df['TotalTime_minutes'])) if pd.notna(x)}
+    recipe_types: set = {x for x in sorted(set(df['RecipeType'])) if pd.notna(x)}
+    provenance: set = {x for x in sorted(set(df['World_Cuisine'])) if pd.notna(x)}
 
 filter_columns: dict[str, str] = {
     'ingredients': 'NER',
@@ -32,11 +103,26 @@ filter_columns: dict[str, str] = {
     'recipe_durations_min': 'TotalTime_minutes',
     'recipe_types': 'RecipeType',
     'vegetarian': 'Vegetarian_Friendly',
+    'vegan': 'Vegan_Friendly',
+    'gluten_free': 'Gluten_Free',
+    'dairy_free': 'Dairy_Free',
+    'nut_free': 'Nut_Free',
     'beginner': 'Beginner_Friendly',
     'provenance' : 'World_Cuisine'
 }
+# diet filters available in the dataset (datasets built before the diet flags only have the vegetarian one)
+diet_labels: dict[str, str] = {'vegan': 'Vegan', 'gluten_free': 'Gluten-free', 'dairy_free': 'Dairy-free', 'nut_free': 'Nut-free'}
+diet_labels = {diet: label for diet, label in diet_labels.items() if filter_columns[diet] in df.columns}
+# search structures shared by all the sessions, with the cache of the last searches
+recipe_index = get_recipe_index(SAMPLE_RECIPE_PATH, filter_columns)
 filters: dict[str, Any] = {}
 research_summary = ''
+# orders of the results: relevance to the title search (by rating without title search) and the precomputed orders
+sort_labels: dict[str, str] = {'relevance': 'Relevance', 'rating': 'Best rated',
+                               'bayesian_rating': 'Best rated (weighted by the number of reviews)',
+                               'total_time': 'Quickest', 'calories': 'Fewest calories', 'protein': 'Most protein'}
+sort_labels = {order: label for order, label in sort_labels.items()
+               if order == 'relevance' or order in recipe_index.sort_permutations}
 
 ####################################### SESSION STATE INITIALIZATION ######################################
 initialize_session_state()
@@ -65,11 +151,10 @@ st.markdown(
 title_search_query = st.text_input("Search a recipe (by title or ingredient(s))", key="title_search_query")
 
 # clean query
-cleaned_query = clean_query(title_search_query)
+cleaned_query = clean_query(title_search_query, load_singular_nouns(DATA_DIR))
 
 # error handling
-rec: list = list(df['title'].apply(lambda x : x.lower()).values)
-query_error(cleaned_query.split(), ingredient_list, rec)
+query_error(cleaned_query.split(), ingredient_list, title_index, spell_corrector)
 
 with st.form("filter_form", clear_on_submit=False):
     st.write("Filters")
@@ -104,6 +189,12 @@ with st.form("filter_form", clear_on_submit=False):
     if vege:
         filters['vegetarian'] = vege
         research_summary += f' - vegetarian recipes only'
+
+    # Other diet filters
+    for diet, label in diet_labels.items():
+        if col5.toggle(f"{label} recipes ", value=False):
+            filters[diet] = True
+            research_summary += f' - {label.lower()} recipes only'
     
     # Beginner friendly filter
     beginner = col5.toggle("Beginner friendly recipes ", value=False)
@@ -111,34 +202,52 @@ with st.form("filter_form", clear_on_submit=False):
         filters['beginner'] = beginner
         research_summary += f' - beginner friendly recipes only'
 
+    # Fridge contents: the recipes are ranked by the share of their ingredients the user has
+    fridge = st.multiselect("What's in your fridge?", ingredient_store.vocabulary, default=None, key='fridge_widget')
+    if fridge:
+        research_summary += f' - fridge : *{", ".join(fridge)}*'
+
+    # Order of the results
+    sort_order = st.selectbox("Sort by", sort_labels, format_func=sort_labels.get, key='sort_widget')
+
     st.session_state.research_summary = research_summary
     st.session_state.filters = filters
     submitted = st.form_submit_button("Find a recipe")
 
-# Research recipes in the original dataframe according to the filters 
+# Research recipes in the original dataframe according to the filters, the results are kept as row positions of df
 if submitted:
-        df_search, total_nr_recipes = search_recipes(df, st.session_state.filters, filter_columns)
-        df_search = df_search.sort_values(by=['AggregatedRating'], ascending=False) # we sort by higher rated
-        st.session_state.search_df, st.session_state.total_recipes = df_search, total_nr_recipes
-        if len(df_search) == 0:
+        search_rows = recipe_index.sorted_rows(recipe_index.search_rows(st.session_state.filters),
+                                               'rating' if sort_order == 'relevance' else sort_order)
+        search_rates = None
+        if fridge:
+            # recipes matching the filters with a fridge item, from the best match, with their correspondance rate.
+            # All of them are sorted, not a top k: the title search filters this ranking on the following reruns and
+            # the pages can be browsed to the last one, without ranking again
+            candidates = np.zeros(len(df), dtype=bool)
+            candidates[search_rows] = True
+            ranking = rank_by_fridge(recipe_matrix, fridge, k=None, candidates=candidates)
+            search_rows, search_rates = ranking.index.to_numpy(), (ranking['recipe_coverage'] * 100).round(1).to_numpy()
+        st.session_state.search_rows, st.session_state.search_rates = search_rows, search_rates
+        st.session_state.total_recipes = len(search_rows)
+        if len(search_rows) == 0:
             st.write("No recipes found. Try adjusting your filters or your research.")
 
 # If no recipes found
-if st.session_state.search_df is None or st.session_state.search_df.empty or len(st.session_state.search_df)==0 :
+if st.session_state.search_rows is None or len(st.session_state.search_rows)==0 :
     st.write("No recipes found. Try adjusting your filters or your research.")
-# Filter the search_df (= the filtered df) by title search query if a query is entered
-if st.session_state.search_df is not None:
+# Filter the search results by title search query if a query is entered
+if st.session_state.search_rows is not None:
     research_summary = f"**Research summary :** {st.session_state.research_summary} \n"
     number_recipes = f"There are **{st.session_state.total_recipes}** recipes corresponding :\n"
+    search_rows, search_rates = st.session_state.search_rows, st.session_state.search_rates
     if title_search_query:
         research_summary += f', Title search : **{title_search_query}**'
-        st.session_state.search_df = st.session_state.search_df[
-            st.session_state.search_df['title'].str.contains(cleaned_query, case=False, na=False) |
-            st.session_state.search_df['NER'].apply(lambda x: all(word.lower() in [str(item).lower() for item in x] for word in cleaned_query.split()))
-            ]
-        
-    df_search = st.session_state.search_df
-    st.session_state.total_recipes = len(df_search)
+        # every matching recipe is kept, the most relevant first with the relevance order
+        search_rows, search_rates = title_search_rows(search_rows, search_rates, cleaned_query.split(), title_index,
+                                                      ingredient_index,
+                                                      relevance_index if sort_order == 'relevance' else None, ratings)
+
+    st.session_state.total_recipes = len(search_rows)
 
 # Display the results
     if st.session_state.total_recipes != 0 :
@@ -151,19 +260,21 @@ if st.session_state.search_df is not None:
     bottom_menu = st.columns((4,1,1))
     with bottom_menu[2]:
         batch_size = st.selectbox('Recipes per page', options=[10,25,50,100])
-        total_pages = int(len(df_search)/batch_size) if len(df_search)>batch_size else 1
+        total_pages = page_count(len(search_rows), batch_size)
     with bottom_menu[1]:
         current_page = st.number_input('Page', min_value=1, max_value=total_pages, step=1, key='page_input')
     with bottom_menu[0]:
         st.markdown(f"Page **{current_page}** of **{total_pages}**")
 
-    # Paginate the filtered DataFrame
-    pages = split_frame(df_search, batch_size)
-    page = pages[current_page - 1] if len(pages) > 0 else pd.DataFrame()
+    # Materialize the recipes of the current page only
+    page = df.iloc[page_window(search_rows, current_page, batch_size)]
+    if search_rates is not None:
+        page = page.assign(**{'%': page_window(search_rates, current_page, batch_size)})
 
     # Display filtered recipes with pagination + html formatting
     for i in range(len(page)):
         recipe = page.iloc[i]
+        fridge_info = f" | <b>In your fridge:</b> {recipe['%']}% of the ingredients" if '%' in page.columns else ''
         recipe_placeholder.markdown(f"""
         <div style="
             border: 1px solid #ddd; 
@@ -175,7 +286,7 @@ if st.session_state.search_df is not None:
             <h3 style="margin: 0; color: #333;">{recipe['title']}</h3>
             <p style="margin: 5px 0; color: #777;">
                 <b>Total Time:</b> {recipe['TotalTime']} | 
-                <b>Rating:</b> {recipe['AggregatedRating']}
+                <b>Rating:</b> {recipe['AggregatedRating']:.1f}{fridge_info}
             </p>
             <p style="margin: 5px 0; color: #555;">
                 {', '.join(str(x) for x in recipe['ingredients'][:10])}...
@@ -32,7 +32,7 @@ else :
     ingredients = st.session_state['ingredients']
     directions = st.session_state['instructions']
     # link = st.session_state['link']
-    # correspondance_rate = st.session_state['correspondance_rate']
+    correspondance_rate = st.session_state['correspondance_rate']
     rating = st.session_state.rating
     vote = st.session_state.vote
     author = st.session_state.author
@@ -71,7 +71,7 @@ else :
             
     # Render the template with dynamic data
     rendered_html = jinja_template.render(css = css, title=recipe_title, author = author, servings = servings,
-                                        rating = rating, vote = vote,
+                                        rating = rating, vote = vote, correspondance_rate = correspondance_rate,
                                         prep_time = prep_time, c_time = c_time, tot_time = tot_time,
                                         items=ingredients, dir = directions, keywords = keywords,
                                         link = rec_link, desc = description, img = img_link,
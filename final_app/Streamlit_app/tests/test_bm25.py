@@ -0,0 +1,49 @@
+''' Test bm25.py'''
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
+from bm25 import *
+
+
+def test_field_words():
+    assert field_words('Easy Apple-Pie!') == ['easy', 'applepie']
+    assert field_words(np.array(['#Easy', '#< 30 Mins'], dtype=object)) == ['easy', '30', 'mins']
+    assert field_words(None) == [] and field_words(pd.NA) == []
+
+
+def test_bm25_index():
+    df = pd.DataFrame({
+        'title': ['Tomato Soup', 'Chicken Soup', 'Apple Pie', 'Tomato Salad'],
+        'Description': ['a soup of tomatoes', 'chicken and tomato', None, 'fresh salad'],
+        'Keywords': [['#Soup'], ['#Chicken', '#Tomato'], ['#Dessert'], []],
+    })
+    index = BM25Index.from_df(df)
+    assert index.terms == sorted(index.terms)
+    scores = index.scores(['tomato'])
+    assert scores[2] == 0 and (scores[[0, 1, 3]] > 0).all()
+    assert scores[0] > scores[3] # also in the description ('tomatoes' starts with 'tomato')
+    assert index.scores(['zucchini']).sum() == 0
+
+    # a title word weighs more than a description word
+    weighted = BM25Index({'title': ['tomato', 'salad'], 'Description': ['salad', 'tomato']})
+    assert weighted.scores(['tomato'])[0] > weighted.scores(['tomato'])[1]
+
+    # BM25 of a single field, computed by hand
+    single = BM25Index({'title': ['a b', 'a a b b', 'c']}, {'title': 1.0})
+    idf = np.log(1 + (3 - 2 + 0.5) / (2 + 0.5))
+    lengths, average = np.array([2, 4]), 7 / 3
+    tf = np.array([1, 2]) / (1 - B + B * lengths / average)
+    assert np.allclose(single.scores(['a'])[:2], idf * tf * (K1 + 1) / (tf + K1))
+
+
+def test_bm25_top_k():
+    index = BM25Index({'title': ['pie', 'apple pie', 'apple', 'apple', 'cake', 'apple tart']})
+    rating = np.array([5, 1, 4, 3, 5, 4.5])
+    assert index.top_k(['apple'], 10, tie_breaker=rating).tolist() == [2, 3, 5, 1, 0, 4]
+    assert index.top_k(['apple'], 1, tie_breaker=rating).tolist() == [2]
+    assert index.top_k(['apple'], 3, tie_breaker=rating).tolist() == [2, 3, 5]
+    assert index.top_k(['apple'], 5, tie_breaker=rating).tolist() == [2, 3, 5, 1, 0] # ties of score 0 by rating
+    candidates = np.array([True, True, False, False, True, True])
+    assert index.top_k(['apple'], 2, candidates=candidates).tolist() == [1, 5] # ties by row position
+    assert index.top_k(['apple'], None, candidates=candidates).tolist() == [1, 5, 0, 4] # all the candidates
@@ -0,0 +1,55 @@
+''' Test fridge_ranking.py'''
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
+from fridge_ranking import *
+from ingredient_store import IngredientStore
+
+
+def test_recipe_ingredient_matrix():
+    ner = [['salt', 'tomato', 'salt'], [], ['basil', 'Tomato']]
+    matrix = RecipeIngredientMatrix(IngredientStore.from_lists(ner))
+    assert matrix.shape == (3, 4)
+    assert matrix.row_lengths.tolist() == [2, 0, 2]  # 'salt' is counted once
+    rows = [{matrix.vocabulary[i] for i in matrix.indices[matrix.indptr[r]:matrix.indptr[r + 1]]} for r in range(3)]
+    assert rows == [{'salt', 'tomato'}, set(), {'basil', 'Tomato'}]
+    assert len(matrix.ingredient_ids(['TOMATO', 'pepper'])) == 2  # 'tomato' and 'Tomato'
+
+
+def test_top_k():
+    scores = np.array([0.5, 0.9, 0.5, 0.1, 0.5])
+    assert top_k(scores, 3).tolist() == [1, 0, 2]
+    assert top_k(scores, 10).tolist() == [1, 0, 2, 4, 3]
+
+
+def test_rank_by_fridge():
+    ner = [['egg', 'milk', 'flour'], ['egg', 'milk'], ['salmon', 'lemon'], ['egg', 'bacon', 'cheese', 'milk']]
+    matrix = RecipeIngredientMatrix(IngredientStore.from_lists(ner))
+    ranking = rank_by_fridge(matrix, ['Egg', 'milk', 'lemon'], fridge_weight=0)
+    # recipe 2 has 1 of its 2 ingredients, recipe 3 2 of its 4
+    assert ranking.index.tolist() == [1, 0, 2, 3]
+    assert ranking['matches'].tolist() == [2, 2, 1, 2]
+    assert np.allclose(ranking['recipe_coverage'], [1, 2 / 3, 0.5, 0.5])
+    assert np.allclose(ranking['fridge_coverage'], [2 / 3, 2 / 3, 1 / 3, 2 / 3])
+
+    # the share of the fridge used breaks the tie between recipes 2 and 3
+    assert rank_by_fridge(matrix, ['egg', 'milk', 'lemon']).index.tolist() == [1, 0, 3, 2]
+    assert rank_by_fridge(matrix, ['egg', 'milk', 'lemon'], k=2).index.tolist() == [1, 0]
+    assert rank_by_fridge(matrix, ['egg', 'milk', 'lemon'], k=None).index.tolist() == [1, 0, 3, 2]
+    assert rank_by_fridge(matrix, ['lemon'], k=None).index.tolist() == [2] # only the recipes with a fridge item
+    candidates = np.array([False, True, True, False])
+    assert rank_by_fridge(matrix, ['egg', 'lemon'], candidates=candidates).index.tolist() == [1, 2]
+    assert rank_by_fridge(matrix, ['pepper']).empty
+
+
+def test_rank_by_fridge_ingredient_variants():
+    ner = [['Tomato', 'tomato', 'salt'], ['tomato', 'basil'], ['salt']]
+    matrix = RecipeIngredientMatrix(IngredientStore.from_lists(ner))
+    # 'tomato' matches 2 ingredients of the vocabulary but is 1 of the 2 fridge items
+    ranking = rank_by_fridge(matrix, ['tomato', 'Salt'], fridge_weight=0)
+    assert ranking.index.tolist() == [0, 2, 1]
+    assert ranking['matches'].tolist() == [2, 1, 1]
+    assert np.allclose(ranking['fridge_coverage'], [1, 0.5, 0.5])
+    assert np.allclose(ranking['recipe_coverage'], [1, 1, 0.5])
+    assert np.allclose(rank_by_fridge(matrix, ['tomato', 'pepper'])['fridge_coverage'], [0.5, 0.5]) # unknown items count
@@ -19,6 +19,18 @@ def test_split_frame():
     assert len(result[0]) == 3 # the first chunk should be of length 3
     assert len(result[-1]) == 1 # the last chunk should be of length 1
 
+def test_page_count():
+    assert page_count(765, 10) == 77 # the last partial page is counted
+    assert page_count(20, 10) == 2
+    assert page_count(0, 10) == 1
+
+def test_page_window():
+    row_ids = np.arange(100, 125)
+    assert page_window(row_ids, 1, 10).tolist() == list(range(100, 110))
+    assert page_window(row_ids, 3, 10).tolist() == list(range(120, 125)) # last partial page
+    assert len(page_window(row_ids, 4, 10)) == 0
+    assert np.shares_memory(page_window(row_ids, 2, 10), row_ids) # a view, not a copy
+
 def test_search_recipes():
     # no need to test for case sensitivity as the filters are already standardized in format
     df = pd.DataFrame({
@@ -90,12 +102,161 @@ def test_search_recipes():
     _, total8 = search_recipes(large_df, filters8, dict_columns)
     assert total8 == 2000  # ensure results are consistent on larger df
 
-    # checks caching
-    start_time = time.time()
-    search_recipes(df, filters, dict_columns)
-    first_run_time = time.time() - start_time
 
-    start_time = time.time()
-    search_recipes(df, filters, dict_columns)
-    second_run_time = time.time() - start_time
-    assert second_run_time < first_run_time, "Caching did not improve performance" # second run should be quicker than the first
+def test_search_recipes_diets():
+    df = pd.DataFrame({
+        'Vegetarian_Friendly': [True, True, False],
+        'Vegan_Friendly': [True, False, False],
+        'Gluten_Free': [False, True, True],
+    })
+    dict_columns = {'vegetarian': 'Vegetarian_Friendly', 'vegan': 'Vegan_Friendly', 'gluten_free': 'Gluten_Free'}
+    _, total = search_recipes(df, {'vegan': True}, dict_columns)
+    assert total == 1
+    _, total = search_recipes(df, {'vegetarian': True, 'gluten_free': True}, dict_columns)
+    assert total == 1 # diet filters are combined
+
+
+def test_search_recipes_filter_arrays():
+    df = pd.DataFrame({
+        'TotalTime_minutes': [30, 45, None, 90, 30],
+        'RecipeType': pd.Categorical(['Dessert', 'Main Course', 'Dessert', None, 'Dessert']),
+        'World_Cuisine': ['French', 'Italian', 'French', 'French', 'Asian'],
+        'Vegetarian_Friendly': [True, False, True, True, False],
+    }, index=[10, 11, 12, 13, 14])
+    dict_columns = {'recipe_durations_min': 'TotalTime_minutes', 'recipe_types': 'RecipeType',
+                    'provenance': 'World_Cuisine', 'vegetarian': 'Vegetarian_Friendly'}
+    arrays = filter_arrays(df, dict_columns)
+    codes, values, counts = arrays['RecipeType']
+    assert codes.tolist() == [0, 1, 0, -1, 0] and values.tolist() == ['Dessert', 'Main Course'] and counts.tolist() == [3, 1]
+
+    filters = {'recipe_durations_min': 45, 'recipe_type': 'Dessert', 'provenance': ['French']}
+    for order_by_selectivity in [False, True]:
+        result, total = search_recipes(df, filters, dict_columns, arrays=arrays,
+                                       order_by_selectivity=order_by_selectivity)
+        assert result.index.tolist() == [10] and total == 1 # missing durations don't match
+    result, total = search_recipes(df, {'vegetarian': True, 'recipe_type': 'Main Course'}, dict_columns,
+                                   order_by_selectivity=True)
+    assert total == 0 and list(result.columns) == list(df.columns) # empty results keep the columns
+
+
+def test_recipe_index():
+    df = pd.DataFrame({
+        'NER': [['onion', 'tomato'], ['onion'], ['tomato', 'salt'], ['salt']],
+        'RecipeType': ['Main Course', 'Main Course', 'Dessert', 'Dessert'],
+        'World_Cuisine': ['French', 'Italian', 'French', 'Asian'],
+    })
+    dict_columns = {'ingredients': 'NER', 'recipe_types': 'RecipeType', 'provenance': 'World_Cuisine'}
+    index = RecipeIndex(df, dict_columns, cache_size=2)
+    result, total = index.search({'ingredients': ['onion', 'tomato']})
+    assert total == 1 and result.index.tolist() == [0]
+    assert index.search_rows({'provenance': ['French'], 'recipe_type': 'Dessert'}).tolist() == [2]
+    # same filters in another order -> same cache entry, the cached rows can't be modified
+    rows = index.search_rows({'recipe_type': 'Dessert', 'provenance': ['French']})
+    assert not rows.flags.writeable
+    assert index.search_rows({'ingredients': ['tomato', 'onion']}).tolist() == [0]
+    assert index.cache_info() == {'hits': 2, 'misses': 2, 'evictions': 0, 'size': 2, 'max_size': 2}
+
+    index.search({}) # evicts the least recently used search (the provenance one)
+    assert index.cache_info()['evictions'] == 1
+    index.search_rows({'ingredients': ['onion', 'tomato']})
+    index.search_rows({'provenance': ['French'], 'recipe_type': 'Dessert'})
+    assert index.cache_info() == {'hits': 3, 'misses': 4, 'evictions': 2, 'size': 2, 'max_size': 2}
+
+
+def test_bayesian_ratings():
+    ratings = np.array([5.0, 4.6, 3.4, np.nan])
+    review_counts = np.array([1, 100, 3, 0])
+    result = bayesian_ratings(ratings, review_counts, prior_weight=2)
+    assert np.allclose(result[:3], [(5 + 2 * 4.333333) / 3, (460 + 2 * 4.333333) / 102, (10.2 + 2 * 4.333333) / 5])
+    assert np.isnan(result[3]) # no rating
+    assert result[1] > result[0] # many good reviews beat a single perfect one
+
+
+def test_sort_permutations():
+    df = pd.DataFrame({
+        'AggregatedRating': [4.0, 5.0, np.nan, 5.0],
+        'ReviewCount': [50, 1, 0, 30],
+        'TotalTime_minutes': [30, 10, 30, 20],
+        'Calories': [300.0, np.nan, 100.0, 200.0],
+    })
+    permutations = sort_permutations(df)
+    assert set(permutations) == {'rating', 'bayesian_rating', 'total_time', 'calories'} # no protein column
+    assert permutations['rating'].tolist() == [1, 3, 0, 2] # stable, missing values last
+    assert permutations['bayesian_rating'].tolist() == [3, 1, 0, 2]
+    assert permutations['total_time'].tolist() == [1, 3, 0, 2]
+    assert permutations['calories'].tolist() == [2, 3, 0, 1]
+    # the Bayesian rating needs the review counts
+    assert 'bayesian_rating' not in sort_permutations(df.drop(columns='ReviewCount'))
+
+    index = RecipeIndex(df, {'recipe_durations_min': 'TotalTime_minutes'})
+    assert index.sorted_rows(np.array([0, 2, 3]), 'rating').tolist() == [3, 0, 2]
+    assert index.sorted_rows(np.array([0, 2, 3]), 'total_time', k=2).tolist() == [3, 0]
+    result, total = index.search({'recipe_durations_min': 25}, 'calories')
+    assert result.index.tolist() == [3, 1] and total == 2
+
+
+def test_clean_query():
+    assert clean_query('Apples, bananas!') == 'Apple banana'
+    assert clean_query('apples, tomatoes', {'tomatoes': 'tomato'}) == 'apple tomato' # known singular forms are reused
+
+
+def test_enforce_schema():
+    df = pd.DataFrame({
+        'title': ['Apple Pie', 'Lemonade'],
+        'RecipeType': ['Dessert', 'Beverages'],
+        'AggregatedRating': [4.5, 5.0],
+        'RecipeServings': [8, 4],
+        'NER': [['apple', 'flour'], ['lemon']],
+    })
+    result = enforce_schema(df)
+    assert isinstance(result['RecipeType'].dtype, pd.CategoricalDtype)
+    assert result['title'].dtype == 'string[pyarrow]'
+    assert result['AggregatedRating'].dtype == np.float32 and result['RecipeServings'].dtype == np.int16
+    assert result['NER'].tolist() == [['apple', 'flour'], ['lemon']]  # list columns are unchanged
+    assert result.memory_usage(deep=True).sum() < df.memory_usage(deep=True).sum()
+
+
+def test_recipe_schema_matches_preprocessing():
+    # The app doesn't import the preprocessing package: its copy of the schema must stay equal to the one the
+    # datasets are written with
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "Preprocessing")))
+    import data_cleaning
+    assert NUTRITION_COLUMNS == data_cleaning.NUTRITION_COLUMNS
+    assert RECIPE_SCHEMA == data_cleaning.RECIPE_SCHEMA
+
+
+def test_title_search_rows():
+    from title_index import TitleIndex
+    from ingredient_index import IngredientBitmapIndex
+    from ingredient_store import IngredientStore
+    from bm25 import BM25Index
+    df = pd.DataFrame({
+        'title': ['Chicken Soup', 'Apple Cake', 'Carrot Cake', 'Tomato Salad', 'Chocolate Cake', 'Lemonade'],
+        'NER': [['chicken', 'carrot'], ['apple', 'flour'], ['carrot', 'flour'], ['tomato'], ['chocolate'], ['lemon']],
+        'AggregatedRating': [4.0, 5.0, 3.0, 4.5, np.nan, 4.8],
+        'TotalTime_minutes': [60, 45, 50, 10, 30, 5],
+    })
+    recipe_index = RecipeIndex(df, {'recipe_durations_min': 'TotalTime_minutes'})
+    title_index = TitleIndex(df['title'])
+    ingredient_index = IngredientBitmapIndex.from_store(IngredientStore.from_lists(df['NER']))
+    relevance_index = BM25Index.from_df(df)
+    ratings = np.nan_to_num(df['AggregatedRating'].to_numpy(), nan=0)
+    rows = recipe_index.search_rows({})
+
+    # the same recipes match the title search in every order, with relevance as with the precomputed orders
+    for query in [['c'], ['carrot'], ['cake']]:
+        results = {order: title_search_rows(recipe_index.sorted_rows(rows, order), None, query, title_index,
+                                            ingredient_index)[0] for order in recipe_index.sort_permutations}
+        results['relevance'] = title_search_rows(recipe_index.sorted_rows(rows, 'rating'), None, query, title_index,
+                                                 ingredient_index, relevance_index, ratings)[0]
+        assert len({tuple(sorted(result.tolist())) for result in results.values()}) == 1
+    assert sorted(results['relevance'].tolist()) == [1, 2, 4]
+    assert results['rating'].tolist() == [1, 2, 4]
+
+    # 'carrot' matches a title and an ingredient of the chicken soup, the title first with relevance
+    result, _ = title_search_rows(rows, None, ['carrot'], title_index, ingredient_index, relevance_index, ratings)
+    assert result.tolist() == [2, 0]
+    # the rates of the fridge search follow their recipes, whose ranking is kept
+    result, rates = title_search_rows(np.array([4, 2, 0]), np.array([90.0, 50.0, 10.0]), ['c'], title_index,
+                                      ingredient_index, relevance_index, ratings)
+    assert result.tolist() == [4, 2, 0] and rates.tolist() == [90.0, 50.0, 10.0]
@@ -0,0 +1,23 @@
+''' Test ingredient_index.py'''
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
+from ingredient_index import *
+from ingredient_store import IngredientStore
+import pandas as pd
+
+
+def test_ingredient_bitmap_index():
+    # 'salt' and 'tomato' are in many recipes and get bitmaps, the other ingredients keep their row positions
+    ner = [['salt', 'tomato'], ['salt', 'Basil'], ['tomato', 'basil', 'salt']] + [['salt']] * 60 + [['tomato']] * 40
+    store = IngredientStore.from_lists(ner)
+    index = IngredientBitmapIndex.from_store(store)
+    assert index.bitmap_rows[index.term_ids['salt']] >= 0 and index.bitmap_rows[index.term_ids['basil']] == -1
+    assert index.bitmaps.shape == (2, 13)  # 103 recipes -> 13 bytes per bitmap
+
+    queries = [['salt'], ['salt', 'tomato'], ['basil', 'salt'], ['basil', 'tomato', 'salt'], ['pepper'], []]
+    for query in queries:
+        assert (index.recipes_with_all(query) == store.recipes_with_all(query)).all()
+        assert (index.recipes_with_all(query, ignore_case=True) == store.recipes_with_all(query, ignore_case=True)).all()
+    assert np.flatnonzero(index.recipes_with_all(['basil', 'salt'], ignore_case=True)).tolist() == [1, 2]
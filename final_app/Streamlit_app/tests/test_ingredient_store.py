@@ -0,0 +1,37 @@
+''' Test ingredient_store.py'''
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
+from ingredient_store import *
+from functions import search_recipes
+import pandas as pd
+
+
+def test_ingredient_store():
+    ner = [['tomato', 'salt', 'Basil'], ['chicken', 'tomato'], ['apple', 'flour', 'salt']]
+    store = IngredientStore.from_lists(ner)
+    assert len(store) == 3
+    assert store.vocabulary[:2] == ['tomato', 'salt']  # vocabulary sorted by frequency
+    assert store.ids.dtype == np.int32 and store.offsets.tolist() == [0, 3, 5, 8]
+    assert [store.ingredients(i) for i in range(3)] == ner  # the lists are preserved
+    assert store.lengths().tolist() == [3, 2, 3]
+
+    assert store.recipes_with_all(['tomato']).tolist() == [True, True, False]
+    assert store.recipes_with_all(['tomato', 'salt']).tolist() == [True, False, False]
+    assert store.recipes_with_all(['basil']).tolist() == [False, False, False]  # exact names
+    assert store.recipes_with_all(['basil'], ignore_case=True).tolist() == [True, False, False]
+    assert store.recipes_with_all(['pepper', 'salt']).tolist() == [False, False, False]  # unknown ingredient
+    assert store.recipes_with_all([]).all()
+
+
+def test_search_recipes_ingredient_store():
+    df = pd.DataFrame({
+        'NER': [['tomato', 'salt'], ['chicken', 'tomato'], ['apple', 'flour', 'salt']],
+        'TotalTime_minutes': [30, 90, 60],
+    })
+    columns = {'ingredients': 'NER', 'recipe_durations_min': 'TotalTime_minutes'}
+    filters = {'ingredients': ['tomato'], 'recipe_durations_min': 60}
+    store = IngredientStore.from_lists(df['NER'])
+    result, total = search_recipes(df.drop(columns='NER'), filters, columns, store)
+    assert total == 1 and result.index.tolist() == [0]
@@ -0,0 +1,33 @@
+''' Test search_bundle_loader.py'''
+
+import os
+import sys
+import json
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "Preprocessing")))
+from search_bundle_loader import *
+from search_bundle import write_search_bundle
+import pandas as pd
+
+
+def test_load_search_bundle(tmp_path):
+    dataset_path = str(tmp_path / 'recipes.parquet')
+    assert load_search_bundle(dataset_path) is None  # no bundle yet
+
+    df = pd.DataFrame({
+        'title': ['Tomato Soup', 'Chicken Tomato Stew', 'Apple Pie'],
+        'NER': [['tomato', 'salt'], ['chicken', 'tomato'], ['apple', 'flour', 'salt']],
+        'RecipeType': ['Main Course', 'Main Course', 'Dessert'],
+    })
+    df.to_parquet(dataset_path)
+    write_search_bundle(df, dataset_path)
+    bundle = load_search_bundle(dataset_path)
+    assert bundle.ingredients[:2] == ['tomato', 'salt']
+    assert bundle.ingredient_recipes('tomato').tolist() == [0, 1]
+    assert bundle.ingredient_recipes('pepper').tolist() == []  # unknown ingredient
+    assert bundle.spelling['stew'] == 1 # title words are in the spellcheck dictionary
+    assert bundle.filter_options['RecipeType'] == ['Dessert', 'Main Course']
+
+    # a bundle built from another version of the dataset is ignored
+    df.head(2).to_parquet(dataset_path)
+    assert load_search_bundle(dataset_path) is None
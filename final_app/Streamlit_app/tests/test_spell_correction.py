@@ -0,0 +1,37 @@
+''' Test spell_correction.py'''
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
+from spell_correction import *
+
+
+def test_deletes():
+    assert deletes('abc', 1) == {'abc', 'bc', 'ac', 'ab'}
+    assert len(deletes('abc', 2)) == 7 # + 'a', 'b', 'c'
+
+
+def test_edit_distance():
+    assert edit_distance('tomato', 'tomato', 2) == 0
+    assert edit_distance('tomato', 'tomatto', 2) == 1 # insertion
+    assert edit_distance('potato', 'potaot', 2) == 1 # transposition
+    assert edit_distance('chicken', 'chikn', 2) == 2
+    assert edit_distance('soup', 'salad', 2) == 3 # larger than the maximum distance
+
+
+def test_spell_corrector():
+    ingredients = {'olive oil': 50, 'apple': 30, 'maple syrup': 5, 'chicken breast': 20}
+    title_words = {'Apple': 10, "mom's": 2, 'chickpea': 3}
+    spell = SpellCorrector(ingredients, title_words)
+    assert spell.frequencies['apple'] == 40 and spell.frequencies['olive'] == 50 and 'moms' in spell
+    assert spell.lookup('aple') == [('apple', 1, 40), ('maple', 1, 5)] # same distance: the most frequent first
+    assert spell.lookup('chiken') == [('chicken', 1, 20)]
+    assert spell.correction('Syrop') == 'syrup'
+    assert spell.correction('olive') == 'olive' # known word
+    assert spell.correction('zucchini') is None
+
+    # same suggestions as a comparison with every word of the dictionary
+    for word in ['brest', 'chickenbreast', 'ol', 'syrups', 'mapel', 'chikcpea']:
+        expected = sorted((w, edit_distance(word, w, 2), n) for w, n in spell.frequencies.items()
+                          if edit_distance(word, w, 2) <= 2)
+        assert sorted(spell.lookup(word)) == expected
@@ -0,0 +1,29 @@
+''' Test title_index.py'''
+
+import os
+import sys
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
+from title_index import *
+
+
+def test_title_words():
+    assert title_words("Mom's Chicken-Noodle Soup!") == ['moms', 'chickennoodle', 'soup']
+
+
+def test_title_index():
+    titles = ['Chicken Noodle Soup', 'Tomato Soup', 'Grilled Chicken', 'Chickpea Salad', "Mom's soup soup"]
+    index = TitleIndex(titles)
+    assert index.terms == sorted(index.terms) and index.counts[index.terms.index('soup')] == 4
+    assert index.has_prefix('chick') and index.has_prefix('Tomato') and not index.has_prefix('potato')
+    assert index.recipes_with_prefix('chick').tolist() == [0, 2, 3]  # 'chicken' and 'chickpea'
+    assert index.recipes_with_prefix('soup').tolist() == [0, 1, 4]  # a word repeated in a title is indexed once
+    assert index.recipes_with_prefix('zucchini').tolist() == []
+
+    assert np.flatnonzero(index.recipes_matching(['chick', 'soup'])).tolist() == [0]
+    assert np.flatnonzero(index.recipes_matching(['moms'])).tolist() == [4]
+    assert index.recipes_matching([]).all()
+
+    # same results as a scan of the title words
+    for query in [['c'], ['s', 'chicken'], ['grilled', 'noodle'], ['soup']]:
+        expected = [all(any(w.startswith(q) for w in title_words(t)) for q in query) for t in titles]
+        assert index.recipes_matching(query).tolist() == expected
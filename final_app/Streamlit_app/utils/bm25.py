@@ -0,0 +1,122 @@
+import string
+from bisect import bisect_left
+from typing import Iterable, Union
+import numpy as np
+import pandas as pd
+
+# Removed from the texts before splitting them into words, as from the search queries (see `clean_query`)
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+# Weight of the occurrences of a word in each field: a word of the title says more about the recipe than a word of
+# its description
+FIELD_WEIGHTS = {'title': 3.0, 'Keywords': 1.5, 'Description': 1.0}
+K1 = 1.2
+B = 0.75
+
+
+def field_words(text) -> list[str]:
+    """Returns: list[str] (the lowercase words of a text, or of a list of texts such as the keywords, without
+    punctuation)"""
+    if not isinstance(text, str):
+        if text is None or text is pd.NA or (isinstance(text, float) and np.isnan(text)):
+            return []
+        text = ' '.join(str(x) for x in text)
+    return text.lower().translate(PUNCTUATION_TABLE).split()
+
+
+class BM25Index:
+    """Relevance of the recipes to a query with BM25F: the occurrences of a word in the fields of a recipe are
+    normalized by the length of each field, weighted by field and summed before the BM25 saturation.
+
+    The score of each (word, recipe) pair does not depend on the query, so it is precomputed in an inverted index
+    whose words are sorted: a query word is a prefix, as in the title search, and the scores of the words starting
+    with it are a contiguous slice of the index, summed per recipe with `np.bincount`.
+
+    Args:
+        fields (dict[str, Iterable]): the texts of each field, in the order of the recipes
+        weights (dict[str, float]): the weight of each field
+        k1 (float): the saturation of the word frequencies
+        b (float): the strength of the field length normalization
+    """
+    def __init__(self, fields: dict[str, Iterable], weights: dict[str, float] = FIELD_WEIGHTS, k1: float = K1,
+                 b: float = B):
+        words = {field: [field_words(text) for text in texts] for field, texts in fields.items()}
+        self.n_recipes = len(next(iter(words.values()))) if words else 0
+        self.terms = sorted({word for texts in words.values() for text in texts for word in text})
+        term_ids = {term: i for i, term in enumerate(self.terms)}
+
+        # (word, recipe) pairs as int64 keys, with the weighted and length normalized frequency of the word
+        keys, frequencies = [], []
+        for field, texts in words.items():
+            lengths = np.array([len(text) for text in texts], dtype=np.float64)
+            ids = np.fromiter((term_ids[word] for text in texts for word in text), dtype=np.int64, count=int(lengths.sum()))
+            rows = np.repeat(np.arange(self.n_recipes, dtype=np.int64), lengths.astype(np.int64))
+            field_keys, counts = np.unique(ids * self.n_recipes + rows, return_counts=True)
+            norms = 1 - b + b * lengths / max(lengths.mean(), 1)
+            keys.append(field_keys)
+            frequencies.append(weights.get(field, 1.0) * counts / norms[field_keys % self.n_recipes])
+        keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+        frequency = np.bincount(inverse, weights=np.concatenate(frequencies))
+
+        ids = keys // self.n_recipes
+        self.postings = (keys % self.n_recipes).astype(np.int32)
+        self.offsets = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ids, minlength=len(self.terms)), out=self.offsets[1:])
+        document_frequency = np.diff(self.offsets)
+        self.idf = np.log(1 + (self.n_recipes - document_frequency + 0.5) / (document_frequency + 0.5))
+        self.scores_by_posting = (self.idf[ids] * frequency * (k1 + 1) / (frequency + k1)).astype(np.float32)
+
+    @classmethod
+    def from_df(cls, df: pd.DataFrame, weights: dict[str, float] = FIELD_WEIGHTS) -> 'BM25Index':
+        """Returns: BM25Index (the index of the weighted columns of the recipes)"""
+        return cls({col: df[col].tolist() for col in weights if col in df.columns}, weights)
+
+    def prefix_range(self, prefix: str) -> tuple[int, int]:
+        """Returns: tuple[int, int] (range of the IDs of the words starting with the prefix, case insensitive)"""
+        prefix = prefix.lower()
+        start = bisect_left(self.terms, prefix)
+        return start, bisect_left(self.terms, prefix + chr(0x10FFFF), lo=start)
+
+    def scores(self, query: Iterable[str]) -> np.ndarray:
+        """Returns: np.ndarray (BM25 score of each recipe, the sum of the scores of the words starting with each word
+        of the query)"""
+        scores = np.zeros(self.n_recipes)
+        for word in query:
+            start, stop = self.prefix_range(word)
+            postings = slice(self.offsets[start], self.offsets[stop])
+            scores += np.bincount(self.postings[postings], weights=self.scores_by_posting[postings],
+                                  minlength=self.n_recipes)
+        return scores
+
+    def top_k(self, query: Iterable[str], k: Union[int, None], candidates: np.ndarray = None,
+              tie_breaker: np.ndarray = None) -> np.ndarray:
+        """Finds the k most relevant recipes without sorting all of them (`np.argpartition`, linear time).
+
+        Args:
+           query (Iterable[str]): The words of the query.
+           k (int): The maximum number of recipes to return, all the candidates sorted if None.
+           candidates (np.ndarray): Boolean mask of the recipes to rank (example: the recipes matching the filters),
+                all the recipes by default.
+           tie_breaker (np.ndarray): Value of each recipe ranking first the recipes with the same score (example: the
+                rating), the row position by default.
+
+        Returns: np.ndarray (row positions of the best recipes, by decreasing score, then decreasing tie breaker,
+            then increasing row position)
+        """
+        scores = self.scores(query)
+        rows = np.flatnonzero(candidates) if candidates is not None else np.arange(self.n_recipes)
+        tie_breaker = tie_breaker if tie_breaker is not None else np.zeros(self.n_recipes)
+        k = len(rows) if k is None else k
+        if k < len(rows):
+            candidate_scores = scores[rows]
+            kth_score = candidate_scores[np.argpartition(-candidate_scores, k - 1)[k - 1]]
+            above = rows[candidate_scores > kth_score]
+            ties = rows[candidate_scores == kth_score]
+            missing = k - len(above)
+            if missing < len(ties):
+                # same selection among the ties with the tie breaker, then the row positions
+                tie_values = tie_breaker[ties]
+                kth_value = tie_values[np.argpartition(-tie_values, missing - 1)[missing - 1]]
+                better = ties[tie_values > kth_value]
+                ties = np.concatenate([better, ties[tie_values == kth_value][:missing - len(better)]])
+            rows = np.concatenate([above, ties])
+        return rows[np.lexsort((rows, -tie_breaker[rows], -scores[rows]))][:k]
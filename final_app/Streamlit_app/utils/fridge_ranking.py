@@ -0,0 +1,109 @@
+from typing import Iterable, Union
+import numpy as np
+import pandas as pd
+
+# Weight of the share of the fridge items used by a recipe in its score, the rest is the share of its ingredients the
+# user has: a recipe the user can fully cook ranks above a recipe using more of the fridge
+FRIDGE_WEIGHT = 0.25
+
+
+class RecipeIngredientMatrix:
+    """Binary recipe x ingredient matrix in CSR form (`indptr`, `indices`): entry (i, j) is 1 when recipe i contains
+    ingredient j. Built once per dataset from the ingredient store, ingredients listed twice in a recipe count once.
+
+    Args:
+        store (IngredientStore): the ingredient lists of the recipes
+    """
+    def __init__(self, store):
+        self.vocabulary = store.vocabulary
+        self.lowercase_ids = store.lowercase_ids
+        rows = np.repeat(np.arange(len(store), dtype=np.int32), store.lengths())
+        order = np.lexsort((store.ids, rows))
+        rows, ids = rows[order], store.ids[order]
+        unique = np.ones(len(ids), dtype=bool)
+        unique[1:] = (ids[1:] != ids[:-1]) | (rows[1:] != rows[:-1])
+        # Row of each entry, to sum the products of a row with np.bincount
+        self.rows, self.indices = rows[unique], ids[unique]
+        self.row_lengths = np.bincount(self.rows, minlength=len(store))
+        self.indptr = np.zeros(len(store) + 1, dtype=np.int64)
+        np.cumsum(self.row_lengths, out=self.indptr[1:])
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.indptr) - 1, len(self.vocabulary)
+
+    def matvec(self, x: np.ndarray) -> np.ndarray:
+        """Returns: np.ndarray (product of the matrix and the vector `x` of the ingredients)"""
+        return np.bincount(self.rows, weights=x[self.indices], minlength=self.shape[0])
+
+    def ingredient_ids(self, ingredients: Iterable[str]) -> list[int]:
+        """Returns: list[int] (IDs of the ingredients, case insensitive, unknown ingredients are skipped)"""
+        return sorted({i for ingredient in ingredients for i in self.lowercase_ids.get(ingredient.lower(), [])})
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Finds the k highest scores without sorting all of them (`np.argpartition`, linear time).
+
+    Args:
+       scores (np.ndarray): The score of each recipe.
+       k (int): The number of recipes to return.
+
+    Returns: np.ndarray (row positions of the k best recipes, by decreasing score then increasing row position,
+        so that ties keep the order of the dataset)
+    """
+    if k < len(scores):
+        kth_score = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > kth_score)
+        rows = np.concatenate([above, np.flatnonzero(scores == kth_score)[:k - len(above)]])
+    else:
+        rows = np.arange(len(scores))
+    return rows[np.lexsort((rows, -scores[rows]))]
+
+def rank_by_fridge(matrix: RecipeIngredientMatrix, fridge: Iterable[str], k: Union[int, None] = 100,
+                   candidates: np.ndarray = None, fridge_weight: float = FRIDGE_WEIGHT) -> pd.DataFrame:
+    """Scores the recipes by how well they match the contents of the user's fridge, with one sparse matrix-vector
+    product: the number of fridge ingredients of each recipe. Only the recipes with at least one fridge item are
+    returned. A fridge item can match several ingredients of the vocabulary (example: 'tomato' and 'Tomato'), the
+    share of the fridge used by a recipe counts each item once.
+
+    Args:
+       matrix (RecipeIngredientMatrix): The recipe x ingredient matrix.
+       fridge (Iterable[str]): The ingredients the user has.
+       k (int): The maximum number of recipes to return, all the recipes with a fridge item if None.
+       candidates (np.ndarray): Boolean mask of the recipes to rank (example: the recipes matching the filters),
+            all the recipes by default.
+       fridge_weight (float): The weight of the share of the fridge used by a recipe in its score.
+
+    Returns: DataFrame (indexed by the row positions of the best recipes, from the best) with the columns
+        - matches: number of fridge items in the recipe, each counted once
+        - recipe_coverage: share of the ingredients of the recipe the user has
+        - fridge_coverage: share of the fridge items used by the recipe
+        - score: (1 - fridge_weight) * recipe_coverage + fridge_weight * fridge_coverage
+    """
+    items = sorted({ingredient.lower() for ingredient in fridge})
+    # fridge item of each ingredient of the vocabulary, -1 if none
+    item_of_id = np.full(matrix.shape[1], -1, dtype=np.int64)
+    for item, ingredient in enumerate(items):
+        item_of_id[matrix.ingredient_ids([ingredient])] = item
+    x = (item_of_id >= 0).astype(np.float64)
+    matches = matrix.matvec(x)
+    recipe_coverage = np.divide(matches, matrix.row_lengths, out=np.zeros(len(matches)), where=matrix.row_lengths > 0)
+    # distinct (recipe, fridge item) pairs, so that an item matching several ingredients of a recipe counts once
+    entry_items = item_of_id[matrix.indices]
+    in_fridge = entry_items >= 0
+    pairs = np.unique(matrix.rows[in_fridge].astype(np.int64) * max(len(items), 1) + entry_items[in_fridge])
+    item_matches = np.bincount(pairs // max(len(items), 1), minlength=matrix.shape[0])
+    fridge_coverage = item_matches / max(len(items), 1)
+    scores = (1 - fridge_weight) * recipe_coverage + fridge_weight * fridge_coverage
+    # only the recipes with a fridge item are ranked, the ties keep the order of the dataset
+    ranked = matches > 0
+    if candidates is not None:
+        ranked &= candidates
+    rows = np.flatnonzero(ranked)
+    rows = rows[top_k(scores[rows], len(rows) if k is None else k)]
+    return pd.DataFrame({
+        'matches': item_matches[rows].astype(int),
+        'recipe_coverage': recipe_coverage[rows],
+        'fridge_coverage': fridge_coverage[rows],
+        'score': scores[rows],
+    }, index=rows)
@@ -1,11 +1,33 @@
 import pandas as pd
 import streamlit as st
 from jinja2 import Template
-from typing import Tuple, Any
+from typing import Tuple, Any, Callable
 import inflect
+import json
+import os
 import string
 import numpy as np
-from spellchecker import SpellChecker
+import operator
+import threading
+from collections import OrderedDict
+import pyarrow.parquet as pq
+from importlib.metadata import version
+
+inflect_engine = inflect.engine()
+# Cache of singular nouns written by the preprocessing script, its name depends on the inflect version
+SINGULAR_NOUNS_CACHE_NAME = f"singular_nouns_inflect-{version('inflect')}.json"
+# Compact dtypes of the recipe columns, the list columns stay Python lists. Copy of the schema of the preprocessing
+# script (the app is deployed without it), kept equal by test_recipe_schema_matches_preprocessing
+NUTRITION_COLUMNS = ['Calories', 'FatContent', 'SaturatedFatContent', 'CholesterolContent', 'SodiumContent',
+                     'CarbohydrateContent', 'FiberContent', 'SugarContent', 'ProteinContent']
+RECIPE_SCHEMA = {
+    **{col: 'category' for col in ['RecipeType', 'World_Cuisine', 'TotalTime_cat', 'AuthorName', 'RecipeCategory',
+                                   'CookTime', 'PrepTime', 'TotalTime']},
+    **{col: 'string[pyarrow]' for col in ['title', 'Description', 'Images', 'link']},
+    **{col: 'float32' for col in ['AggregatedRating', *NUTRITION_COLUMNS]},
+    **{col: 'int32' for col in ['ReviewCount', 'CookTime_minutes', 'PrepTime_minutes', 'TotalTime_minutes']},
+    'RecipeServings': 'int16',
+}
 
 def split_frame(input_df: pd.DataFrame, rows: int) -> list[pd.DataFrame]:
     """
@@ -22,6 +44,35 @@ def split_frame(input_df: pd.DataFrame, rows: int) -> list[pd.DataFrame]:
     return df
 
 
+def page_count(n_rows: int, rows_per_page: int) -> int:
+    """
+    Args:
+        n_rows (int): the number of results
+        rows_per_page (int): the number of results per page
+
+    Returns:
+        int: the number of pages, including the last partial page (at least 1)
+    """
+    return max(1, -(-n_rows // rows_per_page))
+
+
+def page_window(row_ids: np.ndarray, page: int, rows_per_page: int) -> np.ndarray:
+    """
+    Selects the results of one page without splitting the others into pages: the page is a view of the array of
+    result IDs, and only its recipes are materialized (`df.iloc[page_window(...)]`)
+
+    Args:
+        row_ids (np.ndarray): the row positions of the results, in their display order
+        page (int): the page number, from 1
+        rows_per_page (int): the number of results per page
+
+    Returns:
+        np.ndarray: the row positions of the results of the page (empty after the last page)
+    """
+    start = (page - 1) * rows_per_page
+    return row_ids[start:start + rows_per_page]
+
+
 def handle_recipe_click(page: pd.DataFrame, index: int) -> None:
     """
     Updates Streamlit session state variables with recipe details -for use across pages- from the given DataFrame
@@ -41,6 +92,8 @@ def handle_recipe_click(page: pd.DataFrame, index: int) -> None:
     - `ingredients`: str - Ingredients list
     - `instructions`: str - Preparation instructions
     - `link`: str - Source link for the recipe
+    - `correspondance_rate`: float - Share of the ingredients of the recipe in the user's fridge (in %), None
+      outside of the fridge search
     - `rating`: float - Aggregated rating of the recipe
     - `vote`: int - Number of reviews/votes
     - `author`: str - Name of the recipe's author
@@ -69,7 +122,7 @@ def handle_recipe_click(page: pd.DataFrame, index: int) -> None:
     st.session_state.ingredients = page.iloc[index]['ingredients']
     st.session_state.instructions = page.iloc[index]['directions']
     st.session_state.link = "https://" + page.iloc[index]['link']
-    # st.session_state.correspondance_rate = page.iloc[index]['%']
+    st.session_state.correspondance_rate = page.iloc[index]['%'] if '%' in page.columns else None
     st.session_state.rating = page.iloc[index]['AggregatedRating']
     st.session_state.vote = page.iloc[index]['ReviewCount']
     st.session_state.author = page.iloc[index]['AuthorName']
@@ -93,10 +146,132 @@ def handle_recipe_click(page: pd.DataFrame, index: int) -> None:
     with st.spinner() :
         st.switch_page("./pages/Recipe page.py")
 
-@st.cache_data(show_spinner=True)
-def search_recipes(original_df: pd.DataFrame, filters:dict[str, Any], dict_columns: dict[str, str]) -> Tuple[pd.DataFrame, int]:
+def enforce_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts the recipe columns to the compact dtypes of `RECIPE_SCHEMA` (datasets written before the preprocessing
+    script enforced it have object and 64-bit columns).
+
+    Args:
+        df (DataFrame): the recipes
+
+    Returns:
+        DataFrame: the recipes with compact dtypes
+    """
+    return df.astype({col: dtype for col, dtype in RECIPE_SCHEMA.items() if col in df.columns})
+
+
+@st.cache_resource
+def load_recipes(dataset_path: str, exclude_columns: tuple[str, ...] = ()) -> pd.DataFrame:
     """
-    Filters a DataFrame of recipes based on specific criterias and returns the filtered results.
+    Loads the recipe dataset with compact dtypes, once per process, and logs its memory before and after the
+    conversion. The DataFrame is shared by all the sessions and must not be modified.
+
+    Args:
+        dataset_path (str): the path of the parquet dataset
+        exclude_columns (tuple[str, ...]): the columns not to read (example: 'NER' when the ingredient store is used)
+
+    Returns:
+        DataFrame: the recipes
+    """
+    columns = [col for col in pq.read_schema(dataset_path).names if col not in exclude_columns]
+    df = pd.read_parquet(dataset_path, columns=columns)
+    memory_before = df.memory_usage(deep=True).sum() / 2**20
+    df = enforce_schema(df)
+    memory_after = df.memory_usage(deep=True).sum() / 2**20
+    print(f"{len(df)} recipes loaded: {memory_before:.1f} MiB read, {memory_after:.1f} MiB with the compact dtypes")
+    return df
+
+
+# Comparison of each filter with the values of its column: (key of the column in the filter columns, operator)
+FILTER_OPERATORS = {
+    'recipe_durations_cat': ('recipe_durations_cat', operator.eq),
+    'recipe_durations_min': ('recipe_durations_min', operator.le),
+    'recipe_type': ('recipe_types', operator.eq),
+    'vegetarian': ('vegetarian', operator.eq),
+    **{diet: (diet, operator.eq) for diet in ['vegan', 'gluten_free', 'dairy_free', 'nut_free']},
+    'beginner': ('beginner', operator.eq),
+    'provenance': ('provenance', lambda x, value: all(element in x for element in value)),
+}
+
+def filter_arrays(df: pd.DataFrame, dict_columns: dict[str, str]) -> dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Precomputes the filter columns as NumPy arrays, once per dataset: each column is factorized so that a filter is
+    compared once with each distinct value, and its number of matching recipes is known before building its mask.
+
+    Args:
+        df (DataFrame): the recipes
+        dict_columns (dict): mapping of filter keys to the corresponding columns in df
+
+    Returns:
+        dict: for each filter column of df (except the ingredient lists), a tuple with the code of the value of each
+            recipe (int, -1 for missing values), the distinct values and their number of recipes
+    """
+    arrays = {}
+    for key, col in dict_columns.items():
+        if key == 'ingredients' or col not in df.columns:
+            continue
+        codes, values = pd.factorize(df[col])
+        arrays[col] = codes, np.asarray(values, dtype=object), np.bincount(codes[codes >= 0], minlength=len(values))
+    return arrays
+
+
+def filter_rows(original_df: pd.DataFrame, filters: dict[str, Any], dict_columns: dict[str, str],
+                ingredient_index: Any = None, arrays: dict = None, order_by_selectivity: bool = False) -> np.ndarray:
+    """
+    Finds the recipes matching all the filters (see `search_recipes`): the filters are combined in a single boolean
+    mask over the precomputed filter columns, the dataframe is not copied.
+
+    Args:
+        original_df (DataFrame): the recipes
+        filters (dict): the filter criterias
+        dict_columns (dict): mapping of filter keys to the corresponding columns in original_df
+        ingredient_index (IngredientBitmapIndex or IngredientStore): index of the ingredients of the recipes, the
+            ingredient column is scanned if not given
+        arrays (dict): the filter columns precomputed by `filter_arrays`, computed if not given
+        order_by_selectivity (bool): whether to apply the filters matching the fewest recipes first, and to stop as
+            soon as no recipe is left
+
+    Returns:
+        np.ndarray: the row positions of the matching recipes, in increasing order
+    """
+    arrays = arrays if arrays is not None else filter_arrays(original_df, dict_columns)
+    mask = np.ones(len(original_df), dtype=bool)
+    if 'ingredients' in filters.keys() and ingredient_index is not None:
+        mask &= ingredient_index.recipes_with_all(filters['ingredients'])
+
+    # matching distinct values of each filter column, and their number of recipes
+    predicates = []
+    for key, value in filters.items():
+        if key not in FILTER_OPERATORS:
+            continue
+        col_key, compare = FILTER_OPERATORS[key]
+        codes, values, counts = arrays[dict_columns[col_key]]
+        matches = np.array([compare(x, value) for x in values], dtype=bool)
+        predicates.append((counts[matches].sum(), codes, np.append(matches, False))) # code -1 (missing value) -> False
+    if order_by_selectivity:
+        predicates.sort(key=lambda predicate: predicate[0])
+
+    for _, codes, matches in predicates:
+        mask &= matches[codes]
+        if order_by_selectivity and not mask.any():
+            break
+
+    rows = np.flatnonzero(mask)
+    if 'ingredients' in filters.keys() and ingredient_index is None and len(rows) > 0:
+        # the ingredient lists are scanned last, for the recipes matching the other filters only
+        col, value = dict_columns['ingredients'], filters['ingredients']
+        ingredient_lists = original_df[col].to_numpy()[rows]
+        rows = rows[np.fromiter((all(element in x for element in value) for x in ingredient_lists), dtype=bool,
+                                count=len(rows))]
+    return rows
+
+
+def search_recipes(original_df: pd.DataFrame, filters:dict[str, Any], dict_columns: dict[str, str],
+                   ingredient_index: Any = None, arrays: dict = None,
+                   order_by_selectivity: bool = False) -> Tuple[pd.DataFrame, int]:
+    """
+    Filters a DataFrame of recipes based on specific criterias and returns the filtered results. The application
+    searches through a `RecipeIndex`, which caches the results.
 
     Parameters:
     ----------
@@ -107,6 +282,13 @@ def search_recipes(original_df: pd.DataFrame, filters:dict[str, Any], dict_colum
         and values are the corresponding filter values
     dict_columns : dict
         Mapping of filter keys to the corresponding columns in the original df
+    ingredient_index : IngredientBitmapIndex or IngredientStore, optional
+        Index of the ingredients of the recipes of `original_df` (same row positions), used instead of the ingredient
+        column
+    arrays : dict, optional
+        The filter columns of `original_df` precomputed by `filter_arrays`, computed at each call if not given
+    order_by_selectivity : bool
+        Whether to apply the filters matching the fewest recipes first, and to stop as soon as no recipe is left
 
     Returns:
     --------
@@ -115,45 +297,164 @@ def search_recipes(original_df: pd.DataFrame, filters:dict[str, Any], dict_colum
 
     Filtering Logic:
     ----------------
-    The function applies filters in sequence based on the `filters` dictionary. Supported filters:
+    All the filters are combined in a single boolean mask over the precomputed columns, and only the matching rows of
+    the original df are materialized, in their original order. Supported filters:
     - `ingredients`: Filters recipes containing all selected ingredients
     - `recipe_durations_cat`: Filters recipes with the specified duration category
     - `recipe_durations_min`: Filters recipes with durations less than or equal to the specified value
     - `recipe_type`: Filters recipes of a specified type (breakfast, dinner, ...)
     - `vegetarian`: Filters recipes flashed as vegetarian
+    - `vegan`, `gluten_free`, `dairy_free`, `nut_free`: Filters recipes flashed as following the diet
     - `beginner`: Filters recipes flashed as beginner friendly
     - `provenance`: Filters recipes according to specified world region
 
     """
-
-    filtered_df = original_df.copy()
-
-    if 'ingredients' in filters.keys():
-        col, value = dict_columns['ingredients'], filters['ingredients']
-        filtered_df = filtered_df[filtered_df[col].apply(lambda x: all(element in x for element in value))]
-    if 'recipe_durations_cat' in filters.keys():
-        col, value = dict_columns['recipe_durations_cat'], filters['recipe_durations_cat']
-        filtered_df = filtered_df[filtered_df[col] == (value)]
-    if 'recipe_durations_min' in filters.keys():
-        col, value = dict_columns['recipe_durations_min'], filters['recipe_durations_min']
-        filtered_df = filtered_df[filtered_df[col] <= (value)]
-    if 'recipe_type' in filters.keys():
-        col, value = dict_columns['recipe_types'], filters['recipe_type']
-        filtered_df = filtered_df[filtered_df[col] == (value)]
-    if 'vegetarian' in filters.keys():
-        col, value = dict_columns['vegetarian'], filters['vegetarian']
-        filtered_df = filtered_df[filtered_df[col] == (value)]
-    if 'beginner' in filters.keys():
-        col, value = dict_columns['beginner'], filters['beginner']
-        filtered_df = filtered_df[filtered_df[col] == (value)]      
-    if 'provenance' in filters.keys():
-        col, value = dict_columns['provenance'], filters['provenance']
-        filtered_df = filtered_df[filtered_df[col].apply(lambda x: all(element in x for element in value))]
-    
+    rows = filter_rows(original_df, filters, dict_columns, ingredient_index, arrays, order_by_selectivity)
+    filtered_df = original_df.iloc[rows]
     total_nr_recipes : int = len(filtered_df)
 
     return filtered_df, total_nr_recipes
 
+
+def bayesian_ratings(ratings: np.ndarray, review_counts: np.ndarray, prior_weight: float = None) -> np.ndarray:
+    """
+    Shrinks the rating of each recipe towards the mean rating, all the more as it has few reviews:
+    (n * rating + m * mean) / (n + m), with n the number of reviews and m the weight of the mean.
+
+    Args:
+        ratings (np.ndarray): the ratings (NaN if missing, the weighted rating is then missing too)
+        review_counts (np.ndarray): the number of reviews of each recipe
+        prior_weight (float): the weight m of the mean rating, the median number of reviews of the rated recipes (at
+            least 1) by default
+
+    Returns:
+        np.ndarray: the weighted ratings
+    """
+    ratings = np.asarray(ratings, dtype=np.float64)
+    review_counts = np.nan_to_num(np.asarray(review_counts, dtype=np.float64), nan=0)
+    rated = ~np.isnan(ratings)
+    if not rated.any():
+        return ratings
+    mean_rating = ratings[rated].mean()
+    if prior_weight is None:
+        prior_weight = max(np.median(review_counts[rated]), 1)
+    return (review_counts * ratings + prior_weight * mean_rating) / (review_counts + prior_weight)
+
+
+# Orders of the search results: the columns they need, the function computing the sort values from these columns and
+# whether the values are sorted ascending
+SORT_ORDERS: dict[str, tuple[tuple[str, ...], Callable[..., np.ndarray], bool]] = {
+    'rating': (('AggregatedRating',), np.asarray, False),
+    'bayesian_rating': (('AggregatedRating', 'ReviewCount'), bayesian_ratings, False),
+    'total_time': (('TotalTime_minutes',), np.asarray, True),
+    'calories': (('Calories',), np.asarray, True),
+    'protein': (('ProteinContent',), np.asarray, False),
+}
+
+def sort_permutations(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """
+    Precomputes the stable sort permutation of the recipes for each order of `SORT_ORDERS` available in df, once per
+    dataset: the recipes with equal values keep the order of the dataset, the missing values are last.
+
+    Args:
+        df (DataFrame): the recipes
+
+    Returns:
+        dict[str, np.ndarray]: the row positions of the recipes in each order
+    """
+    permutations = {}
+    for order, (columns, sort_values, ascending) in SORT_ORDERS.items():
+        if not set(columns) <= set(df.columns):
+            continue
+        values = sort_values(*(df[col].to_numpy(dtype=np.float64, na_value=np.nan) for col in columns))
+        # np.argsort puts the NaN last, also after the negation of a descending order
+        permutations[order] = np.argsort(values if ascending else -values, kind='stable').astype(np.int32)
+    return permutations
+
+
+class RecipeIndex:
+    """
+    The recipes and their search structures, built once per dataset (`st.cache_resource`) and shared by all the
+    sessions, with a bounded LRU cache of the row positions of the last searches. Unlike `st.cache_data`, a search
+    neither hashes the dataframe nor pickles a copy of its result: the cache keys are the normalized filters and the
+    cached values are read-only arrays of row positions.
+
+    Args:
+        df (DataFrame): the recipes, not modified
+        dict_columns (dict): mapping of filter keys to the corresponding columns in df
+        ingredient_index (IngredientBitmapIndex or IngredientStore): index of the ingredients of the recipes
+        cache_size (int): the maximum number of cached searches
+    """
+    def __init__(self, df: pd.DataFrame, dict_columns: dict[str, str], ingredient_index: Any = None,
+                 cache_size: int = 256):
+        self.df = df
+        self.dict_columns = dict_columns
+        self.ingredient_index = ingredient_index
+        self.arrays = filter_arrays(df, dict_columns)
+        self.sort_permutations = sort_permutations(df)
+        self.cache_size = cache_size
+        self.cache: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self.lock = threading.Lock() # the sessions run in different threads
+        self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def cache_key(filters: dict[str, Any]) -> tuple:
+        """Returns: tuple (the filters sorted by key, the lists of values as sorted tuples: the filters on lists
+        require all their values, in any order)"""
+        return tuple(sorted(
+            (key, tuple(sorted(set(value))) if isinstance(value, (list, tuple, set)) else value)
+            for key, value in filters.items()
+        ))
+
+    def search_rows(self, filters: dict[str, Any]) -> np.ndarray:
+        """Returns: np.ndarray (read-only row positions of the recipes matching the filters, see `search_recipes`)"""
+        key = self.cache_key(filters)
+        with self.lock:
+            if key in self.cache:
+                self.hits += 1
+                self.cache.move_to_end(key)
+                return self.cache[key]
+            self.misses += 1
+        rows = filter_rows(self.df, filters, self.dict_columns, self.ingredient_index, self.arrays,
+                           order_by_selectivity=True)
+        rows.flags.writeable = False
+        with self.lock:
+            self.cache[key] = rows
+            self.cache.move_to_end(key)
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+                self.evictions += 1
+        return rows
+
+    def sorted_rows(self, rows: np.ndarray, order: str, k: int = None) -> np.ndarray:
+        """Sorts row positions by intersecting them with the precomputed permutation of the order, in linear time.
+
+        Args:
+           rows (np.ndarray): The row positions of the recipes.
+           order (str): The order, a key of `sort_permutations`.
+           k (int): The number of recipes to keep, all by default.
+
+        Returns: np.ndarray (the first k row positions in the order)
+        """
+        permutation = self.sort_permutations[order]
+        mask = np.zeros(len(self.df), dtype=bool)
+        mask[rows] = True
+        return permutation[mask[permutation]][:k]
+
+    def search(self, filters: dict[str, Any], order: str = None) -> Tuple[pd.DataFrame, int]:
+        """Returns: DataFrame, int (the recipes matching the filters, in the order if given (see `sort_permutations`),
+        and their number, see `search_recipes`)"""
+        rows = self.search_rows(filters)
+        if order is not None:
+            rows = self.sorted_rows(rows, order)
+        return self.df.iloc[rows], len(rows)
+
+    def cache_info(self) -> dict[str, int]:
+        """Returns: dict (number of cache hits, misses and evictions, current and maximum number of cached searches)"""
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'size': len(self.cache), 'max_size': self.cache_size}
+
 def initialize_session_state() -> None:
     """
     Initializes all necessary keys in the Streamlit session state if they are not already present
@@ -164,8 +465,10 @@ def initialize_session_state() -> None:
         'ingredients': '',
         'instructions': '',
         'link': '',
+        'correspondance_rate': None,
         'total_recipes': None,
-        'search_df': None,
+        'search_rows': None,
+        'search_rates': None,
         'research_summary': None,
         'filters': None,
         'recipe_type': None,
@@ -218,23 +521,70 @@ def display_html_in_streamlit(html_file_path, css_file_path, height, width):
     except Exception as e:
         st.error(f"An error occurred: {e}")
 
-def clean_query(query:str)-> str:
+@st.cache_resource
+def load_singular_nouns(data_dir: str) -> dict[str, str]:
+    """Loads the singular form of the ingredient names computed by the preprocessing script, if it was run with the 
+    same inflect version.
+
+    Args:
+       data_dir (str): The folder of the dataset, where the cache file is written.
+
+    Returns: dict (singular form of each ingredient name, empty if there is no cache file)
+    """
+    cache_path = os.path.join(data_dir, SINGULAR_NOUNS_CACHE_NAME)
+    if not os.path.exists(cache_path):
+        return {}
+    with open(cache_path, encoding='utf-8') as f:
+        return json.load(f)
+
+def clean_query(query:str, singular_nouns: dict[str, str] = None)-> str:
     """Cleans the query passed by the user by removing ponctuation between ingredients 
     and singularizing them.
 
     Args:
        query (str): The raw search query of the user.
+       singular_nouns (dict): Known singular forms (see `load_singular_nouns`), the other words are singularized with inflect.
 
     Returns: string (query wwithout ponctuation and in singular)
     """
-    inflect_engine = inflect.engine()
+    singular_nouns = singular_nouns or {}
     # Remove punctuation
     rm_ponct = ''.join([char for char in query if char not in string.punctuation])
     # Singularize words
-    cleaned_query = [inflect_engine.singular_noun(ingredient) or ingredient for ingredient in rm_ponct.split()]
+    cleaned_query = [
+        singular_nouns[word] if word in singular_nouns else inflect_engine.singular_noun(word) or word
+        for word in rm_ponct.split()
+    ]
     return ' '.join(cleaned_query)
 
-def query_error(query: list, ing: list, rec: list): 
+def title_search_rows(rows: np.ndarray, rates: np.ndarray, query: list, title_index: Any, ingredient_index: Any,
+                      relevance_index: Any = None, tie_breaker: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Keeps the search results whose title has a word starting with each word of the query, or with all the words
+    of the query as ingredients. All of them are kept whatever the order, so the number of results doesn't depend on it.
+
+    Args:
+       rows (np.ndarray): The row positions of the results, in their order.
+       rates (np.ndarray): The correspondance rate of each result with the fridge, None without fridge search.
+       query (list): The words of the cleaned query.
+       title_index (TitleIndex): The index of the words of the recipe titles.
+       ingredient_index (IngredientBitmapIndex): The index of the ingredients of the recipes.
+       relevance_index (BM25Index): If given and without fridge search, the results are sorted by relevance to the
+            query instead of keeping their order.
+       tie_breaker (np.ndarray): Value of each recipe ranking first the results with the same relevance.
+
+    Returns: Tuple[np.ndarray, np.ndarray] (the row positions of the matching results and their rates)
+    """
+    matches = title_index.recipes_matching(query)[rows] | ingredient_index.recipes_with_all(query, ignore_case=True)[rows]
+    rows = rows[matches]
+    rates = rates[matches] if rates is not None else None
+    # the fridge search keeps its own ranking
+    if relevance_index is not None and rates is None:
+        candidates = np.zeros(relevance_index.n_recipes, dtype=bool)
+        candidates[rows] = True
+        rows = relevance_index.top_k(query, None, candidates, tie_breaker)
+    return rows, rates
+
+def query_error(query: list, ing: list, rec: Any, spell: Any = None): 
     """Handles query error by returning an error message when no recipe or ingredient are found, 
     either the word might be missplelled and, when corrected, recognized or the word is unknown.
     If the query is correct, returns a message to inform that recipes were found.
@@ -242,20 +592,20 @@ def query_error(query: list, ing: list, rec: list):
     Args:
        query (list): The search query of the user transformed into a list of words.
        ing (list) : The list of unique ingredients.
-       rec (list) : The list of recipes.
+       rec (TitleIndex) : The index of the words of the recipe titles, a word is found if a title word starts with it.
+       spell (SpellCorrector) : The spell corrector with the vocabulary of the recipes, no correction if not given.
     """
     response: list = []
-    spell = SpellChecker()
 
     # Check if all words in the query already match valid ingredients or recipes
-    if all(word in ing or any(word in r for r in rec) for word in query):
+    if all(word in ing or rec.has_prefix(word) for word in query):
         return st.markdown("Matching recipes or ingredients found! Fill out desired filters and press *find a recipe*")
 
     # else attempt a correction
     for word in query:
-        if word not in ing and not any(word in r for r in rec):
-            corrected_word = spell.correction(word)
-            if corrected_word in ing or any(corrected_word in r for r in rec):
+        if word not in ing and not rec.has_prefix(word):
+            corrected_word = spell.correction(word) if spell is not None else None
+            if corrected_word is not None and (corrected_word in ing or rec.has_prefix(corrected_word)):
                 response.append(corrected_word)
 
     # Respond to the user
@@ -0,0 +1,112 @@
+from typing import Iterable, Union
+import numpy as np
+
+# An ingredient gets a bitmap when it is in more than 1 recipe out of DENSE_RATIO: its bitmap (1 bit per recipe) is
+# then smaller than its list of int32 row positions
+DENSE_RATIO = 32
+
+
+class IngredientBitmapIndex:
+    """Inverted index from each ingredient to the recipes containing it, built once per dataset. Like roaring bitmaps,
+    the frequent ingredients are stored as bitmaps (`np.packbits`, 1 bit per recipe) and the rare ones as sorted
+    arrays of row positions, so that the index stays small whatever the number of ingredients. An AND query is a few
+    bitwise operations on the bitmaps, or a lookup of the candidate rows of the rarest ingredient in the others.
+
+    Args:
+        vocabulary (list[str]): the distinct ingredients
+        offsets (np.ndarray): offsets of the postings of each ingredient
+        postings (np.ndarray): sorted row positions of the recipes containing each ingredient, concatenated
+        n_recipes (int): number of recipes
+    """
+    def __init__(self, vocabulary: list[str], offsets: np.ndarray, postings: np.ndarray, n_recipes: int):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.postings = postings
+        self.n_recipes = n_recipes
+        self.term_ids = {term: i for i, term in enumerate(vocabulary)}
+        self.lowercase_ids: dict[str, list[int]] = {}
+        for i, term in enumerate(vocabulary):
+            self.lowercase_ids.setdefault(str(term).lower(), []).append(i)
+
+        counts = np.diff(offsets)
+        dense_ids = np.flatnonzero(counts * DENSE_RATIO > n_recipes)
+        # Row of the bitmap of each dense ingredient in `bitmaps`, -1 for the sparse ones
+        self.bitmap_rows = np.full(len(vocabulary), -1, dtype=np.int64)
+        self.bitmap_rows[dense_ids] = np.arange(len(dense_ids))
+        self.bitmaps = np.zeros((len(dense_ids), (n_recipes + 7) // 8), dtype=np.uint8)
+        for row, i in enumerate(dense_ids):
+            self.bitmaps[row] = np.packbits(self.to_mask(self.rows(i)))
+
+    @classmethod
+    def from_bundle(cls, bundle) -> 'IngredientBitmapIndex':
+        """Returns: IngredientBitmapIndex (the index of the postings of the search bundle of the dataset)"""
+        return cls(bundle.ingredients, bundle.ingredient_offsets, bundle.ingredient_postings, len(bundle.ner_offsets) - 1)
+
+    @classmethod
+    def from_store(cls, store) -> 'IngredientBitmapIndex':
+        """Returns: IngredientBitmapIndex (the index of the ingredient lists of an IngredientStore)"""
+        rows = np.repeat(np.arange(len(store), dtype=np.int32), store.lengths())
+        # Sort the (ingredient, recipe) pairs and drop the ingredients listed twice in a recipe
+        order = np.lexsort((rows, store.ids))
+        ids, rows = store.ids[order], rows[order]
+        unique = np.ones(len(ids), dtype=bool)
+        unique[1:] = (ids[1:] != ids[:-1]) | (rows[1:] != rows[:-1])
+        offsets = np.zeros(len(store.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ids[unique], minlength=len(store.vocabulary)), out=offsets[1:])
+        return cls(store.vocabulary, offsets, rows[unique], len(store))
+
+    def rows(self, term_id: int) -> np.ndarray:
+        """Returns: np.ndarray (sorted row positions of the recipes containing the ingredient)"""
+        return self.postings[self.offsets[term_id]:self.offsets[term_id + 1]]
+
+    def to_mask(self, rows: np.ndarray) -> np.ndarray:
+        """Returns: np.ndarray (boolean mask of the recipes at the row positions)"""
+        mask = np.zeros(self.n_recipes, dtype=bool)
+        mask[rows] = True
+        return mask
+
+    def operand(self, term_ids: list[int]) -> Union[np.ndarray, None]:
+        """Recipes containing at least one of the ingredients, as a packed bitmap (uint8) if one of them is dense, else
+        as sorted row positions. None if there are no ingredients."""
+        if not term_ids:
+            return None
+        bitmap_rows = self.bitmap_rows[term_ids]
+        if (bitmap_rows < 0).all():
+            return np.unique(np.concatenate([self.rows(i) for i in term_ids])) if len(term_ids) > 1 else self.rows(term_ids[0])
+        bitmap = np.bitwise_or.reduce(self.bitmaps[bitmap_rows[bitmap_rows >= 0]], axis=0)
+        for i in np.asarray(term_ids)[bitmap_rows < 0]:
+            bitmap |= np.packbits(self.to_mask(self.rows(i)))
+        return bitmap
+
+    def recipes_with_all(self, ingredients: Iterable[str], ignore_case: bool = False) -> np.ndarray:
+        """Finds the recipes containing all the ingredients (exact names).
+
+        Args:
+           ingredients (Iterable[str]): The ingredients.
+           ignore_case (bool): Whether to compare the lowercase names.
+
+        Returns: np.ndarray (boolean mask of the recipes, in row positions)
+        """
+        bitmaps, row_sets = [], []
+        for ingredient in ingredients:
+            term_ids = self.lowercase_ids.get(ingredient.lower(), []) if ignore_case else (
+                [self.term_ids[ingredient]] if ingredient in self.term_ids else []
+            )
+            operand = self.operand(term_ids)
+            if operand is None:  # unknown ingredient
+                return np.zeros(self.n_recipes, dtype=bool)
+            (bitmaps if operand.dtype == np.uint8 else row_sets).append(operand)
+
+        if not row_sets:
+            if not bitmaps:
+                return np.ones(self.n_recipes, dtype=bool)
+            bitmap = np.bitwise_and.reduce(bitmaps, axis=0) if len(bitmaps) > 1 else bitmaps[0]
+            return np.unpackbits(bitmap, count=self.n_recipes).view(bool)
+        # Candidates: the recipes of the rarest sparse ingredient, checked against the other ingredients
+        row_sets.sort(key=len)
+        rows = row_sets[0]
+        for other in row_sets[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        for bitmap in bitmaps:
+            rows = rows[(bitmap[rows >> 3] >> (7 - (rows & 7))) & 1 == 1]
+        return self.to_mask(rows)
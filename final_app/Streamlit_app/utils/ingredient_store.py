@@ -0,0 +1,78 @@
+from collections import Counter
+from typing import Iterable
+import numpy as np
+
+
+class IngredientStore:
+    """Ingredient lists (NER) of the recipes, dictionary-encoded in CSR form: the ingredients of the recipe at row
+    position i are `vocabulary[ids[offsets[i]:offsets[i + 1]]]`. It replaces the column of Python lists of strings.
+
+    Args:
+        vocabulary (list[str]): the distinct ingredients
+        ids (np.ndarray): int32 ingredient IDs (indices in `vocabulary`) of the recipes, concatenated
+        offsets (np.ndarray): offsets of the ingredient IDs of each recipe (one more than the number of recipes)
+    """
+    def __init__(self, vocabulary: list[str], ids: np.ndarray, offsets: np.ndarray):
+        self.vocabulary = vocabulary
+        self.ids = ids
+        self.offsets = offsets
+        self.term_ids = {term: i for i, term in enumerate(vocabulary)}
+        # IDs of the ingredients with the same lowercase name
+        self.lowercase_ids: dict[str, list[int]] = {}
+        for i, term in enumerate(vocabulary):
+            self.lowercase_ids.setdefault(str(term).lower(), []).append(i)
+
+    @classmethod
+    def from_bundle(cls, bundle) -> 'IngredientStore':
+        """Returns: IngredientStore (the store of the search bundle of the dataset, memory-mapped without copy)"""
+        return cls(bundle.ingredients, bundle.ner_ids, bundle.ner_offsets)
+
+    @classmethod
+    def from_lists(cls, ner: Iterable[Iterable[str]]) -> 'IngredientStore':
+        """Returns: IngredientStore (the store of the ingredient lists, with the vocabulary sorted by decreasing
+            number of occurrences as in the search bundle)"""
+        ner = [list(row) for row in ner]
+        counts = Counter(x for row in ner for x in row)
+        vocabulary = [term for term, _ in counts.most_common()]
+        term_ids = {term: i for i, term in enumerate(vocabulary)}
+        ids = np.fromiter((term_ids[x] for row in ner for x in row), dtype=np.int32, count=counts.total())
+        offsets = np.zeros(len(ner) + 1, dtype=np.int64)
+        np.cumsum([len(row) for row in ner], out=offsets[1:])
+        return cls(vocabulary, ids, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def lengths(self) -> np.ndarray:
+        """Returns: np.ndarray (number of ingredients of each recipe)"""
+        return np.diff(self.offsets)
+
+    def ingredients(self, row: int) -> list[str]:
+        """Returns: list[str] (the ingredient list of the recipe at the row position)"""
+        return [self.vocabulary[i] for i in self.ids[self.offsets[row]:self.offsets[row + 1]]]
+
+    def recipes_with_any(self, term_ids: Iterable[int]) -> np.ndarray:
+        """Returns: np.ndarray (boolean mask of the recipes containing at least one of the ingredient IDs)"""
+        mask = np.zeros(len(self), dtype=bool)
+        positions = np.flatnonzero(np.isin(self.ids, list(term_ids)))
+        mask[np.searchsorted(self.offsets, positions, side='right') - 1] = True
+        return mask
+
+    def recipes_with_all(self, ingredients: Iterable[str], ignore_case: bool = False) -> np.ndarray:
+        """Finds the recipes containing all the ingredients (exact names).
+
+        Args:
+           ingredients (Iterable[str]): The ingredients.
+           ignore_case (bool): Whether to compare the lowercase names.
+
+        Returns: np.ndarray (boolean mask of the recipes, in row positions)
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for ingredient in ingredients:
+            term_ids = self.lowercase_ids.get(ingredient.lower(), []) if ignore_case else (
+                [self.term_ids[ingredient]] if ingredient in self.term_ids else []
+            )
+            mask &= self.recipes_with_any(term_ids)
+            if not mask.any():
+                break
+        return mask
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Optional
+import numpy as np
+
+# Version of the bundle layout written by the preprocessing script (Preprocessing/search_bundle.py)
+SEARCH_BUNDLE_VERSION = 3
+
+
+@dataclass
+class SearchBundle:
+    """Precomputed search artifacts of a dataset, written by the preprocessing script next to the dataset.
+
+    Attributes:
+        ingredients (list[str]): ingredient vocabulary, by decreasing number of occurrences
+        ingredient_counts (np.ndarray): number of occurrences of each ingredient
+        ner_ids (np.ndarray): ingredient IDs (indices in `ingredients`) of the recipes, concatenated
+        ner_offsets (np.ndarray): offsets of the ingredient IDs of each recipe in `ner_ids`
+        ingredient_offsets (np.ndarray): offsets of the postings of each ingredient
+        ingredient_postings (np.ndarray): row positions of the recipes of each ingredient, concatenated
+        filter_options (dict[str, list]): distinct values of the filter columns and names of the boolean columns
+        spelling (dict[str, int]): word frequencies of the spellcheck dictionary
+        manifest (dict): version of the bundle and fingerprint of its dataset
+    """
+    ingredients: list[str]
+    ingredient_counts: np.ndarray
+    ner_ids: np.ndarray
+    ner_offsets: np.ndarray
+    ingredient_offsets: np.ndarray
+    ingredient_postings: np.ndarray
+    filter_options: dict[str, list]
+    spelling: dict[str, int]
+    manifest: dict
+
+    def __post_init__(self):
+        self.ingredient_ids = {ingredient: i for i, ingredient in enumerate(self.ingredients)}
+
+    def ingredient_recipes(self, ingredient: str) -> np.ndarray:
+        """Returns: np.ndarray (sorted row positions of the recipes containing the ingredient, empty if unknown)"""
+        i = self.ingredient_ids.get(ingredient)
+        if i is None:
+            return self.ingredient_postings[:0]
+        return self.ingredient_postings[self.ingredient_offsets[i]:self.ingredient_offsets[i + 1]]
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """Returns: str (hexadecimal SHA-256 digest of the file content, read in chunks)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_json(bundle_dir: str, name: str):
+    with open(os.path.join(bundle_dir, name), encoding='utf-8') as f:
+        return json.load(f)
+
+def load_array(bundle_dir: str, name: str) -> np.ndarray:
+    """Returns: np.ndarray (read-only memory map of the array file: the pages are read from disk when used and shared
+        by the processes reading the same file)"""
+    return np.load(os.path.join(bundle_dir, name), mmap_mode='r')
+
+def load_search_bundle(dataset_path: str) -> Optional[SearchBundle]:
+    """Loads the search bundle written by the preprocessing script next to the dataset (`<dataset stem>.search`).
+
+    Args:
+       dataset_path (str): path of the parquet dataset.
+
+    Returns: SearchBundle (None if there is no bundle, if it has another version or if it was built from another
+        version of the dataset: the caller then computes what it needs from the dataset)
+    """
+    bundle_dir = os.path.splitext(dataset_path)[0] + '.search'
+    if not os.path.exists(os.path.join(bundle_dir, 'manifest.json')):
+        return None
+    manifest = load_json(bundle_dir, 'manifest.json')
+    if manifest.get('version') != SEARCH_BUNDLE_VERSION or manifest.get('dataset_sha256') != file_sha256(dataset_path):
+        return None
+    ingredients = load_json(bundle_dir, 'ingredients.json')
+    return SearchBundle(
+        ingredients=ingredients['terms'],
+        ingredient_counts=np.array(ingredients['counts'], dtype=np.int64),
+        ner_ids=load_array(bundle_dir, 'ner_ids.npy'),
+        ner_offsets=load_array(bundle_dir, 'ner_offsets.npy'),
+        ingredient_offsets=load_array(bundle_dir, 'ingredient_offsets.npy'),
+        ingredient_postings=load_array(bundle_dir, 'ingredient_postings.npy'),
+        filter_options=load_json(bundle_dir, 'filters.json'),
+        spelling=load_json(bundle_dir, 'spelling.json'),
+        manifest=manifest,
+    )
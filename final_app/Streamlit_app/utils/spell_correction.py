@@ -0,0 +1,103 @@
+import string
+from collections import Counter
+from typing import Union
+
+# Removed from the words of the dictionary, as from the search queries (see `clean_query`)
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+MAX_EDIT_DISTANCE = 2
+# Only the deletes of the first characters of the words are indexed, as in SymSpell: the longer words don't multiply
+# the number of deletes, and their candidates are checked with the full edit distance
+PREFIX_LENGTH = 7
+
+
+def deletes(word: str, max_distance: int) -> set[str]:
+    """Returns: set[str] (the word and the strings obtained by deleting up to max_distance of its characters)"""
+    result, edits = {word}, {word}
+    for _ in range(max_distance):
+        edits = {edit[:i] + edit[i + 1:] for edit in edits for i in range(len(edit))}
+        result |= edits
+    return result
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Damerau-Levenshtein distance (optimal string alignment: insertions, deletions, substitutions and transpositions
+    of adjacent characters).
+
+    Args:
+       a (str): The first word.
+       b (str): The second word.
+       max_distance (int): The largest distance of interest.
+
+    Returns: int (the distance, max_distance + 1 if it is larger than max_distance)
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous2, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+class SpellCorrector:
+    """Spell correction of the search queries with the vocabulary of the recipes (SymSpell algorithm), built once per
+    dataset. The deletes of every word of the dictionary are precomputed: the candidates of a misspelled word are the
+    dictionary words sharing one of its deletes, found with a few dictionary lookups instead of generating all the
+    edits of the word or comparing it with every word.
+
+    Args:
+        *vocabularies (dict[str, int]): number of occurrences of texts of the recipes (example: the ingredients, the
+            words of the titles), their lowercase words without punctuation are the dictionary
+        max_distance (int): the largest edit distance of a correction
+        prefix_length (int): the number of first characters of the words whose deletes are indexed
+    """
+    def __init__(self, *vocabularies: dict[str, int], max_distance: int = MAX_EDIT_DISTANCE,
+                 prefix_length: int = PREFIX_LENGTH):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.frequencies: Counter = Counter()
+        for vocabulary in vocabularies:
+            for text, count in vocabulary.items():
+                for word in str(text).lower().translate(PUNCTUATION_TABLE).split():
+                    self.frequencies[word] += int(count)
+        # dictionary words of each delete of their prefix
+        self.deletes: dict[str, list[str]] = {}
+        for word in self.frequencies:
+            for delete in deletes(word[:prefix_length], max_distance):
+                self.deletes.setdefault(delete, []).append(word)
+
+    def __contains__(self, word: str) -> bool:
+        return word.lower() in self.frequencies
+
+    def lookup(self, word: str, max_distance: int = None) -> list[tuple[str, int, int]]:
+        """Finds the dictionary words close to a word.
+
+        Args:
+           word (str): The word to correct.
+           max_distance (int): The largest edit distance of the suggestions, the one of the dictionary by default.
+
+        Returns: list[tuple[str, int, int]] (the suggestions with their edit distance and number of occurrences, by
+            increasing distance then decreasing number of occurrences)
+        """
+        word = word.lower()
+        max_distance = min(max_distance if max_distance is not None else self.max_distance, self.max_distance)
+        candidates = {candidate for delete in deletes(word[:self.prefix_length], max_distance)
+                      for candidate in self.deletes.get(delete, [])}
+        suggestions = []
+        for candidate in candidates:
+            distance = 0 if candidate == word else edit_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                suggestions.append((candidate, distance, self.frequencies[candidate]))
+        return sorted(suggestions, key=lambda suggestion: (suggestion[1], -suggestion[2], suggestion[0]))
+
+    def correction(self, word: str) -> Union[str, None]:
+        """Returns: str (the word if it is in the dictionary, else its closest and most frequent suggestion, None if
+        there are none)"""
+        suggestions = self.lookup(word)
+        return suggestions[0][0] if suggestions else None
@@ -0,0 +1,75 @@
+import string
+from bisect import bisect_left
+from collections import Counter
+from typing import Iterable
+import numpy as np
+
+# Removed from the titles before splitting them into tokens, as from the search queries (see `clean_query`)
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+
+def title_words(title: str) -> list[str]:
+    """Returns: list[str] (the lowercase words of the title, without punctuation)"""
+    return title.lower().translate(PUNCTUATION_TABLE).split()
+
+
+class TitleIndex:
+    """Inverted index of the words of the recipe titles, built once per dataset. The distinct words are sorted, so
+    that the words starting with a prefix are a contiguous range found by bisection, and so are their postings: a
+    prefix lookup is two bisections and a slice instead of a scan of all the titles.
+
+    Args:
+        titles (Iterable[str]): the recipe titles, in the order of the dataset
+    """
+    def __init__(self, titles: Iterable[str]):
+        words = [title_words(str(title)) for title in titles]
+        self.n_recipes = len(words)
+        counts = Counter(word for title in words for word in title)
+        self.terms = sorted(counts)
+        self.counts = np.array([counts[term] for term in self.terms], dtype=np.int64)
+        term_ids = {term: i for i, term in enumerate(self.terms)}
+
+        ids = np.fromiter((term_ids[word] for title in words for word in title), dtype=np.int32, count=counts.total())
+        rows = np.repeat(np.arange(self.n_recipes, dtype=np.int32), [len(title) for title in words])
+        # Sort the (word, recipe) pairs and drop the words repeated in a title
+        order = np.lexsort((rows, ids))
+        ids, rows = ids[order], rows[order]
+        unique = np.ones(len(ids), dtype=bool)
+        unique[1:] = (ids[1:] != ids[:-1]) | (rows[1:] != rows[:-1])
+        self.postings = rows[unique]
+        self.offsets = np.zeros(len(self.terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(ids[unique], minlength=len(self.terms)), out=self.offsets[1:])
+
+    def prefix_range(self, prefix: str) -> tuple[int, int]:
+        """Returns: tuple[int, int] (range of the IDs of the words starting with the prefix, case insensitive)"""
+        prefix = prefix.lower()
+        start = bisect_left(self.terms, prefix)
+        # chr(0x10FFFF) is the largest character: the words starting with the prefix sort before prefix + chr(0x10FFFF)
+        return start, bisect_left(self.terms, prefix + chr(0x10FFFF), lo=start)
+
+    def has_prefix(self, prefix: str) -> bool:
+        """Returns: bool (whether a word of a title starts with the prefix)"""
+        start, stop = self.prefix_range(prefix)
+        return start < stop
+
+    def recipes_with_prefix(self, prefix: str) -> np.ndarray:
+        """Returns: np.ndarray (sorted row positions of the recipes with a word starting with the prefix)"""
+        start, stop = self.prefix_range(prefix)
+        rows = self.postings[self.offsets[start]:self.offsets[stop]]
+        return np.unique(rows) if stop - start > 1 else rows
+
+    def recipes_matching(self, query: Iterable[str]) -> np.ndarray:
+        """Finds the recipes whose title has, for each word of the query, a word starting with it (example: 'chick
+        soup' matches 'Chicken Noodle Soup').
+
+        Args:
+           query (Iterable[str]): The words of the query.
+
+        Returns: np.ndarray (boolean mask of the recipes, in row positions)
+        """
+        mask = np.ones(self.n_recipes, dtype=bool)
+        for word in query:
+            word_mask = np.zeros(self.n_recipes, dtype=bool)
+            word_mask[self.recipes_with_prefix(word)] = True
+            mask &= word_mask
+        return mask